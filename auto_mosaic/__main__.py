@@ -6,6 +6,8 @@
     python -m auto_mosaic                    # 通常起動
     python -m auto_mosaic --setup            # 初回セットアップダイアログを強制表示
     python -m auto_mosaic --first-run        # 初回セットアップダイアログを強制表示
+    python -m auto_mosaic batch --input DIR --output DIR [--profile NAME]
+                                             # GUIなしでフォルダを一括処理
     python -m auto_mosaic --help             # ヘルプ表示
 """
 
@@ -25,6 +27,8 @@ def parse_args():
   python -m auto_mosaic                    通常起動
   python -m auto_mosaic --setup            初回セットアップダイアログを表示
   python -m auto_mosaic --first-run        初回セットアップダイアログを表示
+  python -m auto_mosaic batch --input in --output out --profile 標準
+                                           GUIなしでフォルダを一括処理
 
 機能:
   • YOLO検出 + SAMセグメンテーション
@@ -61,6 +65,44 @@ def parse_args():
         version="自動モザエセ v1.0.0"
     )
     
+    subparsers = parser.add_subparsers(dest="command")
+    
+    batch_parser = subparsers.add_parser(
+        "batch",
+        help="GUIなしでフォルダ内の画像を一括処理（ヘッドレスモード）"
+    )
+    batch_parser.add_argument(
+        "--input",
+        required=True,
+        help="入力画像フォルダ（サブフォルダも含めて検索）"
+    )
+    batch_parser.add_argument(
+        "--output",
+        required=True,
+        help="出力フォルダ（モザイクタイプ別サブフォルダを作成）"
+    )
+    batch_parser.add_argument(
+        "--profile",
+        default=None,
+        help="使用する設定プロファイル名（省略時はデフォルト設定）"
+    )
+    batch_parser.add_argument(
+        "--summary",
+        default=None,
+        help="画像ごとの処理結果JSONLの出力先（省略時は 出力フォルダ/batch_summary.jsonl）"
+    )
+    batch_parser.add_argument(
+        "--device",
+        choices=["auto", "cpu", "gpu"],
+        default=None,
+        help="推論デバイス（省略時はプロファイルの設定）"
+    )
+    batch_parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="前回の実行から入力・設定が変わっていない画像をスキップ（出力フォルダのマニフェストを使用）"
+    )
+    
     return parser.parse_args()
 
 def main():
@@ -96,6 +138,22 @@ def main():
 
     args = parse_args()
     
+    if args.command == "batch":
+        # ヘッドレスバッチモード（GUI・対話的なエラー表示を使用しない）
+        from auto_mosaic.src.batch import run_batch
+        try:
+            sys.exit(run_batch(
+                input_dir=args.input,
+                output_dir=args.output,
+                profile=args.profile,
+                summary_path=args.summary,
+                device=args.device,
+                incremental=args.incremental
+            ))
+        except KeyboardInterrupt:
+            print("\n⚠️ ユーザーによって中断されました")
+            sys.exit(130)
+    
     # utils.pyの関数をインポート（循環インポート回避のため遅延インポート）
     from auto_mosaic.src.utils import is_developer_mode
     
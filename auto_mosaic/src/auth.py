@@ -3,8 +3,7 @@
 Monthly password protection with one-time monthly authentication
 """
 
-import tkinter as tk
-from tkinter import ttk, messagebox
+# tkinterはダイアログ表示時のみ遅延インポート（ヘッドレス環境では認証キャッシュの確認だけを行うため）
 from datetime import datetime, timedelta
 import hashlib
 import os
@@ -560,6 +559,8 @@ class MonthlyAuth:
     
     def show_auth_dialog(self, parent=None) -> bool:
         """認証ダイアログを表示（exe化対応強化）"""
+        import tkinter as tk
+        from tkinter import ttk, messagebox
         
         self._log_debug("Starting authentication dialog")
         
@@ -924,6 +925,7 @@ def authenticate_user(parent=None, force_auth_dialog=False) -> bool:
                     return False
             else:
                 # 本番環境では従来通り
+                from tkinter import messagebox
                 messagebox.showerror("認証システムエラー", 
                                    f"{error_msg}\n\n" +
                                    "認証をスキップして続行します。")
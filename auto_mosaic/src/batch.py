@@ -0,0 +1,152 @@
+"""
+ヘッドレスバッチ処理モード
+
+GUI（Tkinter）を起動せずにフォルダ内の画像を一括処理する。
+ディスプレイのないレンダーサーバーでの実行を想定し、
+画像ごとの処理結果をJSONL形式で出力する。
+
+使用方法:
+    python -m auto_mosaic batch --input DIR --output DIR --profile NAME [--incremental]
+"""
+
+import json
+import time
+from pathlib import Path
+from typing import Optional
+
+from auto_mosaic.src.utils import logger, ProcessingConfig
+
+
+def _check_headless_authentication() -> bool:
+    """
+    GUIを使わずに認証状態を確認する
+
+    バッチモードでは認証ダイアログを表示できないため、
+    GUIで認証済みの状態（キャッシュ）が有効な場合のみ処理を許可する。
+
+    Returns:
+        bool: 認証済みの場合True
+    """
+    try:
+        from auto_mosaic.src.auth_config import AuthConfig, AuthMethod
+
+        auth_method = AuthConfig().get_auth_method()
+        if auth_method == AuthMethod.DISCORD:
+            from auto_mosaic.src.discord_auth_adapter import DiscordAuthAdapter
+            return DiscordAuthAdapter().is_authenticated()
+
+        # 月次パスワード認証（認証キャッシュの確認のみ。auth.pyはダイアログ表示時のみtkinterをインポート）
+        from auto_mosaic.src.auth import MonthlyAuth
+        return MonthlyAuth().is_already_authenticated_this_month()
+
+    except Exception as e:
+        logger.error(f"Headless authentication check failed: {e}")
+        return False
+
+
+def _load_config(profile: Optional[str]) -> Optional[ProcessingConfig]:
+    """プロファイル名から処理設定を読み込む（未指定時はデフォルト設定）"""
+    from auto_mosaic.src.config_manager import ConfigManager
+
+    config_manager = ConfigManager()
+    if profile:
+        return config_manager.load_profile(profile)
+
+    config = config_manager.load_default()
+    return config if config is not None else ProcessingConfig()
+
+
+def run_batch(input_dir: str, output_dir: str, profile: Optional[str] = None,
+              summary_path: Optional[str] = None, device: Optional[str] = None,
+              incremental: bool = False) -> int:
+    """
+    Run headless batch processing
+
+    Args:
+        input_dir: Input folder (searched recursively)
+        output_dir: Output folder (mosaic type subfolders are created inside)
+        profile: Saved configuration profile name (None = default settings)
+        summary_path: JSONL summary file (default: <output_dir>/batch_summary.jsonl)
+        device: Device override ("auto", "cpu", "gpu")
+        incremental: Skip images unchanged since the last run (output manifest)
+
+    Returns:
+        Process exit code (0 = all images processed, 1 = some images failed, 2 = setup error)
+    """
+    # 遅延インポート（重い依存関係は認証確認後にロード）
+    from auto_mosaic.src.pipeline import ImagePipeline, collect_image_paths
+
+    input_path = Path(input_dir)
+    output_path = Path(output_dir)
+
+    if not input_path.is_dir():
+        print(f"❌ 入力フォルダが見つかりません: {input_path}")
+        return 2
+
+    if not _check_headless_authentication():
+        print("❌ 認証されていません。GUIで一度認証を完了してから再実行してください。")
+        return 2
+
+    config = _load_config(profile)
+    if config is None:
+        print(f"❌ 設定プロファイル '{profile}' が見つかりません")
+        return 2
+
+    if device:
+        config.device_mode = device
+    if incremental:
+        config.use_incremental_processing = True
+
+    image_paths = collect_image_paths(input_path)
+    if not image_paths:
+        print(f"⚠️ 画像ファイルが見つかりませんでした: {input_path}")
+        return 0
+
+    output_path.mkdir(parents=True, exist_ok=True)
+    summary_file = Path(summary_path) if summary_path else output_path / "batch_summary.jsonl"
+    summary_file.parent.mkdir(parents=True, exist_ok=True)
+
+    def progress_callback(event_type, data):
+        if event_type == "status":
+            print(data, flush=True)
+
+    pipeline = ImagePipeline(config, output_dir=output_path, progress_callback=progress_callback)
+
+    try:
+        print("モデルを初期化しています...", flush=True)
+        pipeline.initialize_models()
+    except Exception as e:
+        logger.error(f"Failed to initialize models: {str(e)}")
+        print(f"❌ モデルの初期化に失敗しました: {str(e)}")
+        return 2
+
+    total_images = len(image_paths)
+    failed = 0
+    skipped = 0
+    batch_start = time.time()
+
+    with open(summary_file, 'w', encoding='utf-8') as f:
+        def on_result(index, image_path, summary, error):
+            nonlocal failed, skipped
+            if error is not None:
+                failed += 1
+                error_msg = f"画像 {Path(image_path).name} の処理中にエラーが発生しました: {str(error)}"
+                logger.error(error_msg)
+                print(f"❌ {error_msg}", flush=True)
+                summary = {"input": str(image_path), "status": "error", "error": str(error),
+                           "detections": [], "outputs": [], "timings": {}}
+            elif summary["status"] == "skipped":
+                skipped += 1
+
+            f.write(json.dumps(summary, ensure_ascii=False) + "\n")
+            f.flush()
+
+        pipeline.run([str(p) for p in image_paths], on_result=on_result)
+
+    batch_time = time.time() - batch_start
+    skipped_suffix = f"（変更なしでスキップ: {skipped} 枚）" if skipped else ""
+    print(f"✅ {total_images - failed}/{total_images} 枚の処理が完了しました{skipped_suffix} ({batch_time:.1f}s)")
+    print(f"📄 処理結果: {summary_file}")
+    logger.info(f"[Batch] Processed {total_images} images ({failed} failed, {skipped} skipped) in {batch_time:.2f}s")
+
+    return 1 if failed else 0
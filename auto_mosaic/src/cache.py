@@ -0,0 +1,400 @@
+"""
+処理結果のディスクキャッシュ
+
+同じフォルダをモザイク設定だけ変えて再処理する場合に、
+SAMの画像埋め込み（set_image の結果）や検出結果・マスクを再利用して推論を省略する。
+キャッシュは get_app_data_dir() 配下に保存し、合計サイズの上限を超えた場合は
+最も古く使われたエントリから削除する（LRU）。
+"""
+
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from auto_mosaic.src.utils import logger, get_app_data_dir, RoiMask, to_roi_mask
+
+
+def get_cache_dir(name: str) -> Path:
+    """
+    Get cache directory path (AppData方式 - exe化対応)
+
+    Args:
+        name: Cache sub-directory name
+
+    Returns:
+        Path: キャッシュディレクトリのパス
+    """
+    cache_dir = get_app_data_dir() / "cache" / name
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    return cache_dir
+
+
+def model_file_digest(paths) -> str:
+    """
+    Identity of model files (resolved path, size and modification time)
+
+    モデルファイルを差し替えた場合に古いキャッシュを使わないよう、キャッシュキーに含める。
+
+    Args:
+        paths: Model file paths (missing files are ignored)
+
+    Returns:
+        Short hex digest ("" when no file exists)
+    """
+    identities = []
+    for path in paths:
+        try:
+            path = Path(path).resolve()
+            stat = path.stat()
+        except (OSError, TypeError):
+            continue
+        identities.append(f"{path}|{stat.st_size}|{stat.st_mtime_ns}")
+    if not identities:
+        return ""
+    return hashlib.blake2b("\n".join(sorted(set(identities))).encode("utf-8"), digest_size=8).hexdigest()
+
+
+def image_hash(image: np.ndarray) -> str:
+    """
+    Compute content hash of a decoded image
+
+    Args:
+        image: Image array
+
+    Returns:
+        Hex digest of shape, dtype and pixel data
+    """
+    hasher = hashlib.blake2b(digest_size=20)
+    hasher.update(f"{image.shape}|{image.dtype}".encode("utf-8"))
+    hasher.update(np.ascontiguousarray(image).data)
+    return hasher.hexdigest()
+
+
+class _DiskLRUCache:
+    """Size-bounded on-disk cache; entries are files sharing a key with different suffixes"""
+
+    # エントリを構成するファイルの拡張子（先頭がLRU判定に使用される主ファイル）
+    SUFFIXES = (".npy",)
+
+    def __init__(self, cache_dir: Path, max_size_mb: int):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_size = int(max_size_mb) * 1024 * 1024
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self._total_size = sum(path.stat().st_size for path in self._entry_files())
+
+    def _entry_files(self):
+        files = []
+        for suffix in self.SUFFIXES:
+            files.extend(self.cache_dir.glob(f"*{suffix}"))
+        return files
+
+    def _entry_paths(self, key: str):
+        return [self.cache_dir / f"{key}{suffix}" for suffix in self.SUFFIXES]
+
+    def _write_entry(self, key: str, writers):
+        """
+        一時ファイル経由でエントリを書き込み、サイズ上限を超えた分を削除
+
+        Args:
+            key: Cache key
+            writers: Callables taking a binary file object, one per SUFFIXES entry
+        """
+        paths = self._entry_paths(key)
+        tmp_paths = [path.with_name(path.name + ".tmp") for path in paths]
+
+        with self._lock:
+            try:
+                self._remove_entry(key)
+
+                # 書き込み途中のファイルを読まないよう一時ファイル経由で保存
+                for tmp_path, writer in zip(tmp_paths, writers):
+                    with open(tmp_path, 'wb') as f:
+                        writer(f)
+                for tmp_path, path in zip(tmp_paths, paths):
+                    os.replace(tmp_path, path)
+
+                self._total_size += sum(path.stat().st_size for path in paths)
+            except Exception as e:
+                logger.warning(f"[{self.__class__.__name__}] Failed to write entry {key}: {e}")
+                for tmp_path in tmp_paths:
+                    tmp_path.unlink(missing_ok=True)
+                return
+
+            self._evict()
+
+    def _read_entry(self, key: str, reader):
+        """
+        エントリを読み込む（存在しない・破損している場合はNone）
+
+        Args:
+            key: Cache key
+            reader: Callable taking the entry paths and returning the loaded value
+        """
+        paths = self._entry_paths(key)
+
+        with self._lock:
+            if not all(path.exists() for path in paths):
+                self.misses += 1
+                return None
+
+            try:
+                value = reader(paths)
+
+                # LRU: アクセス時刻を更新
+                for path in paths:
+                    os.utime(path, None)
+            except Exception as e:
+                logger.warning(f"[{self.__class__.__name__}] Failed to read entry {key}: {e}")
+                self._remove_entry(key)
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            return value
+
+    def _remove_entry(self, key: str):
+        """エントリを削除（ロック取得済みで呼び出すこと）"""
+        for path in self._entry_paths(key):
+            try:
+                size = path.stat().st_size
+                path.unlink()
+                self._total_size -= size
+            except FileNotFoundError:
+                pass
+
+    def _evict(self):
+        """合計サイズが上限を超えている場合、古いエントリから削除（ロック取得済みで呼び出すこと）"""
+        if self._total_size <= self.max_size:
+            return
+
+        primary_suffix = self.SUFFIXES[0]
+        entries = sorted(self.cache_dir.glob(f"*{primary_suffix}"), key=lambda path: path.stat().st_mtime)
+        removed = 0
+        for primary_path in entries:
+            if self._total_size <= self.max_size:
+                break
+            self._remove_entry(primary_path.name[:-len(primary_suffix)])
+            removed += 1
+
+        if removed:
+            logger.info(f"[{self.__class__.__name__}] Evicted {removed} entries "
+                        f"(size: {self._total_size / 1024 / 1024:.1f}MB / {self.max_size / 1024 / 1024:.0f}MB)")
+
+    def clear(self):
+        """Remove all cached entries"""
+        with self._lock:
+            for path in self._entry_files():
+                path.unlink(missing_ok=True)
+            self._total_size = 0
+        logger.info(f"[{self.__class__.__name__}] Cleared")
+
+
+class EmbeddingCache(_DiskLRUCache):
+    """On-disk LRU cache of SAM image embeddings"""
+
+    SUFFIXES = (".npy", ".json")
+
+    def __init__(self, cache_dir: Optional[Path] = None, max_size_mb: int = 1024):
+        """
+        Initialize embedding cache
+
+        Args:
+            cache_dir: Cache directory (default: <app data>/cache/sam_embeddings)
+            max_size_mb: Maximum total size of cached embeddings in MB
+        """
+        super().__init__(cache_dir or get_cache_dir("sam_embeddings"), max_size_mb)
+
+    @staticmethod
+    def make_key(image_digest: str, model_type: str, crop: Tuple[int, int, int, int],
+                 model_digest: str = "") -> str:
+        """
+        Build cache key from image content hash, SAM model type, model file and crop rectangle
+
+        Args:
+            image_digest: Content hash of the full image (see image_hash)
+            model_type: SAM model type ("vit_b" etc.)
+            crop: (x1, y1, x2, y2) region passed to set_image
+            model_digest: Identity of the SAM checkpoint (see model_file_digest)
+
+        Returns:
+            Cache key usable as file name
+        """
+        x1, y1, x2, y2 = crop
+        return f"{model_type}_{model_digest}_{image_digest}_{x1}_{y1}_{x2}_{y2}"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Load cached embedding
+
+        Returns:
+            {"features": ndarray, "original_size": tuple, "input_size": tuple} or None
+        """
+        def reader(paths):
+            features_path, meta_path = paths
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            return {
+                "features": np.load(features_path),
+                "original_size": tuple(meta["original_size"]),
+                "input_size": tuple(meta["input_size"])
+            }
+
+        return self._read_entry(key, reader)
+
+    def put(self, key: str, features: np.ndarray, original_size: Tuple[int, int], input_size: Tuple[int, int]):
+        """
+        Store embedding and evict least recently used entries over the size limit
+
+        Args:
+            key: Cache key (see make_key)
+            features: Image embedding from the SAM encoder
+            original_size: Original (height, width) given to set_image
+            input_size: Resized (height, width) fed to the encoder
+        """
+        meta = json.dumps({"original_size": list(original_size), "input_size": list(input_size)})
+        self._write_entry(key, [
+            lambda f: np.save(f, np.ascontiguousarray(features)),
+            lambda f: f.write(meta.encode("utf-8"))
+        ])
+
+
+# 検出結果に影響する ProcessingConfig の項目（モザイク・ファイル名設定は含めない）
+DETECTION_CONFIG_KEYS = [
+    "confidence", "selected_models", "detector_mode", "use_anime_detector", "use_nudenet",
+    "use_nudenet_shrink", "nudenet_shrink_values", "use_custom_models", "custom_models",
+    "female_genital", "female_anal", "male_genital", "male_testis",
+    "use_fused_all_model", "use_cascade_detection", "cascade_gate", "cascade_gate_imgsz",
+    "cascade_gate_confidence", "sam_use_vit_b", "sam_roi_crop", "sam_roi_padding",
+    "detection_nms_iou", "detection_merge_mode", "detection_cross_class_merge", "use_reduced_decode", "reduced_decode_min_size",
+    "use_tiled_processing", "tiled_min_megapixels", "tiled_proxy_size", "tiled_tile_size", "tiled_tile_overlap",
+    "use_sliced_detection", "sliced_min_size", "sliced_tile_size", "sliced_tile_overlap", "sliced_max_tiles",
+]
+
+# キャッシュ形式を変更した場合はインクリメントして古いエントリを無効化
+DETECTION_CACHE_VERSION = 2
+
+
+def mask_to_rle(mask: np.ndarray) -> np.ndarray:
+    """
+    Encode binary mask as run lengths (row-major, starting with a background run)
+
+    Args:
+        mask: Binary mask (non-zero = foreground)
+
+    Returns:
+        uint32 run lengths alternating background / foreground
+    """
+    flat = mask.ravel() > 0
+    if flat.size == 0:
+        return np.zeros(1, dtype=np.uint32)
+    changes = np.flatnonzero(flat[1:] != flat[:-1]) + 1
+    runs = np.diff(np.concatenate(([0], changes, [flat.size])))
+    if flat[0]:
+        runs = np.concatenate(([0], runs))
+    return runs.astype(np.uint32)
+
+
+def rle_to_mask(runs: np.ndarray, shape: Tuple[int, int]) -> np.ndarray:
+    """
+    Decode run lengths produced by mask_to_rle
+
+    Args:
+        runs: Run lengths alternating background / foreground
+        shape: (height, width) of the mask
+
+    Returns:
+        uint8 mask (255=foreground, 0=background)
+    """
+    values = np.zeros(len(runs), dtype=np.uint8)
+    values[1::2] = 255
+    return np.repeat(values, runs.astype(np.int64)).reshape(shape)
+
+
+class DetectionCache(_DiskLRUCache):
+    """On-disk LRU cache of detection results and SAM masks"""
+
+    SUFFIXES = (".npz",)
+
+    def __init__(self, cache_dir: Optional[Path] = None, max_size_mb: int = 512):
+        """
+        Initialize detection cache
+
+        Args:
+            cache_dir: Cache directory (default: <app data>/cache/detections)
+            max_size_mb: Maximum total size of cached results in MB
+        """
+        super().__init__(cache_dir or get_cache_dir("detections"), max_size_mb)
+
+    @staticmethod
+    def make_key(image_digest: str, config, model_digest: str = "") -> str:
+        """
+        Build cache key from image content hash, detection-relevant settings and model files
+
+        Args:
+            image_digest: Content hash of the image (see image_hash)
+            config: ProcessingConfig
+            model_digest: Identity of the detection / SAM model files (see model_file_digest)
+
+        Returns:
+            Cache key usable as file name
+        """
+        subset = {key: getattr(config, key, None) for key in DETECTION_CONFIG_KEYS}
+        subset["version"] = DETECTION_CACHE_VERSION
+        subset["models"] = model_digest
+        config_digest = hashlib.blake2b(
+            json.dumps(subset, sort_keys=True, ensure_ascii=False, default=str).encode("utf-8"),
+            digest_size=10
+        ).hexdigest()
+        return f"{image_digest}_{config_digest}"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Load cached detection result
+
+        Returns:
+            {"bboxes_with_class": list, "masks_b": list of RoiMask or None} or None
+        """
+        def reader(paths):
+            with np.load(paths[0], allow_pickle=False) as data:
+                meta = json.loads(str(data["meta"]))
+                masks_b = None
+                if meta["has_masks"]:
+                    image_shape = tuple(meta["image_shape"])
+                    masks_b = []
+                    for i, (x, y, w, h) in enumerate(meta["mask_rois"]):
+                        masks_b.append(RoiMask(x, y, rle_to_mask(data[f"mask_{i}"], (h, w)), image_shape))
+            bboxes_with_class = [tuple(bbox) for bbox in meta["bboxes_with_class"]]
+            return {"bboxes_with_class": bboxes_with_class, "masks_b": masks_b}
+
+        return self._read_entry(key, reader)
+
+    def put(self, key: str, bboxes_with_class, masks_b=None):
+        """
+        Store detection result (masks are stored as ROI offset + run-length encoded crop)
+
+        Args:
+            key: Cache key (see make_key)
+            bboxes_with_class: Detection results
+            masks_b: SAM masks (RoiMask or full-frame, None when SAM is not used)
+        """
+        roi_masks = [to_roi_mask(mask) for mask in masks_b] if masks_b is not None else []
+        meta = {
+            "bboxes_with_class": [[int(x1), int(y1), int(x2), int(y2), class_name, source]
+                                  for x1, y1, x2, y2, class_name, source in bboxes_with_class],
+            "has_masks": masks_b is not None,
+            "image_shape": list(roi_masks[0].image_shape) if roi_masks else [],
+            "mask_rois": [[mask.x, mask.y, mask.mask.shape[1], mask.mask.shape[0]] for mask in roi_masks]
+        }
+        arrays = {"meta": np.array(json.dumps(meta, ensure_ascii=False))}
+        for i, mask in enumerate(roi_masks):
+            arrays[f"mask_{i}"] = mask_to_rle(mask.mask)
+
+        self._write_entry(key, [lambda f: np.savez(f, **arrays)])
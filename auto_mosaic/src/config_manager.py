@@ -92,6 +92,12 @@ class ConfigManager:
             # SAM設定
             "sam_use_vit_b": config.sam_use_vit_b,
             "sam_use_none": config.sam_use_none,
+            "sam_roi_crop": config.sam_roi_crop,
+            "sam_roi_padding": config.sam_roi_padding,
+            "use_embedding_cache": config.use_embedding_cache,
+            "embedding_cache_size_mb": config.embedding_cache_size_mb,
+            "use_detection_cache": config.use_detection_cache,
+            "detection_cache_size_mb": config.detection_cache_size_mb,
             
             # 処理モード
             "use_seamless": config.use_seamless,
@@ -119,6 +125,49 @@ class ConfigManager:
             # 実写検出専用範囲調整設定
             "use_nudenet_shrink": config.use_nudenet_shrink,
             "nudenet_shrink_values": config.nudenet_shrink_values,
+            
+            # 統合検出設定
+            "use_fused_all_model": config.use_fused_all_model,
+            
+            # 重複検出の除去設定
+            "detection_nms_iou": config.detection_nms_iou,
+            "detection_merge_mode": config.detection_merge_mode,
+            "detection_cross_class_merge": config.detection_cross_class_merge,
+            
+            # カスケード検出設定
+            "use_cascade_detection": config.use_cascade_detection,
+            "cascade_gate": config.cascade_gate,
+            "cascade_gate_imgsz": config.cascade_gate_imgsz,
+            "cascade_gate_confidence": config.cascade_gate_confidence,
+            
+            # パイプライン処理設定
+            "use_pipelined_processing": config.use_pipelined_processing,
+            "pipeline_decode_workers": config.pipeline_decode_workers,
+            "pipeline_encode_workers": config.pipeline_encode_workers,
+            "pipeline_queue_size": config.pipeline_queue_size,
+            "detection_batch_size": config.detection_batch_size,
+            "memory_limit_mb": config.memory_limit_mb,
+            "use_incremental_processing": config.use_incremental_processing,
+            # 縮小デコード設定
+            "use_reduced_decode": config.use_reduced_decode,
+            "reduced_decode_min_size": config.reduced_decode_min_size,
+            # 出力エンコード設定
+            "png_compression": config.png_compression,
+            "jpeg_quality": config.jpeg_quality,
+            "webp_quality": config.webp_quality,
+            "no_mosaic_hardlink": config.no_mosaic_hardlink,
+            # タイル処理設定
+            "use_tiled_processing": config.use_tiled_processing,
+            "tiled_min_megapixels": config.tiled_min_megapixels,
+            "tiled_proxy_size": config.tiled_proxy_size,
+            "tiled_tile_size": config.tiled_tile_size,
+            "tiled_tile_overlap": config.tiled_tile_overlap,
+            # スライス検出設定
+            "use_sliced_detection": config.use_sliced_detection,
+            "sliced_min_size": config.sliced_min_size,
+            "sliced_tile_size": config.sliced_tile_size,
+            "sliced_tile_overlap": config.sliced_tile_overlap,
+            "sliced_max_tiles": config.sliced_max_tiles,
         }
     
     def dict_to_processing_config(self, config_dict: Dict[str, Any]) -> ProcessingConfig:
@@ -142,6 +191,12 @@ class ConfigManager:
         
         config.sam_use_vit_b = config_dict.get("sam_use_vit_b", config.sam_use_vit_b)
         config.sam_use_none = config_dict.get("sam_use_none", config.sam_use_none)
+        config.sam_roi_crop = config_dict.get("sam_roi_crop", config.sam_roi_crop)
+        config.sam_roi_padding = config_dict.get("sam_roi_padding", config.sam_roi_padding)
+        config.use_embedding_cache = config_dict.get("use_embedding_cache", config.use_embedding_cache)
+        config.embedding_cache_size_mb = config_dict.get("embedding_cache_size_mb", config.embedding_cache_size_mb)
+        config.use_detection_cache = config_dict.get("use_detection_cache", config.use_detection_cache)
+        config.detection_cache_size_mb = config_dict.get("detection_cache_size_mb", config.detection_cache_size_mb)
         
         config.use_seamless = config_dict.get("use_seamless", config.use_seamless)
         config.use_legacy = config_dict.get("use_legacy", config.use_legacy)
@@ -165,6 +220,53 @@ class ConfigManager:
         config.use_nudenet_shrink = config_dict.get("use_nudenet_shrink", config.use_nudenet_shrink)
         config.nudenet_shrink_values = config_dict.get("nudenet_shrink_values", config.nudenet_shrink_values)
         
+        # 統合検出設定
+        config.use_fused_all_model = config_dict.get("use_fused_all_model", config.use_fused_all_model)
+        
+        # 重複検出の除去設定
+        config.detection_nms_iou = config_dict.get("detection_nms_iou", config.detection_nms_iou)
+        config.detection_merge_mode = config_dict.get("detection_merge_mode", config.detection_merge_mode)
+        config.detection_cross_class_merge = config_dict.get("detection_cross_class_merge", config.detection_cross_class_merge)
+        
+        # カスケード検出設定
+        config.use_cascade_detection = config_dict.get("use_cascade_detection", config.use_cascade_detection)
+        config.cascade_gate = config_dict.get("cascade_gate", config.cascade_gate)
+        config.cascade_gate_imgsz = config_dict.get("cascade_gate_imgsz", config.cascade_gate_imgsz)
+        config.cascade_gate_confidence = config_dict.get("cascade_gate_confidence", config.cascade_gate_confidence)
+        
+        # パイプライン処理設定
+        config.use_pipelined_processing = config_dict.get("use_pipelined_processing", config.use_pipelined_processing)
+        config.pipeline_decode_workers = config_dict.get("pipeline_decode_workers", config.pipeline_decode_workers)
+        config.pipeline_encode_workers = config_dict.get("pipeline_encode_workers", config.pipeline_encode_workers)
+        config.pipeline_queue_size = config_dict.get("pipeline_queue_size", config.pipeline_queue_size)
+        config.detection_batch_size = config_dict.get("detection_batch_size", config.detection_batch_size)
+        config.memory_limit_mb = config_dict.get("memory_limit_mb", config.memory_limit_mb)
+        config.use_incremental_processing = config_dict.get("use_incremental_processing", config.use_incremental_processing)
+        
+        # 縮小デコード設定
+        config.use_reduced_decode = config_dict.get("use_reduced_decode", config.use_reduced_decode)
+        config.reduced_decode_min_size = config_dict.get("reduced_decode_min_size", config.reduced_decode_min_size)
+        
+        # 出力エンコード設定
+        config.png_compression = config_dict.get("png_compression", config.png_compression)
+        config.jpeg_quality = config_dict.get("jpeg_quality", config.jpeg_quality)
+        config.webp_quality = config_dict.get("webp_quality", config.webp_quality)
+        config.no_mosaic_hardlink = config_dict.get("no_mosaic_hardlink", config.no_mosaic_hardlink)
+        
+        # タイル処理設定
+        config.use_tiled_processing = config_dict.get("use_tiled_processing", config.use_tiled_processing)
+        config.tiled_min_megapixels = config_dict.get("tiled_min_megapixels", config.tiled_min_megapixels)
+        config.tiled_proxy_size = config_dict.get("tiled_proxy_size", config.tiled_proxy_size)
+        config.tiled_tile_size = config_dict.get("tiled_tile_size", config.tiled_tile_size)
+        config.tiled_tile_overlap = config_dict.get("tiled_tile_overlap", config.tiled_tile_overlap)
+        
+        # スライス検出設定
+        config.use_sliced_detection = config_dict.get("use_sliced_detection", config.use_sliced_detection)
+        config.sliced_min_size = config_dict.get("sliced_min_size", config.sliced_min_size)
+        config.sliced_tile_size = config_dict.get("sliced_tile_size", config.sliced_tile_size)
+        config.sliced_tile_overlap = config_dict.get("sliced_tile_overlap", config.sliced_tile_overlap)
+        config.sliced_max_tiles = config_dict.get("sliced_max_tiles", config.sliced_max_tiles)
+        
         return config
     
     def save_profile(self, name: str, config: ProcessingConfig, description: str = "") -> bool:
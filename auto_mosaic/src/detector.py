@@ -4,6 +4,7 @@ YOLO-based genital detection for anime/illustration images
 
 from typing import List, Optional, Tuple, Dict, Any
 from pathlib import Path
+import math
 import time
 
 # 動的インポート用の遅延ローダー
@@ -73,7 +74,8 @@ def _ensure_dependencies_loaded():
     if np is None or torch is None or cv2 is None or YOLO is None:
         _load_dependencies()
 
-from auto_mosaic.src.utils import logger, BBox, BBoxWithClass, expand_bboxes, get_recommended_device
+from auto_mosaic.src.utils import (logger, BBox, BBoxWithClass, expand_bboxes, get_recommended_device,
+                                   generate_tiles, merge_overlapping_bboxes, suppress_duplicate_bboxes)
 from auto_mosaic.src.downloader import downloader
 
 class GenitalDetector:
@@ -382,6 +384,9 @@ class GenitalDetector:
         """
         Detect genital regions in multiple images
         
+        画像リストをまとめてYOLOに渡し、1回の推論でバッチ処理する。
+        バッチ推論に失敗した場合は1枚ずつの検出にフォールバックする。
+        
         Args:
             images: List of images as numpy arrays
             conf: Confidence threshold
@@ -390,6 +395,33 @@ class GenitalDetector:
         Returns:
             List of bounding box lists for each image
         """
+        _ensure_dependencies_loaded()
+        if self.model is None:
+            raise RuntimeError("Model not loaded")
+        
+        valid_indices = [i for i, image in enumerate(images) if image is not None and image.size > 0]
+        results = [[] for _ in images]
+        if not valid_indices:
+            return results
+        
+        try:
+            batch = [self._preprocess_for_detection(images[i], config) for i in valid_indices]
+            batch_results = self.model(batch, conf=conf, verbose=False)
+            
+            for i, result in zip(valid_indices, batch_results):
+                if result.boxes is None or len(result.boxes) == 0:
+                    continue
+                if self.lite:
+                    results[i] = self._process_specialized_detection(result, config)
+                else:
+                    results[i] = self._process_person_detection(images[i], result, config)
+                logger.debug(f"Processed image {i+1}/{len(images)}: {len(results[i])} detections")
+            
+            return results
+            
+        except Exception as e:
+            logger.warning(f"Batched detection failed, falling back to per-image detection: {str(e)}")
+        
         results = []
         for i, image in enumerate(images):
             try:
@@ -482,6 +514,47 @@ def create_detector(model_path: str, device: str = "auto", lite: bool = False) -
     """
     return GenitalDetector(model_path, device, lite)
 
+# "all"モデルのクラス名 → 部位モデルキーの対応表（統合モード用）
+# クラス名は小文字化し、空白・ハイフンをアンダースコアに正規化して照合する
+FUSED_CLASS_ALIASES = {
+    "penis": ["penis", "dick", "male_genital"],
+    "labia_minora": ["labia_minora", "pussy", "vagina", "female_genital"],
+    "pussy": ["pussy", "vagina", "labia_minora", "female_genital"],
+    "testicles": ["testicles", "testicle", "balls"],
+    "anus": ["anus"],
+    "nipples": ["nipples", "nipple"],
+    "x-ray": ["x_ray", "xray"],
+    "cross-section": ["cross_section", "crosssection"],
+}
+
+
+def _normalize_class_name(name: str) -> str:
+    """クラス名を照合用に正規化"""
+    return str(name).strip().lower().replace("-", "_").replace(" ", "_")
+
+
+def build_fused_class_map(model_names: Dict[int, str], parts: List[str]) -> Dict[int, str]:
+    """
+    Map class IDs of the "all" model to part model keys
+    
+    Args:
+        model_names: Class names of the "all" model ({class_id: name})
+        parts: Part model keys to look for
+        
+    Returns:
+        {class_id: part_key} for every part the "all" model emits
+    """
+    normalized = {class_id: _normalize_class_name(name) for class_id, name in model_names.items()}
+    class_map = {}
+    for part in parts:
+        aliases = FUSED_CLASS_ALIASES.get(part, [part])
+        for class_id, name in normalized.items():
+            if name in aliases and class_id not in class_map:
+                class_map[class_id] = part
+                break
+    return class_map
+
+
 class MultiModelDetector:
     """Multiple specialized model detector for Anime NSFW Detection v4.0 with NudeNet integration"""
     
@@ -497,6 +570,10 @@ class MultiModelDetector:
         self.device_mode = device
         self.device = get_recommended_device(device)
         self.models = {}  # Dictionary to hold loaded models
+        self.fused_class_map = None  # 統合モード時の "all" モデル クラスID → 部位キー
+        self.gate_model = None  # カスケード検出のゲートモデル（"all"モデル）
+        self.cascade_gate = None  # 有効なゲート種別（"all" / "nudenet" / None）
+        self.model_files = set()  # 読み込んだYOLOモデルファイル（キャッシュキー用）
         
         # Initialize NudeNet detector
         self.nudenet_detector = None
@@ -505,11 +582,10 @@ class MultiModelDetector:
         self.load_selected_models()
         self._initialize_nudenet()
         self._setup_hybrid_detector()
+        self._setup_cascade_gate()
         
     def load_selected_models(self):
         """Load only the selected model files"""
-        from auto_mosaic.src.downloader import downloader
-        
         logger.info(f"Using {self.device.upper()} for inference")
         
         # イラスト専用モデルで有効なモデルのリスト
@@ -517,6 +593,13 @@ class MultiModelDetector:
         
         selected_count = 0
         
+        # 統合モード: "all"モデル1回の推論で選択部位をまとめて検出
+        fused_parts = set()
+        if getattr(self.config, 'use_fused_all_model', False):
+            fused_parts = self._load_fused_all_model(valid_anime_models)
+            if self.fused_class_map is not None:
+                selected_count += 1
+        
         # 標準モデルの読み込み
         for model_key, is_selected in self.config.selected_models.items():
             if is_selected:
@@ -524,36 +607,17 @@ class MultiModelDetector:
                 if model_key not in valid_anime_models:
                     logger.info(f"Skipping {model_key} model (not supported by イラスト専用モデル)")
                     continue
+                
+                # 統合モードで"all"モデルがカバーする部位は個別モデルを読み込まない
+                if model_key in fused_parts or (model_key == "all" and self.fused_class_map is not None):
+                    continue
                     
                 model_path = downloader.get_model_path("anime_nsfw_v4", model_key)
                 if model_path and model_path.exists():
                     try:
                         logger.info(f"Loading {model_key} model from {model_path}")
+                        model = self._load_yolo_model(model_path)
                         
-                        # Force PyTorch to not use weights_only mode for this specific load
-                        import os
-                        original_pytorch_weights_only = os.environ.get("PYTORCH_WEIGHTS_ONLY", None)
-                        os.environ["PYTORCH_WEIGHTS_ONLY"] = "false"
-                        
-                        try:
-                            # 依存関係を確認してからYOLOを使用
-                            _ensure_dependencies_loaded()
-                            if YOLO is None:
-                                from ultralytics import YOLO as LocalYOLO
-                                model = LocalYOLO(str(model_path))
-                            else:
-                                model = YOLO(str(model_path))
-                        finally:
-                            # Restore original environment variable
-                            if original_pytorch_weights_only is None:
-                                os.environ.pop("PYTORCH_WEIGHTS_ONLY", None)
-                            else:
-                                os.environ["PYTORCH_WEIGHTS_ONLY"] = original_pytorch_weights_only
-                        
-                        # Move model to device
-                        if hasattr(model, 'to'):
-                            model.to(self.device)
-                            
                         self.models[model_key] = model
                         selected_count += 1
                         logger.info(f"Successfully loaded {model_key} model")
@@ -602,6 +666,87 @@ class MultiModelDetector:
             
         logger.info(f"Loaded {selected_count} specialized NSFW detection models. High-precision part detection available.")
         
+    def _load_yolo_model(self, model_path: Path):
+        """YOLOモデルを読み込んでデバイスに転送（読み込み済みの場合はレジストリから再利用）"""
+        from auto_mosaic.src.model_registry import model_registry
+        
+        self.model_files.add(str(model_path))
+        
+        def loader():
+            # Force PyTorch to not use weights_only mode for this specific load
+            import os
+            original_pytorch_weights_only = os.environ.get("PYTORCH_WEIGHTS_ONLY", None)
+            os.environ["PYTORCH_WEIGHTS_ONLY"] = "false"
+            
+            try:
+                # 依存関係を確認してからYOLOを使用
+                _ensure_dependencies_loaded()
+                if YOLO is None:
+                    from ultralytics import YOLO as LocalYOLO
+                    model = LocalYOLO(str(model_path))
+                else:
+                    model = YOLO(str(model_path))
+            finally:
+                # Restore original environment variable
+                if original_pytorch_weights_only is None:
+                    os.environ.pop("PYTORCH_WEIGHTS_ONLY", None)
+                else:
+                    os.environ["PYTORCH_WEIGHTS_ONLY"] = original_pytorch_weights_only
+            
+            # Move model to device
+            if hasattr(model, 'to'):
+                model.to(self.device)
+            
+            return model
+        
+        return model_registry.get("yolo", model_path, self.device, loader)
+    
+    def _load_fused_all_model(self, valid_anime_models: List[str]) -> set:
+        """
+        Load the "all" model for fused single-pass detection
+        
+        Args:
+            valid_anime_models: Part model keys supported by イラスト専用モデル
+            
+        Returns:
+            Set of selected part keys covered by the "all" model
+        """
+        selected_parts = [key for key, is_selected in self.config.selected_models.items()
+                          if is_selected and key in valid_anime_models and key != "all"]
+        if not selected_parts:
+            return set()
+        
+        model_path = downloader.get_model_path("anime_nsfw_v4", "all")
+        if not model_path or not model_path.exists():
+            logger.warning(f"Fused detection disabled: all model file not found ({model_path})")
+            return set()
+        
+        try:
+            logger.info(f"Loading all model for fused detection from {model_path}")
+            model = self._load_yolo_model(model_path)
+        except Exception as e:
+            logger.error(f"Failed to load all model for fused detection: {str(e)}")
+            return set()
+        
+        model_names = getattr(model, 'names', None) or {}
+        if isinstance(model_names, (list, tuple)):
+            model_names = dict(enumerate(model_names))
+        
+        class_map = build_fused_class_map(model_names, selected_parts)
+        if not class_map:
+            # 選択部位のクラスを持たない"all"モデルは統合モードにしない（余分な推論が増えるだけ）
+            logger.warning("Fused detection disabled: all model has no classes for the selected parts")
+            return set()
+        
+        self.fused_class_map = class_map
+        self.models["all"] = model
+        
+        fused_parts = set(class_map.values())
+        fallback_parts = [part for part in selected_parts if part not in fused_parts]
+        logger.info(f"[Fused Detection] all model covers: {', '.join(sorted(fused_parts)) or 'none'}"
+                    f" | per-part fallback: {', '.join(fallback_parts) or 'none'}")
+        return fused_parts
+    
     def _load_custom_models(self):
         """カスタムモデルを読み込む"""
         if not hasattr(self.config, 'custom_models'):
@@ -619,31 +764,8 @@ class MultiModelDetector:
                 
             try:
                 logger.info(f"Loading custom model '{model_name}' from {model_path}")
+                model = self._load_yolo_model(model_path)
                 
-                # Force PyTorch to not use weights_only mode for this specific load
-                import os
-                original_pytorch_weights_only = os.environ.get("PYTORCH_WEIGHTS_ONLY", None)
-                os.environ["PYTORCH_WEIGHTS_ONLY"] = "false"
-                
-                try:
-                    # 依存関係を確認してからYOLOを使用
-                    _ensure_dependencies_loaded()
-                    if YOLO is None:
-                        from ultralytics import YOLO as LocalYOLO
-                        model = LocalYOLO(str(model_path))
-                    else:
-                        model = YOLO(str(model_path))
-                finally:
-                    # Restore original environment variable
-                    if original_pytorch_weights_only is None:
-                        os.environ.pop("PYTORCH_WEIGHTS_ONLY", None)
-                    else:
-                        os.environ["PYTORCH_WEIGHTS_ONLY"] = original_pytorch_weights_only
-                
-                # Move model to device
-                if hasattr(model, 'to'):
-                    model.to(self.device)
-                    
                 # カスタムモデル用のキーで保存
                 custom_key = f"custom_{model_name}"
                 self.models[custom_key] = model
@@ -714,6 +836,75 @@ class MultiModelDetector:
             logger.error(f"❌ Failed to setup hybrid detector: {e}")
             self.hybrid_detector = None
     
+    def _setup_cascade_gate(self):
+        """カスケード検出用のゲート（軽量な1回目の推論）を準備"""
+        if not getattr(self.config, 'use_cascade_detection', False):
+            return
+        
+        gate = getattr(self.config, 'cascade_gate', "all")
+        if gate == "nudenet":
+            if self.nudenet_detector is None:
+                logger.warning("[Cascade] 実写専用モデル is not available - cascade detection disabled")
+                return
+            self.cascade_gate = "nudenet"
+        else:
+            # 統合モード等で読み込み済みの"all"モデルがあれば再利用
+            if "all" in self.models:
+                self.gate_model = self.models["all"]
+            else:
+                model_path = downloader.get_model_path("anime_nsfw_v4", "all")
+                if not model_path or not model_path.exists():
+                    logger.warning(f"[Cascade] all model file not found ({model_path}) - cascade detection disabled")
+                    return
+                try:
+                    self.gate_model = self._load_yolo_model(model_path)
+                except Exception as e:
+                    logger.error(f"[Cascade] Failed to load gate model: {str(e)} - cascade detection disabled")
+                    return
+            self.cascade_gate = "all"
+        
+        logger.info(f"[Cascade] Gate enabled: {self.cascade_gate}")
+    
+    def _is_cascade_enabled(self, config=None) -> bool:
+        """カスケード検出が有効かどうか"""
+        if self.cascade_gate is None:
+            return False
+        return getattr(config or self.config, 'use_cascade_detection', False)
+    
+    def _gate_many(self, images: List[Any], config=None) -> List[bool]:
+        """
+        Run the cascade gate on images
+        
+        ゲートで何も検出されなかった画像は部位別モデル・実写専用モデルをスキップする。
+        ゲート自体が失敗した場合は見逃しを防ぐため陽性として扱う。
+        
+        Returns:
+            True for every image that should go through full detection
+        """
+        cfg = config or self.config
+        gate_conf = getattr(cfg, 'cascade_gate_confidence', 0.15)
+        gate_start = time.time()
+        
+        try:
+            if self.cascade_gate == "nudenet":
+                passed = [any(self.nudenet_detector.detect_image(image, gate_conf, cfg).values()) for image in images]
+            else:
+                gate_imgsz = getattr(cfg, 'cascade_gate_imgsz', 320)
+                batch_size = max(1, int(getattr(cfg, 'detection_batch_size', 1)))
+                passed = []
+                for batch_start in range(0, len(images), batch_size):
+                    batch = images[batch_start:batch_start + batch_size]
+                    results = self.gate_model(batch, conf=gate_conf, imgsz=gate_imgsz, verbose=False)
+                    passed.extend(result.boxes is not None and len(result.boxes) > 0 for result in results)
+        except Exception as e:
+            logger.warning(f"[Cascade] Gate failed, running full detection: {str(e)}")
+            return [True] * len(images)
+        
+        gate_time = time.time() - gate_start
+        logger.info(f"[Cascade] Gate ({self.cascade_gate}) time: {gate_time:.2f}s - "
+                    f"{sum(passed)}/{len(images)} image(s) passed")
+        return passed
+    
     def detect(self, image: Any, conf: float = 0.25, config=None) -> List[BBoxWithClass]:
         """
         Detect objects using multiple specialized models and/or NudeNet
@@ -730,6 +921,15 @@ class MultiModelDetector:
             logger.warning("Empty or invalid image provided")
             return []
         
+        # スライス検出: 大きな画像はタイルごとに検出（カスケードのゲートもタイル単位）
+        if self._should_slice(image, config):
+            return self.detect_sliced(image, conf, config)
+        
+        # カスケード検出: ゲートで何も検出されなければ以降のモデルを実行しない
+        if self._is_cascade_enabled(config) and not self._gate_many([image], config)[0]:
+            logger.info("[Cascade] No candidate regions - skipping specialised models")
+            return []
+        
         # Get detector settings from config
         use_anime = getattr(config, 'use_anime_detector', True) if config else True
         use_nudenet = getattr(config, 'use_nudenet', True) if config else False
@@ -747,15 +947,17 @@ class MultiModelDetector:
         logger.warning("No detectors available")
         return []
     
-    def _detect_with_hybrid(self, image: Any, conf: float, use_anime: bool, use_nudenet: bool, config=None) -> List[BBoxWithClass]:
-        """Use hybrid detector for combined detection"""
+    def _detect_with_hybrid(self, image: Any, conf: float, use_anime: bool, use_nudenet: bool, config=None,
+                            anime_results: Optional[Dict[str, List]] = None) -> List[BBoxWithClass]:
+        """Use hybrid detector for combined detection (anime_results: precomputed batch results)"""
         try:
             combined_results = self.hybrid_detector.detect_image(
                 image, 
                 confidence=conf, 
                 use_anime=use_anime, 
                 use_nudenet=use_nudenet,
-                config=config
+                config=config,
+                anime_results=anime_results
             )
             
             # Convert to BBoxWithClass format
@@ -778,6 +980,79 @@ class MultiModelDetector:
             logger.error(f"Hybrid detection failed: {e}")
             return []
     
+    def _get_active_models(self, config=None) -> List[Tuple[str, Any]]:
+        """ユーザー設定で有効なモデルの (model_key, model) リストを取得"""
+        active_models = []
+        for model_key, model in self.models.items():
+            # カスタムモデルの場合の処理
+            if model_key.startswith("custom_"):
+                if config and hasattr(config, 'use_custom_models') and not config.use_custom_models:
+                    logger.info(f"Skipping {model_key} model (custom models disabled)")
+                    continue
+                # カスタムモデルは常に有効として扱う（個別の無効化は設定レベルで管理）
+            elif model_key == "all" and self.fused_class_map is not None:
+                # 統合モードの"all"モデルは選択部位の検出に常に使用
+                pass
+            else:
+                # 標準モデルのユーザー選択をチェック
+                if config and hasattr(config, 'selected_models'):
+                    if not config.selected_models.get(model_key, False):
+                        logger.info(f"Skipping {model_key} model (not selected by user)")
+                        continue
+            active_models.append((model_key, model))
+        return active_models
+    
+    def _parse_model_result(self, model_key: str, result, config=None) -> List[BBoxWithClass]:
+        """YOLOの1画像分の推論結果をBBoxWithClassのリストに変換"""
+        bboxes_with_class = []
+        if result.boxes is None or len(result.boxes) == 0:
+            return bboxes_with_class
+        
+        fused = model_key == "all" and self.fused_class_map is not None
+        selected_models = getattr(config or self.config, 'selected_models', {})
+        
+        for box in result.boxes:
+            x1, y1, x2, y2 = map(int, box.xyxy[0].cpu().numpy())
+            confidence = float(box.conf.cpu().numpy()[0])
+            
+            if fused:
+                # 統合モード: "all"モデルのクラスIDを選択部位にマッピング
+                class_id = int(box.cls.cpu().numpy()[0])
+                part_name = self.fused_class_map.get(class_id)
+                if part_name and selected_models.get(part_name, False):
+                    class_name = part_name
+                elif selected_models.get("all", False):
+                    class_name = "all"
+                else:
+                    continue
+                source = 'IL'
+            # カスタムモデルの場合はクラス情報をマッピング
+            elif model_key.startswith("custom_"):
+                class_id = int(box.cls.cpu().numpy()[0])
+                custom_class_mappings = getattr(self, 'custom_class_mappings', {})
+                class_mapping = custom_class_mappings.get(model_key, {})
+                class_name = class_mapping.get(class_id, f"class_{class_id}")
+                source = 'CU'  # Custom model source
+            else:
+                class_name = model_key
+                source = 'IL'  # Illustration model source
+            
+            # クラス情報とソース情報を追加してBBoxWithClassとして保存
+            bboxes_with_class.append((x1, y1, x2, y2, class_name, source))
+            logger.debug(f"{model_key} region added: ({x1}, {y1}, {x2}, {y2}) [conf: {confidence:.3f}, class: {class_name}]")
+        
+        return bboxes_with_class
+    
+    def _suppress_duplicates(self, bboxes: List[BBoxWithClass], config=None) -> List[BBoxWithClass]:
+        """複数モデルで重複した検出をSAM前に1つにまとめる（"all"モデルと部位別モデルの重複は detection_cross_class_merge 時のみ）"""
+        cfg = config or self.config
+        kept = suppress_duplicate_bboxes(bboxes, threshold=getattr(cfg, 'detection_nms_iou', 0.5),
+                                         mode=getattr(cfg, 'detection_merge_mode', "fuse"),
+                                         cross_class=getattr(cfg, 'detection_cross_class_merge', False))
+        if len(kept) < len(bboxes):
+            logger.info(f"[Duplicate Suppression] {len(bboxes)} -> {len(kept)} regions")
+        return kept
+    
     def _detect_anime_only(self, image: Any, conf: float, config=None) -> List[BBoxWithClass]:
         """Original イラスト専用モデル only detection"""
         if not self.models:
@@ -792,20 +1067,7 @@ class MultiModelDetector:
             total_detect_start = time.time()
             
             # Run inference with each selected model
-            for model_key, model in self.models.items():
-                # カスタムモデルの場合の処理
-                if model_key.startswith("custom_"):
-                    if config and hasattr(config, 'use_custom_models') and not config.use_custom_models:
-                        logger.info(f"Skipping {model_key} model (custom models disabled)")
-                        continue
-                    # カスタムモデルは常に有効として扱う（個別の無効化は設定レベルで管理）
-                else:
-                    # 標準モデルのユーザー選択をチェック
-                    if config and hasattr(config, 'selected_models'):
-                        if not config.selected_models.get(model_key, False):
-                            logger.info(f"Skipping {model_key} model (not selected by user)")
-                            continue
-                
+            for model_key, model in self._get_active_models(config):
                 model_start = time.time()
                 
                 results = model(image, conf=conf, verbose=False)
@@ -815,33 +1077,13 @@ class MultiModelDetector:
                 logger.info(f"  [{model_key} Model] Inference time: {model_time:.2f}s")
                 
                 if results and len(results) > 0:
-                    result = results[0]
-                    if result.boxes is not None and len(result.boxes) > 0:
-                        model_bboxes = []
-                        for box in result.boxes:
-                            x1, y1, x2, y2 = map(int, box.xyxy[0].cpu().numpy())
-                            confidence = float(box.conf.cpu().numpy()[0])
-                            
-                            # カスタムモデルの場合はクラス情報をマッピング
-                            if model_key.startswith("custom_"):
-                                class_id = int(box.cls.cpu().numpy()[0])
-                                custom_class_mappings = getattr(self, 'custom_class_mappings', {})
-                                class_mapping = custom_class_mappings.get(model_key, {})
-                                class_name = class_mapping.get(class_id, f"class_{class_id}")
-                                source = 'CU'  # Custom model source
-                            else:
-                                class_name = model_key
-                                source = 'IL'  # Illustration model source
-                            
-                            # クラス情報とソース情報を追加してBBoxWithClassとして保存
-                            bbox_with_class = (x1, y1, x2, y2, class_name, source)
-                            all_bboxes_with_class.append(bbox_with_class)
-                            model_bboxes.append((x1, y1, x2, y2))
-                            logger.debug(f"{model_key} region added: ({x1}, {y1}, {x2}, {y2}) [conf: {confidence:.3f}, class: {class_name}]")
-                        
+                    model_bboxes = self._parse_model_result(model_key, results[0], config)
+                    if model_bboxes:
+                        all_bboxes_with_class.extend(model_bboxes)
                         detected_parts[model_key] = len(model_bboxes)
             
             total_detect_time = time.time() - total_detect_start
+            all_bboxes_with_class = self._suppress_duplicates(all_bboxes_with_class, config)
             
             # Log output
             times_str = ", ".join([f"{k}:{v:.1f}s" for k, v in detection_times.items()])
@@ -859,6 +1101,221 @@ class MultiModelDetector:
             logger.error(f"Multi-model detection failed: {str(e)}")
             return []
     
+    def _detect_anime_many(self, images: List[Any], conf: float, config=None) -> List[List[BBoxWithClass]]:
+        """
+        イラスト専用モデルによるバッチ検出
+        
+        各モデルに画像リストを batch_size 枚ずつまとめて渡し、1回の推論で処理する。
+        結果の順序（モデル順→ボックス順）は _detect_anime_only と同じ。
+        """
+        per_image = [[] for _ in images]
+        if not self.models or not images:
+            return per_image
+        
+        batch_size = max(1, int(getattr(config, 'detection_batch_size', 1) if config else 1))
+        detection_times = {}
+        total_detect_start = time.time()
+        
+        for model_key, model in self._get_active_models(config):
+            model_start = time.time()
+            for batch_start in range(0, len(images), batch_size):
+                batch = images[batch_start:batch_start + batch_size]
+                try:
+                    results = model(batch, conf=conf, verbose=False)
+                    parsed = [self._parse_model_result(model_key, result, config) for result in results]
+                except Exception as e:
+                    # 失敗したバッチのみ1枚ずつ再実行（他の画像・以降のバッチの検出は失わない）
+                    logger.error(f"Batched detection failed for {model_key} model "
+                                 f"(images {batch_start + 1}-{batch_start + len(batch)}), retrying per image: {str(e)}")
+                    parsed = [self._detect_single_with_model(model_key, model, image, conf, config)
+                              for image in batch]
+                for offset, bboxes in enumerate(parsed):
+                    per_image[batch_start + offset].extend(bboxes)
+            detection_times[model_key] = time.time() - model_start
+            logger.info(f"  [{model_key} Model] Batch inference time: {detection_times[model_key]:.2f}s ({len(images)} images)")
+        
+        per_image = [self._suppress_duplicates(bboxes, config) for bboxes in per_image]
+        total_detect_time = time.time() - total_detect_start
+        times_str = ", ".join([f"{k}:{v:.1f}s" for k, v in detection_times.items()])
+        logger.info(f"[All Models Batch Detection] Time: {total_detect_time:.2f}s for {len(images)} images "
+                    f"(batch size: {batch_size}, {times_str})")
+        
+        return per_image
+    
+    def _detect_single_with_model(self, model_key: str, model, image: Any, conf: float,
+                                  config=None) -> List[BBoxWithClass]:
+        """1枚の画像を1つのモデルで検出（バッチ推論失敗時の再実行用、失敗時は空）"""
+        try:
+            results = model(image, conf=conf, verbose=False)
+            return [bbox for result in results for bbox in self._parse_model_result(model_key, result, config)]
+        except Exception as e:
+            logger.error(f"Detection failed for {model_key} model: {str(e)}")
+            return []
+    
+    def detect_many(self, images: List[Any], conf: float = 0.25, config=None) -> List[List[BBoxWithClass]]:
+        """
+        Detect objects in multiple images with batched YOLO inference
+        
+        イラスト専用モデルは config.detection_batch_size 枚ずつまとめて推論し、
+        実写専用モデル（NudeNet）は1枚ずつ実行して detect と同じ方法で統合する。
+        スライス検出の対象となる大きな画像は detect_sliced で個別に処理する。
+        
+        Args:
+            images: List of input images as numpy arrays (BGR format)
+            conf: Confidence threshold (0.0 - 1.0)
+            config: ProcessingConfig with detection settings
+            
+        Returns:
+            List of BBoxWithClass lists, one per input image (same as calling detect per image)
+        """
+        sliced = [image is not None and self._should_slice(image, config) for image in images]
+        if not any(sliced):
+            return self._detect_many_unsliced(images, conf, config)
+        
+        results = [[] for _ in images]
+        plain_indices = [i for i, is_sliced in enumerate(sliced) if not is_sliced]
+        if plain_indices:
+            plain_results = self._detect_many_unsliced([images[i] for i in plain_indices], conf, config)
+            for i, bboxes in zip(plain_indices, plain_results):
+                results[i] = bboxes
+        for i, is_sliced in enumerate(sliced):
+            if is_sliced:
+                results[i] = self.detect_sliced(images[i], conf, config)
+        return results
+    
+    def _should_slice(self, image: Any, config=None) -> bool:
+        """スライス検出の対象かどうか（設定が有効で長辺が sliced_min_size を超える画像）"""
+        cfg = config or self.config
+        if not getattr(cfg, 'use_sliced_detection', False) or image.size == 0:
+            return False
+        return max(image.shape[:2]) > getattr(cfg, 'sliced_min_size', 2048)
+    
+    def _plan_slices(self, image_shape, tile_size: int, overlap: int, max_tiles: int) -> List[BBox]:
+        """
+        タイル配置を決定
+        
+        タイル数は画像サイズに応じて増えるが、max_tiles を超える場合はタイルを拡大して
+        推論回数を抑える（0 = 上限なし）。
+        """
+        tiles = generate_tiles(image_shape, tile_size, overlap)
+        while max_tiles and len(tiles) > max_tiles:
+            tile_size = int(tile_size * 1.25) + 1
+            tiles = generate_tiles(image_shape, tile_size, overlap)
+        return tiles
+    
+    def detect_sliced(self, image: Any, conf: float = 0.25, config=None, tile_size: Optional[int] = None,
+                      overlap: Optional[int] = None, max_tiles: Optional[int] = None,
+                      full_size: Optional[int] = None) -> List[BBoxWithClass]:
+        """
+        Detect objects with overlapping tiles (sliced inference)
+        
+        YOLOは画像全体を推論解像度に縮小するため、巨大なページでは小さな部位が潰れて見逃される。
+        縮小した画像全体と重なりのあるタイルを検出バッチサイズ単位でバッチ推論し、
+        タイル座標を元画像に戻してから、タイル境界で重複・分断された検出を外接矩形に統合する。
+        
+        Args:
+            image: Input image as numpy array (BGR format)
+            conf: Confidence threshold (0.0 - 1.0)
+            config: ProcessingConfig (sliced_* settings are used for omitted arguments)
+            tile_size: Tile width/height in pixels
+            overlap: Overlap between neighbouring tiles in pixels
+            max_tiles: Maximum number of tiles, tiles grow to stay within it (0 = unlimited)
+            full_size: Longest side of the downscaled whole-image pass (default: tile size)
+            
+        Returns:
+            List of bounding boxes with class information in image coordinates
+        """
+        np, cv2 = load_numpy(), load_cv2()
+        cfg = config or self.config
+        height, width = image.shape[:2]
+        tile_size = tile_size or getattr(cfg, 'sliced_tile_size', 1024)
+        overlap = getattr(cfg, 'sliced_tile_overlap', 192) if overlap is None else overlap
+        max_tiles = getattr(cfg, 'sliced_max_tiles', 16) if max_tiles is None else max_tiles
+        slice_start = time.time()
+        
+        tiles = self._plan_slices((height, width), tile_size, overlap, max_tiles)
+        
+        # 縮小した画像全体（大きな対象用）+ 各タイル
+        full_size = full_size or max(x2 - x1 for x1, y1, x2, y2 in tiles)
+        scale = min(1.0, full_size / max(height, width))
+        views = [(0, 0, width, height, scale)] + [(x1, y1, x2, y2, 1.0) for x1, y1, x2, y2 in tiles]
+        
+        detections = []
+        batch_size = max(1, int(getattr(cfg, 'detection_batch_size', 1)))
+        for batch_start in range(0, len(views), batch_size):
+            batch = views[batch_start:batch_start + batch_size]
+            crops = []
+            for x1, y1, x2, y2, view_scale in batch:
+                if view_scale < 1.0:
+                    size = (max(1, round((x2 - x1) * view_scale)), max(1, round((y2 - y1) * view_scale)))
+                    crops.append(cv2.resize(image, size, interpolation=cv2.INTER_AREA))
+                else:
+                    crops.append(np.ascontiguousarray(image[y1:y2, x1:x2]))
+            
+            for (vx1, vy1, _, _, view_scale), bboxes in zip(batch, self._detect_many_unsliced(crops, conf, cfg)):
+                for x1, y1, x2, y2, class_name, source in bboxes:
+                    detections.append((vx1 + int(x1 / view_scale), vy1 + int(y1 / view_scale),
+                                       min(width, vx1 + int(math.ceil(x2 / view_scale))),
+                                       min(height, vy1 + int(math.ceil(y2 / view_scale))),
+                                       class_name, source))
+            del crops
+        
+        merged = merge_overlapping_bboxes(detections, threshold=0.5, metric="ios")
+        logger.info(f"[Sliced Detection] {width}x{height}: whole image + {len(tiles)} tiles, "
+                    f"{len(detections)} detections -> {len(merged)} regions ({time.time() - slice_start:.2f}s)")
+        return merged
+    
+    def _detect_many_unsliced(self, images: List[Any], conf: float, config=None) -> List[List[BBoxWithClass]]:
+        """detect_many の本体（スライス検出なし）"""
+        results = [[] for _ in images]
+        valid_indices = [i for i, image in enumerate(images) if image is not None and image.size > 0]
+        if len(valid_indices) < len(images):
+            logger.warning("Empty or invalid image provided")
+        
+        # カスケード検出: ゲート陽性の画像のみ部位別モデル・実写専用モデルで検出
+        if valid_indices and self._is_cascade_enabled(config):
+            passed = self._gate_many([images[i] for i in valid_indices], config)
+            valid_indices = [i for i, gate_passed in zip(valid_indices, passed) if gate_passed]
+        
+        if not valid_indices:
+            return results
+        
+        use_anime = getattr(config, 'use_anime_detector', True) if config else True
+        use_nudenet = getattr(config, 'use_nudenet', True) if config else False
+        valid_images = [images[i] for i in valid_indices]
+        
+        if self.hybrid_detector:
+            logger.info(f"Using hybrid detector (batch of {len(valid_images)}): イラスト専用モデル={use_anime}, 実写専用モデル={use_nudenet}")
+            anime_results = None
+            if use_anime and self.models:
+                anime_results = self._detect_anime_many(valid_images, conf, config)
+            
+            for list_index, (i, image) in enumerate(zip(valid_indices, valid_images)):
+                precomputed = self._group_by_class(anime_results[list_index]) if anime_results is not None else None
+                results[i] = self._detect_with_hybrid(image, conf, use_anime, use_nudenet, config,
+                                                      anime_results=precomputed)
+            return results
+        
+        # Fall back to original anime_nsfw_v4 only detection
+        if use_anime and self.models:
+            logger.info("Falling back to イラスト専用モデル only detection (hybrid detector not available)")
+            for i, bboxes in zip(valid_indices, self._detect_anime_many(valid_images, conf, config)):
+                results[i] = bboxes
+            return results
+        
+        logger.warning("No detectors available")
+        return results
+    
+    def _group_by_class(self, bboxes: List[BBoxWithClass]) -> Dict[str, List]:
+        """BBoxWithClassのリストを部位名ごとの辞書に変換"""
+        results = {}
+        for bbox in bboxes:
+            x1, y1, x2, y2, class_name, source = bbox
+            if class_name not in results:
+                results[class_name] = []
+            results[class_name].append((x1, y1, x2, y2, class_name, source))
+        return results
+    
     def detect_image(self, image: Any, confidence: float = 0.25, config=None) -> Dict[str, List]:
         """
         Wrapper method for compatibility with hybrid detector interface
@@ -874,14 +1331,7 @@ class MultiModelDetector:
         bboxes = self._detect_anime_only(image, confidence, config)
         
         # Convert to dictionary format
-        results = {}
-        for bbox in bboxes:
-            x1, y1, x2, y2, class_name, source = bbox
-            if class_name not in results:
-                results[class_name] = []
-            results[class_name].append((x1, y1, x2, y2, class_name, source))
-        
-        return results
+        return self._group_by_class(bboxes)
     
     def get_model_info(self) -> dict:
         """Get information about loaded models"""
@@ -889,7 +1339,8 @@ class MultiModelDetector:
             "model_type": "anime_nsfw_v4_multi",
             "device": self.device,
             "loaded_models": list(self.models.keys()),
-            "model_count": len(self.models)
+            "model_count": len(self.models),
+            "fused_all_model": self.fused_class_map is not None
         }
     
     def visualize_detections(self, image: Any, bboxes_with_class: List[BBoxWithClass]) -> Any:
@@ -9,20 +9,16 @@ import queue
 import sys
 import webbrowser
 from pathlib import Path
-from typing import List, Optional, Dict
-import cv2
+from typing import Optional, Dict
 import time
-import numpy as np
 
-from auto_mosaic.src.utils import logger, ProcessingConfig, validate_image_path, get_output_path, get_custom_output_path, calculate_tile_size, expand_masks_radial, is_first_run, mark_first_run_complete, create_desktop_shortcut, open_models_folder, get_models_dir, get_app_data_dir, expand_bboxes_individual, BBoxWithClass, get_device_info, is_developer_mode
+from auto_mosaic.src.utils import logger, ProcessingConfig, validate_image_path, get_output_path, calculate_tile_size, expand_masks_radial, is_first_run, mark_first_run_complete, create_desktop_shortcut, open_models_folder, get_models_dir, get_app_data_dir, BBoxWithClass, get_device_info, is_developer_mode
 from auto_mosaic.src.detector import create_detector
 from auto_mosaic.src.segmenter import create_segmenter
 from auto_mosaic.src.mosaic import create_mosaic_processor
 from auto_mosaic.src.downloader import downloader
 from auto_mosaic.src.detector import GenitalDetector
-from auto_mosaic.src.segmenter import GenitalSegmenter
-from auto_mosaic.src.mosaic import MosaicProcessor
-from auto_mosaic.src.detector import MultiModelDetector
+from auto_mosaic.src.pipeline import ImagePipeline
 from auto_mosaic.src.auth_manager import authenticate_user, AuthenticationManager
 
 class ExpandableFrame(ttk.Frame):
@@ -879,6 +875,7 @@ class AutoMosaicGUI:
         self.detector = None
         self.segmenter = None
         self.mosaic_processor = None
+        self.pipeline = None
         
         # GUI state
         self.image_paths = []
@@ -2465,6 +2462,12 @@ class AutoMosaicGUI:
         visual_check = ttk.Checkbutton(output_frame, text="検出範囲を枠で表示した画像を保存", variable=self.visual_var)
         visual_check.grid(row=0, column=0, sticky=tk.W, pady=2)
         
+        # 差分処理オプション（出力マニフェストと一致する画像をスキップ）
+        self.incremental_var = tk.BooleanVar(value=self.config.use_incremental_processing)
+        incremental_check = ttk.Checkbutton(output_frame, text="前回から変更のない画像をスキップ（同じ設定で出力済みの場合）",
+                                            variable=self.incremental_var)
+        incremental_check.grid(row=1, column=0, sticky=tk.W, pady=2)
+        
         # シームレス処理は常にON（GUIに表示しない）
         self.seamless_var = tk.BooleanVar(value=True)
     
@@ -2690,6 +2693,7 @@ class AutoMosaicGUI:
         self.config.feather = int(self.feather_var.get() * 10)  # 0-1を0-10にスケーリングして整数に
         self.config.bbox_expansion = self.expansion_var.get()
         self.config.visualize = self.visual_var.get()
+        self.config.use_incremental_processing = self.incremental_var.get()
         
         # デバイス設定は自動で"auto"に固定（手動変更なし）
         
@@ -2709,9 +2713,6 @@ class AutoMosaicGUI:
         self.config.sequential_prefix = self.seq_prefix_var.get()
         self.config.sequential_start_number = self.seq_start_var.get()
         
-        # 連番カウンターを初期化
-        self.sequential_counter = 1
-        
         # モザイク種類・粒度設定の更新（複数選択対応）
         for key, var in self.mosaic_type_vars.items():
             self.config.mosaic_types[key] = var.get()
@@ -2786,18 +2787,17 @@ class AutoMosaicGUI:
             
             self._initialize_models()
             
-            total_images = len(self.image_paths)
-            
-            for i, image_path in enumerate(self.image_paths):
-                if not self.processing:
-                    break
-                
-                try:
-                    self._process_single_image(image_path, i + 1, total_images)
-                except Exception as e:
-                    error_msg = f"画像 {Path(image_path).name} の処理中にエラーが発生しました: {str(e)}"
+            def on_result(index, image_path, summary, error):
+                if error is not None:
+                    error_msg = f"画像 {Path(image_path).name} の処理中にエラーが発生しました: {str(error)}"
                     self.progress_queue.put(("error", error_msg))
-                    continue
+            
+            # パイプライン処理が有効な場合はデコード・推論・保存を並行実行
+            self.pipeline.run(
+                list(self.image_paths),
+                should_continue=lambda: self.processing,
+                on_result=on_result
+            )
             
             self.progress_queue.put(("done", None))
             
@@ -2808,284 +2808,7 @@ class AutoMosaicGUI:
     
     def _process_single_image(self, image_path: str, current: int, total: int):
         """Process a single image"""
-        import time
-        
-        path = Path(image_path)
-        self.progress_queue.put(("status", f"処理中: {path.name}"))
-        self.progress_queue.put(("progress", (current - 1, total)))
-        
-        start_time = time.time()
-        
-        # Load image
-        load_start = time.time()
-        image = cv2.imread(str(path))
-        if image is None:
-            raise ValueError(f"画像を読み込めませんでした: {path.name}")
-        load_time = time.time() - load_start
-        logger.info(f"[Image Load] Time: {load_time:.2f}s")
-        
-        # Detect genital regions
-        detect_start = time.time()
-        bboxes_with_class = self.detector.detect(image, self.config.confidence, config=self.config)
-        detect_time = time.time() - detect_start
-        logger.info(f"[Detection] Time: {detect_time:.2f}s")
-        
-        if not bboxes_with_class:
-            # 検出されない場合は元画像をそのまま各モザイクタイプ別フォルダのNoMosaicサブフォルダに出力
-            self.progress_queue.put(("status", f"{path.name}: No target regions detected - outputting original image to NoMosaic folders"))
-            
-            # 選択されたモザイクタイプ別フォルダのNoMosaicサブフォルダに元画像を出力
-            selected_types = [key for key, value in self.config.mosaic_types.items() if value]
-            
-            for mosaic_type in selected_types:
-                # モザイクタイプ別サブフォルダを作成（出力フォルダ指定がない場合は入力画像フォルダを使用）
-                if self.output_dir:
-                    type_output_dir = self.output_dir / mosaic_type
-                else:
-                    type_output_dir = path.parent / mosaic_type
-                
-                type_output_dir.mkdir(parents=True, exist_ok=True)
-                logger.info(f"[DEBUG] Created subfolder: {type_output_dir}")
-                
-                # NoMosaicサブフォルダを作成
-                no_mosaic_dir = type_output_dir / "NoMosaic"
-                no_mosaic_dir.mkdir(exist_ok=True)
-                logger.info(f"[DEBUG] Created NoMosaic subfolder: {no_mosaic_dir}")
-                
-                original_output_path = get_custom_output_path(path, output_dir=no_mosaic_dir, 
-                                                            suffix="", config=self.config, 
-                                                            counter=self.sequential_counter)
-                cv2.imwrite(str(original_output_path), image)
-                logger.info(f"[No Detection - {mosaic_type}/NoMosaic] -> {original_output_path}")
-            
-            # 連番カウンターを更新（連番モードの場合）
-            if self.config.filename_mode == "sequential":
-                self.sequential_counter += 1
-                
-            total_time = time.time() - start_time
-            logger.info(f"[No Detection - NoMosaic Output] Time: {total_time:.2f}s | Image: {path.name}")
-            self.progress_queue.put(("status", f"{path.name}: No detection - saved original image to {len(selected_types)} NoMosaic folders - {total_time:.1f}s"))
-            self.progress_queue.put(("progress", (current, total)))
-            return
-        
-        # 個別拡張範囲処理を適用（矩形モードのみ）
-        original_bboxes = [(x1, y1, x2, y2) for x1, y1, x2, y2, _, _ in bboxes_with_class]
-        
-        if self.config.sam_use_none:
-            # 矩形モード: 矩形段階で拡張を適用
-            if self.config.use_individual_expansion:
-                # 個別拡張範囲を適用
-                expanded_bboxes = expand_bboxes_individual(bboxes_with_class, self.config, image.shape[:2])
-                logger.info(f"Applied individual expansion by class for rectangular mode (total: {len(expanded_bboxes)} regions)")
-            else:
-                # 通常拡張を適用
-                from auto_mosaic.src.utils import expand_bboxes
-                expanded_bboxes = expand_bboxes(original_bboxes, self.config.bbox_expansion, image.shape[:2])
-                if self.config.bbox_expansion != 0:
-                    logger.info(f"Applied bbox expansion {self.config.bbox_expansion:+d}px for rectangular mode")
-        else:
-            # 輪郭モード: 矩形段階では拡張しない（元の検出結果をそのまま使用）
-            expanded_bboxes = original_bboxes
-            logger.info(f"Using original bboxes for contour mode (expansion will be applied after segmentation)")
-
-        # Generate masks and process separately for comparison
-        mask_start = time.time()
-        
-        # Process each segmentation method separately for comparison
-        sam_results = {}
-        output_files = []
-        
-        if self.config.sam_use_vit_b:
-            vit_b_start = time.time()
-            # 輪郭モード: 元の検出結果を使用してSAM処理
-            masks_b = self.segmenter_vit_b.masks(image, original_bboxes)
-            vit_b_time = time.time() - vit_b_start
-            sam_results["ViT-B"] = {"masks": len(masks_b), "time": vit_b_time}
-            logger.info(f"  [SAM ViT-B] Time: {vit_b_time:.2f}s ({len(masks_b)} masks)")
-            
-            if masks_b:
-                # ViT-B mosaic processing（SAM処理後に輪郭ベース拡張を適用）
-                mosaic_b_start = time.time()
-                
-                # 輪郭モード用の設定を作成（拡張を有効化）
-                contour_config = type('obj', (object,), {
-                    'bbox_expansion': self.config.bbox_expansion,
-                    'use_individual_expansion': self.config.use_individual_expansion,
-                    'individual_expansions': getattr(self.config, 'individual_expansions', {}),
-                    'use_fanza_standard': self.config.use_fanza_standard,
-                    'manual_tile_size': self.config.manual_tile_size,
-                    'mode': 'contour',  # 輪郭モードを指定
-                    'bboxes_with_class': bboxes_with_class  # クラス情報を追加
-                })()
-                
-                # 複数モザイクタイプ処理
-                selected_types = [key for key, value in self.config.mosaic_types.items() if value]
-                for mosaic_type in selected_types:
-                    # モザイクタイプ別設定を作成
-                    type_config = type('obj', (object,), {
-                        'bbox_expansion': self.config.bbox_expansion,
-                        'use_individual_expansion': self.config.use_individual_expansion,
-                        'individual_expansions': getattr(self.config, 'individual_expansions', {}),
-                        'use_fanza_standard': self.config.use_fanza_standard if mosaic_type == "block" else False,
-                        'manual_tile_size': self.config.manual_tile_size,
-                        'gaussian_blur_radius': self.config.gaussian_blur_radius,
-                        'mode': 'contour',  # 輪郭モードを指定
-                        'bboxes_with_class': bboxes_with_class  # クラス情報を追加
-                    })()
-                    
-                    # シームレス処理（輪郭ベース拡張付き）
-                    result_b = self.mosaic_processor.apply(
-                        image, masks_b, 
-                        feather=self.config.feather, 
-                        strength=1.0,  # 強度は固定値1.0を使用
-                        config=type_config,
-                        mosaic_type=mosaic_type
-                    )
-                    
-                    # モザイクタイプ別サブフォルダに保存（出力フォルダ指定がない場合は入力画像フォルダを使用）
-                    if self.output_dir:
-                        type_output_dir = self.output_dir / mosaic_type
-                    else:
-                        type_output_dir = path.parent / mosaic_type
-                    
-                    type_output_dir.mkdir(parents=True, exist_ok=True)
-                    logger.info(f"[DEBUG] Created subfolder: {type_output_dir}")
-                    
-                    output_path_b = get_custom_output_path(path, output_dir=type_output_dir, 
-                                                         suffix="", config=self.config, 
-                                                         counter=self.sequential_counter)
-                    cv2.imwrite(str(output_path_b), result_b)
-                    output_files.append((f"輪郭マスク({mosaic_type})", output_path_b, len(masks_b)))
-                    logger.info(f"  [輪郭マスク-{mosaic_type}] -> {output_path_b}")
-                
-                mosaic_b_time = time.time() - mosaic_b_start
-                
-                # 連番カウンターを更新（連番モードの場合）
-                if self.config.filename_mode == "sequential":
-                    self.sequential_counter += 1
-        
-        if self.config.sam_use_none:
-            none_start = time.time()
-            # Create simple rectangular masks from bounding boxes (no SAM segmentation)
-            # 矩形モード: 拡張済みの矩形を使用
-            bbox_masks = self._create_bbox_masks(image, expanded_bboxes)
-            none_time = time.time() - none_start
-            sam_results["None"] = {"masks": len(bbox_masks), "time": none_time}
-            logger.info(f"  [BBox Only] Time: {none_time:.2f}s ({len(bbox_masks)} masks)")
-            
-            if bbox_masks:
-                # 矩形マスク処理（拡張は既に適用済みなので追加拡張なし）
-                mosaic_none_start = time.time()
-                
-                # 矩形モード用の設定を作成（拡張を無効化）
-                rect_config = type('obj', (object,), {
-                    'bbox_expansion': 0,  # 拡張は既に適用済み
-                    'use_fanza_standard': self.config.use_fanza_standard,
-                    'manual_tile_size': self.config.manual_tile_size,
-                    'mode': 'rectangle'  # 矩形モードを指定
-                })()
-                
-                # 複数モザイクタイプ処理
-                selected_types = [key for key, value in self.config.mosaic_types.items() if value]
-                for mosaic_type in selected_types:
-                    # モザイクタイプ別設定を作成
-                    type_config = type('obj', (object,), {
-                        'bbox_expansion': 0,  # 拡張は既に適用済み
-                        'use_fanza_standard': self.config.use_fanza_standard if mosaic_type == "block" else False,
-                        'manual_tile_size': self.config.manual_tile_size,
-                        'gaussian_blur_radius': self.config.gaussian_blur_radius,
-                        'mode': 'rectangle'  # 矩形モードを指定
-                    })()
-                    
-                    # シームレス処理（追加拡張なし）
-                    result_none = self.mosaic_processor.apply(
-                        image, bbox_masks, 
-                        feather=self.config.feather, 
-                        strength=1.0,  # 強度は固定値1.0を使用
-                        config=type_config,
-                        mosaic_type=mosaic_type
-                    )
-                    
-                    # モザイクタイプ別サブフォルダに保存（出力フォルダ指定がない場合は入力画像フォルダを使用）
-                    if self.output_dir:
-                        type_output_dir = self.output_dir / mosaic_type
-                    else:
-                        type_output_dir = path.parent / mosaic_type
-                    
-                    type_output_dir.mkdir(parents=True, exist_ok=True)
-                    logger.info(f"[DEBUG] Created subfolder: {type_output_dir}")
-                    
-                    output_path_none = get_custom_output_path(path, output_dir=type_output_dir, 
-                                                            suffix="", config=self.config, 
-                                                            counter=self.sequential_counter)
-                    cv2.imwrite(str(output_path_none), result_none)
-                    output_files.append((f"矩形マスク({mosaic_type})", output_path_none, len(bbox_masks)))
-                    logger.info(f"  [矩形マスク-{mosaic_type}] -> {output_path_none}")
-                
-                mosaic_none_time = time.time() - mosaic_none_start
-                
-                # 連番カウンターを更新（連番モードの場合）
-                if self.config.filename_mode == "sequential":
-                    self.sequential_counter += 1
-        
-        mask_time = time.time() - mask_start
-        logger.info(f"[Mask Generation & Processing] Time: {mask_time:.2f}s")
-        
-        # マスク方式比較結果
-        if len(sam_results) > 1:
-            vit_b_time = sam_results.get("ViT-B", {}).get("time", 0)
-            none_time = sam_results.get("None", {}).get("time", 0)
-            if vit_b_time > 0 and none_time > 0:
-                speed_ratio = vit_b_time / none_time
-                logger.info(f"[マスク方式比較] 輪郭マスク {vit_b_time:.1f}s vs 矩形マスク {none_time:.1f}s (輪郭マスクは {speed_ratio:.1f}倍時間)")
-        elif sam_results:
-            # Single method selected
-            method_name = list(sam_results.keys())[0]
-            method_time = list(sam_results.values())[0]["time"]
-            method_display = "輪郭マスク" if method_name == "ViT-B" else "矩形マスク"
-            logger.info(f"[マスク方式] {method_display} 処理時間: {method_time:.1f}s")
-        
-        if not output_files:
-            self.progress_queue.put(("status", f"{path.name}: Mask generation failed"))
-            self.progress_queue.put(("progress", (current, total)))
-            return
-        
-        # Save visualization if requested
-        if self.config.visualize:
-            viz_start = time.time()
-            vis_image = self.detector.visualize_detections(image, bboxes_with_class)
-            
-            # Detectionフォルダを各モザイクタイプと同階層に作成して保存
-            if self.output_dir:
-                detection_output_dir = self.output_dir / "Detection"
-            else:
-                detection_output_dir = path.parent / "Detection"
-            
-            detection_output_dir.mkdir(parents=True, exist_ok=True)
-            logger.info(f"[DEBUG] Created detection folder: {detection_output_dir}")
-            
-            viz_path = get_custom_output_path(path, output_dir=detection_output_dir, 
-                                            suffix="_viz", config=self.config, 
-                                            counter=self.sequential_counter)
-            cv2.imwrite(str(viz_path), vis_image)
-            logger.info(f"  [Detection] -> {viz_path}")
-            
-            viz_time = time.time() - viz_start
-            
-            # 連番カウンターを更新（連番モードの場合）
-            if self.config.filename_mode == "sequential":
-                self.sequential_counter += 1
-        
-        total_time = time.time() - start_time
-        logger.info(f"[Total Processing] Time: {total_time:.2f}s | Image: {path.name}")
-        
-        # Result summary with expansion info
-        file_summary = ", ".join([f"{model}({masks} regions)" for model, _, masks in output_files])
-        expansion_suffix = f" | 範囲{self.config.bbox_expansion:+d}px" if self.config.bbox_expansion != 0 else ""
-        self.progress_queue.put(("status", f"{path.name}: Complete - {file_summary}{expansion_suffix} - {total_time:.1f}s"))
-        self.progress_queue.put(("progress", (current, total)))
-    
-
+        return self.pipeline.process_image(image_path, current, total)
     
     def _select_output_folder(self):
         """Select output folder"""
@@ -3097,34 +2820,6 @@ class AutoMosaicGUI:
             # ファイル名例示を更新
             self._update_filename_example()
     
-    def _create_bbox_masks(self, image: np.ndarray, bboxes: List) -> List[np.ndarray]:
-        """
-        Create simple rectangular masks from bounding boxes (no SAM segmentation)
-        
-        Args:
-            image: Input image
-            bboxes: List of bounding boxes (x1, y1, x2, y2)
-            
-        Returns:
-            List of binary masks for each bounding box
-        """
-        height, width = image.shape[:2]
-        masks = []
-        
-        for bbox in bboxes:
-            x1, y1, x2, y2 = bbox
-            
-            # Create blank mask
-            mask = np.zeros((height, width), dtype=np.uint8)
-            
-            # Fill rectangle area with 255
-            mask[y1:y2, x1:x2] = 255
-            
-            masks.append(mask)
-        
-        logger.debug(f"Created {len(masks)} rectangular masks from bounding boxes")
-        return masks
-    
     def _initialize_models(self):
         """Initialize detection and segmentation models"""
         try:
@@ -3133,28 +2828,22 @@ class AutoMosaicGUI:
             # スマートなモデルセットアップを実行
             self._setup_models_smartly()
             
-            # 選択されたモデルファイルでMultiModelDetectorを直接初期化（デバイス設定を渡す）
-            self.detector = MultiModelDetector(config=self.config, device=self.config.device_mode)
-            
-            # Initialize selected segmentation models
-            self.segmenter_vit_b = None
-            
-            if self.config.sam_use_vit_b:
-                logger.info("Initializing SAM ViT-B model...")
-                if not downloader.is_model_available("sam_vit_b"):
-                    logger.info("Downloading SAM ViT-B model...")
-                    success = downloader.download_model("sam_vit_b")
-                    if not success:
-                        raise RuntimeError("Failed to download SAM ViT-B model")
-                # SAMにもデバイス設定を渡す
-                self.segmenter_vit_b = GenitalSegmenter(model_type="vit_b", device=self.config.device_mode)
-            
-            # No initialization needed for "none" option - uses simple bounding box masks
-            
-            # Initialize mosaic processor
-            self.mosaic_processor = MosaicProcessor()
+            # GUIに依存しない処理パイプラインでモデルを初期化
+            # （パイプラインは実行間で再利用し、モデルは model_registry に常駐させる）
+            if self.pipeline is None:
+                self.pipeline = ImagePipeline(
+                    self.config,
+                    output_dir=self.output_dir,
+                    progress_callback=lambda event_type, data: self.progress_queue.put((event_type, data))
+                )
+            else:
+                self.pipeline.config = self.config
+                self.pipeline.output_dir = self.output_dir
+            self.pipeline.initialize_models()
             
-            logger.info("All models initialized successfully")
+            self.detector = self.pipeline.detector
+            self.segmenter_vit_b = self.pipeline.segmenter_vit_b
+            self.mosaic_processor = self.pipeline.mosaic_processor
             
         except Exception as e:
             logger.error(f"Failed to initialize models: {str(e)}")
@@ -4424,6 +4113,7 @@ class AutoMosaicGUI:
             self.config.feather = int(self.feather_var.get() * 10)
             self.config.bbox_expansion = self.expansion_var.get()
             self.config.visualize = self.visual_var.get()
+            self.config.use_incremental_processing = self.incremental_var.get()
             
             # 個別拡張範囲設定
             self.config.use_individual_expansion = self.use_individual_expansion_var.get()
@@ -4466,6 +4156,7 @@ class AutoMosaicGUI:
             self.feather_var.set(self.config.feather / 10.0)
             self.expansion_var.set(self.config.bbox_expansion)
             self.visual_var.set(self.config.visualize)
+            self.incremental_var.set(self.config.use_incremental_processing)
             
             # 個別拡張範囲設定
             self.use_individual_expansion_var.set(self.config.use_individual_expansion)
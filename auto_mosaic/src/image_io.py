@@ -0,0 +1,476 @@
+"""
+画像の入出力
+
+読み込み・保存はファイルのバイト列を np.fromfile / cv2.imdecode、cv2.imencode / tofile で
+扱う（Windowsの非ASCIIパスでも失敗しない）。読み込み時はEXIF Orientationを1回だけ適用し、
+アルファチャンネルは分離して保存時に再結合する。
+このほか検出用の縮小デコード（JPEGのDCTスケーリング）、出力形式ごとのエンコード設定
+（PNG圧縮レベル・JPEG/WebP品質）と、エンコード・保存（未検出画像は再エンコードなしのコピー）を
+スレッドプールで実行する OutputWriter を提供する。
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+import warnings
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import List, Optional, Tuple, Union
+
+import cv2
+import numpy as np
+
+from auto_mosaic.src.utils import logger
+
+
+# 縮小デコード（libjpeg のDCTスケーリングで 1/2・1/4・1/8 解像度を直接デコード）
+REDUCED_DECODE_FLAGS = {2: cv2.IMREAD_REDUCED_COLOR_2, 4: cv2.IMREAD_REDUCED_COLOR_4, 8: cv2.IMREAD_REDUCED_COLOR_8}
+# 縮小デコードが高速になる形式（その他の形式は原寸デコード後の縮小になるため対象外）
+REDUCED_DECODE_EXTENSIONS = {".jpg", ".jpeg"}
+
+# EXIF Orientation のうち縦横が入れ替わる値
+_TRANSPOSED_ORIENTATIONS = {5, 6, 7, 8}
+
+# アルファチャンネルを保存できる出力形式
+ALPHA_EXTENSIONS = {".png", ".webp", ".tif", ".tiff"}
+
+# アルファチャンネル結合時に一度にコピーする行数
+_ALPHA_MERGE_ROWS = 1024
+
+
+
+def read_image_size(path: Union[str, Path]) -> Optional[Tuple[int, int]]:
+    """
+    Read the decoded image size from the file header (without decoding pixels)
+
+    Returns:
+        (width, height) after EXIF orientation, or None when the header cannot be read
+    """
+    try:
+        from PIL import Image
+        with warnings.catch_warnings():
+            # 巨大画像の DecompressionBombWarning を抑制（ヘッダーのみ読み込む）
+            warnings.simplefilter("ignore")
+            with Image.open(path) as header:
+                width, height = header.size
+                if header.getexif().get(0x0112) in _TRANSPOSED_ORIENTATIONS:
+                    width, height = height, width
+        return width, height
+    except Exception:
+        return None
+
+
+def reduced_decode_factor(path: Union[str, Path], size: Optional[Tuple[int, int]], min_size: int) -> int:
+    """
+    Largest reduced-decode factor keeping the longest side at or above min_size
+
+    Args:
+        path: Image path (only JPEG files are decoded reduced)
+        size: (width, height) from read_image_size
+        min_size: Minimum longest side of the reduced image in pixels
+
+    Returns:
+        1, 2, 4 or 8
+    """
+    if size is None or Path(path).suffix.lower() not in REDUCED_DECODE_EXTENSIONS:
+        return 1
+    for factor in sorted(REDUCED_DECODE_FLAGS, reverse=True):
+        if max(size) / factor >= min_size:
+            return factor
+    return 1
+
+
+def _tiff_orientation(tiff: memoryview) -> int:
+    """EXIF（TIFF形式）のIFD0から Orientation タグを取得"""
+    if len(tiff) < 8:
+        return 1
+    if tiff[:2] == b"II":
+        order = "little"
+    elif tiff[:2] == b"MM":
+        order = "big"
+    else:
+        return 1
+    ifd = int.from_bytes(tiff[4:8], order)
+    if ifd + 2 > len(tiff):
+        return 1
+    for index in range(int.from_bytes(tiff[ifd:ifd + 2], order)):
+        entry = ifd + 2 + index * 12
+        if entry + 12 > len(tiff):
+            break
+        if int.from_bytes(tiff[entry:entry + 2], order) == 0x0112:
+            value = int.from_bytes(tiff[entry + 8:entry + 10], order)
+            return value if 1 <= value <= 8 else 1
+    return 1
+
+
+def _jpeg_exif(data: memoryview) -> Optional[memoryview]:
+    """JPEGのAPP1セグメントからEXIF（TIFF形式）部分を取得"""
+    offset = 2
+    while offset + 4 <= len(data) and data[offset] == 0xFF:
+        marker = data[offset + 1]
+        if marker == 0xFF:
+            # 埋め草バイト
+            offset += 1
+            continue
+        if marker in (0xD9, 0xDA):
+            # EOI / SOS 以降にEXIFはない
+            break
+        length = int.from_bytes(data[offset + 2:offset + 4], "big")
+        if marker == 0xE1 and data[offset + 4:offset + 10] == b"Exif\x00\x00":
+            return data[offset + 10:offset + 2 + length]
+        offset += 2 + length
+    return None
+
+
+def _png_exif(data: memoryview) -> Optional[memoryview]:
+    """PNGの eXIf チャンクを取得"""
+    offset = 8
+    while offset + 8 <= len(data):
+        length = int.from_bytes(data[offset:offset + 4], "big")
+        chunk_type = data[offset + 4:offset + 8]
+        if chunk_type == b"eXIf":
+            return data[offset + 8:offset + 8 + length]
+        if chunk_type == b"IEND":
+            break
+        offset += 12 + length
+    return None
+
+
+def _webp_exif(data: memoryview) -> Optional[memoryview]:
+    """WebP（RIFF）の EXIF チャンクを取得"""
+    offset = 12
+    while offset + 8 <= len(data):
+        length = int.from_bytes(data[offset + 4:offset + 8], "little")
+        if data[offset:offset + 4] == b"EXIF":
+            chunk = data[offset + 8:offset + 8 + length]
+            # "Exif\0\0" 付きで書き込むエンコーダーもある
+            return chunk[6:] if chunk[:6] == b"Exif\x00\x00" else chunk
+        offset += 8 + length + (length & 1)
+    return None
+
+
+def exif_orientation(buffer: np.ndarray) -> int:
+    """
+    EXIF Orientation of an encoded JPEG / PNG / WebP / TIFF file (1 = no transform)
+
+    ファイル全体をコピーせず、バッファ上のセグメント・チャンクを順にたどって取得する。
+
+    Args:
+        buffer: Encoded file bytes (uint8 array)
+    """
+    data = memoryview(np.ascontiguousarray(buffer, dtype=np.uint8)).cast("B")
+    if data[:2] == b"\xff\xd8":
+        exif = _jpeg_exif(data)
+    elif data[:8] == b"\x89PNG\r\n\x1a\n":
+        exif = _png_exif(data)
+    elif data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        exif = _webp_exif(data)
+    elif data[:4] in (b"II*\x00", b"MM\x00*"):
+        # TIFFはファイル自体がEXIFと同じ形式（IFD0に Orientation タグ）
+        exif = data
+    else:
+        exif = None
+    return _tiff_orientation(exif) if exif is not None else 1
+
+
+def _pending_orientation(buffer: np.ndarray) -> int:
+    """
+    EXIF Orientation still to apply after cv2.imdecode
+
+    OpenCVのTIFFデコーダー（libtiff）はデコードフラグに関係なく Orientation を適用済みで返すため、
+    TIFFでは二重に回転しないよう1を返す。
+    """
+    if buffer[:4].tobytes() in (b"II*\x00", b"MM\x00*"):
+        return 1
+    return exif_orientation(buffer)
+
+
+def apply_orientation(image: np.ndarray, orientation: int) -> np.ndarray:
+    """EXIF Orientation に従って画像を回転・反転"""
+    if orientation == 2:
+        return cv2.flip(image, 1)
+    if orientation == 3:
+        return cv2.rotate(image, cv2.ROTATE_180)
+    if orientation == 4:
+        return cv2.flip(image, 0)
+    if orientation == 5:
+        return cv2.transpose(image)
+    if orientation == 6:
+        return cv2.rotate(image, cv2.ROTATE_90_CLOCKWISE)
+    if orientation == 7:
+        return cv2.flip(cv2.transpose(image), -1)
+    if orientation == 8:
+        return cv2.rotate(image, cv2.ROTATE_90_COUNTERCLOCKWISE)
+    return image
+
+
+def _to_uint8(image: np.ndarray) -> np.ndarray:
+    """16bit・浮動小数点画像を8bitに変換（cv2.IMREAD_COLOR と同じ変換）"""
+    if image.dtype == np.uint8:
+        return image
+    if image.dtype == np.uint16:
+        return (image >> 8).astype(np.uint8)
+    return cv2.convertScaleAbs(image, alpha=255.0 if image.dtype.kind == "f" else 1.0)
+
+
+def read_image_with_alpha(path: Union[str, Path]) -> Tuple[Optional[np.ndarray], Optional[np.ndarray]]:
+    """
+    Decode an image file as 8-bit BGR plus its alpha channel
+
+    ファイルを np.fromfile で読み込み cv2.imdecode(IMREAD_UNCHANGED) でデコードする。
+    グレースケールはBGRに変換し、EXIF Orientation（JPEG・PNG・WebP・TIFF）を1回だけ適用する。
+
+    Args:
+        path: Image path
+
+    Returns:
+        (image, alpha) - alpha is None when the image has no alpha channel, image is None if undecodable
+    """
+    buffer = np.fromfile(str(path), dtype=np.uint8)
+    image = cv2.imdecode(buffer, cv2.IMREAD_UNCHANGED)
+    if image is None:
+        return None, None
+
+    image = _to_uint8(image)
+    alpha = None
+    if image.ndim == 2 or image.shape[2] == 1:
+        image = cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+    elif image.shape[2] == 4:
+        alpha = np.ascontiguousarray(image[:, :, 3])
+        image = cv2.cvtColor(image, cv2.COLOR_BGRA2BGR)
+
+    orientation = _pending_orientation(buffer)
+    del buffer
+    image = apply_orientation(image, orientation)
+    if alpha is not None:
+        alpha = apply_orientation(alpha, orientation)
+    return image, alpha
+
+
+def read_image(path: Union[str, Path], reduce_factor: int = 1) -> Optional[np.ndarray]:
+    """
+    Decode an image file as 8-bit BGR (alpha channel is dropped)
+
+    Args:
+        path: Image path
+        reduce_factor: 1 (full resolution), 2, 4 or 8
+
+    Returns:
+        Image array, or None if it could not be decoded
+    """
+    if reduce_factor not in REDUCED_DECODE_FLAGS:
+        return read_image_with_alpha(path)[0]
+
+    buffer = np.fromfile(str(path), dtype=np.uint8)
+    image = cv2.imdecode(buffer, REDUCED_DECODE_FLAGS[reduce_factor] | cv2.IMREAD_IGNORE_ORIENTATION)
+    if image is None:
+        return None
+    return apply_orientation(image, _pending_orientation(buffer))
+
+
+def get_encode_params(path: Union[str, Path], config=None) -> List[int]:
+    """
+    Build cv2.imencode parameters for the output format
+
+    Args:
+        path: Output path (format is chosen by extension)
+        config: ProcessingConfig with png_compression / jpeg_quality / webp_quality
+
+    Returns:
+        Flat list of (flag, value) pairs for cv2.imencode
+    """
+    suffix = Path(path).suffix.lower()
+    if suffix == ".png":
+        level = getattr(config, 'png_compression', None)
+        # None はフラグを渡さず OpenCV 既定（レベル1 + RLE + SUBフィルタ）のまま書き出す
+        return [] if level is None else [cv2.IMWRITE_PNG_COMPRESSION, int(level)]
+    if suffix in (".jpg", ".jpeg"):
+        return [cv2.IMWRITE_JPEG_QUALITY, int(getattr(config, 'jpeg_quality', 95))]
+    if suffix == ".webp":
+        return [cv2.IMWRITE_WEBP_QUALITY, int(getattr(config, 'webp_quality', 101))]
+    return []
+
+
+def _attach_alpha(image: np.ndarray, alpha: np.ndarray) -> Tuple[np.ndarray, Optional[str]]:
+    """
+    Merge BGR and alpha into a BGRA buffer of the same kind as image
+
+    ディスク上のバッファ（タイル処理の np.memmap 出力）は同じフォルダの一時ファイルに
+    帯状に書き込み、画像全体のコピーをメモリ上に作らない。
+
+    Returns:
+        (bgra, buffer_path) - buffer_path is the temporary file to remove after encoding (None in RAM)
+    """
+    shape = image.shape[:2] + (4,)
+    buffer_path = None
+    if isinstance(image, np.memmap) and image.filename:
+        fd, buffer_path = tempfile.mkstemp(suffix=".buf", dir=os.path.dirname(image.filename))
+        os.close(fd)
+        merged = np.memmap(buffer_path, dtype=image.dtype, mode='w+', shape=shape)
+    else:
+        merged = np.empty(shape, dtype=image.dtype)
+
+    for y in range(0, shape[0], _ALPHA_MERGE_ROWS):
+        merged[y:y + _ALPHA_MERGE_ROWS, :, :3] = image[y:y + _ALPHA_MERGE_ROWS]
+        merged[y:y + _ALPHA_MERGE_ROWS, :, 3] = alpha[y:y + _ALPHA_MERGE_ROWS]
+    return merged, buffer_path
+
+
+def write_image(path: Union[str, Path], image: np.ndarray, params: Optional[List[int]] = None,
+                alpha: Optional[np.ndarray] = None):
+    """
+    Encode and write an image (cv2.imencode + tofile)
+
+    Args:
+        path: Output path (format is chosen by extension)
+        image: BGR image
+        params: cv2.imencode parameters (see get_encode_params)
+        alpha: Alpha channel re-attached for formats that support it
+
+    Raises:
+        IOError: If the image could not be written
+    """
+    path = Path(path)
+    buffer_path = None
+    if alpha is not None and path.suffix.lower() in ALPHA_EXTENSIONS and alpha.shape == image.shape[:2]:
+        image, buffer_path = _attach_alpha(image, alpha)
+
+    try:
+        success, encoded = cv2.imencode(path.suffix, image, params or [])
+    except cv2.error:
+        success, encoded = False, None
+    finally:
+        if buffer_path is not None:
+            del image
+            try:
+                os.remove(buffer_path)
+            except OSError:
+                logger.debug(f"Alpha buffer not removed (in use): {buffer_path}")
+    if not success:
+        raise IOError(f"画像をエンコードできませんでした: {path}")
+
+    try:
+        encoded.tofile(str(path))
+    except OSError as e:
+        raise IOError(f"画像を保存できませんでした: {path} ({e})")
+
+
+def copy_file(source: Union[str, Path], destinations: List[Union[str, Path]], use_hardlink: bool = True) -> List[Path]:
+    """
+    Copy a file to several destinations without re-encoding
+
+    最初の出力先にバイトコピーし、残りはそのコピーへのハードリンクにする
+    （ハードリンクを作成できないファイルシステム・ドライブ間ではコピー）。
+
+    Args:
+        source: Source file
+        destinations: Output paths
+        use_hardlink: Hardlink the second and later destinations to the first copy
+
+    Returns:
+        Written paths
+    """
+    destinations = [Path(destination) for destination in destinations]
+    if not destinations:
+        return []
+
+    first = destinations[0]
+    shutil.copyfile(source, first)
+    for destination in destinations[1:]:
+        if use_hardlink:
+            try:
+                if destination.exists():
+                    destination.unlink()
+                os.link(first, destination)
+                continue
+            except OSError as e:
+                logger.debug(f"Hardlink failed, copying instead: {destination} ({e})")
+        shutil.copyfile(first, destination)
+    return destinations
+
+
+class OutputWriter:
+    """
+    Thread pool encoding and writing output images in the background
+
+    cv2.imencode はエンコード中にGILを解放するため、複数の出力（モザイクタイプ別・可視化画像）を
+    並行してエンコードでき、保存中も推論・モザイク処理を続けられる。
+    """
+
+    def __init__(self, workers: int = 2):
+        """
+        Initialize output writer
+
+        Args:
+            workers: Number of encode/write threads
+        """
+        self.workers = max(1, int(workers))
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="output-writer")
+        self._pending = set()
+        self._lock = threading.Lock()
+
+    def submit(self, image: np.ndarray, path: Union[str, Path], params: Optional[List[int]] = None,
+               alpha: Optional[np.ndarray] = None) -> Future:
+        """
+        Queue an image for writing
+
+        Args:
+            image: Image array (kept referenced until written)
+            path: Output path
+            params: cv2.imencode parameters (see get_encode_params)
+            alpha: Alpha channel of the source image (see write_image)
+
+        Returns:
+            Future resolving to the output path (raises IOError on failure)
+        """
+        return self._track(self._pool.submit(self._write, image, Path(path), params, alpha))
+
+    def submit_copy(self, source: Union[str, Path], destinations: List[Union[str, Path]],
+                    use_hardlink: bool = True) -> Future:
+        """
+        Queue a byte copy of source to destinations (see copy_file)
+
+        Returns:
+            Future resolving to the written paths
+        """
+        return self._track(self._pool.submit(copy_file, source, destinations, use_hardlink))
+
+    def _track(self, future: Future) -> Future:
+        with self._lock:
+            self._pending.add(future)
+        future.add_done_callback(self._discard)
+        return future
+
+    def _write(self, image: np.ndarray, path: Path, params: Optional[List[int]],
+               alpha: Optional[np.ndarray]) -> Path:
+        write_image(path, image, params, alpha)
+        return path
+
+    def _discard(self, future: Future):
+        with self._lock:
+            self._pending.discard(future)
+
+    def pending(self) -> int:
+        """Number of writes not finished yet"""
+        with self._lock:
+            return len(self._pending)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until every queued write has finished
+
+        Returns:
+            True if all writes finished within timeout
+        """
+        with self._lock:
+            pending = list(self._pending)
+        if not pending:
+            return True
+        logger.info(f"[Output Writer] Waiting for {len(pending)} pending write(s)")
+        _, not_done = wait(pending, timeout=timeout)
+        return not not_done
+
+    def shutdown(self):
+        """Flush pending writes and stop the worker threads"""
+        self._pool.shutdown(wait=True)
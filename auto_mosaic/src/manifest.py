@@ -0,0 +1,149 @@
+"""
+出力マニフェスト（差分処理用）
+
+出力フォルダごとに、処理済みの入力画像（パス・サイズ・更新日時・内容ハッシュ）、
+処理時の設定フィンガープリント、生成した出力ファイルをSQLiteに記録する。
+差分処理モードでは記録と一致する（入力・設定が変わらず出力も残っている）画像をスキップする。
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+from auto_mosaic.src.utils import logger
+
+MANIFEST_FILE_NAME = "auto_mosaic_manifest.sqlite"
+
+# 出力内容に影響しない ProcessingConfig の項目（実行方法・キャッシュ・デバイス設定）
+RUN_ONLY_CONFIG_KEYS = {
+    "device_mode", "use_pipelined_processing", "pipeline_decode_workers", "pipeline_encode_workers",
+    "pipeline_queue_size", "detection_batch_size", "memory_limit_mb",
+    "use_embedding_cache", "embedding_cache_size_mb", "use_detection_cache", "detection_cache_size_mb",
+    "use_incremental_processing",
+}
+
+
+def config_fingerprint(config) -> str:
+    """
+    Digest of all settings that affect the produced outputs
+
+    Args:
+        config: ProcessingConfig
+
+    Returns:
+        Hex digest (changes whenever detection, mosaic or file name settings change)
+    """
+    subset = {key: value for key, value in vars(config).items() if key not in RUN_ONLY_CONFIG_KEYS}
+    return hashlib.blake2b(json.dumps(subset, sort_keys=True, default=str).encode("utf-8"),
+                           digest_size=16).hexdigest()
+
+
+def file_hash(path: Union[str, Path], chunk_size: int = 1024 * 1024) -> str:
+    """ファイル内容のハッシュ（チャンク単位で読み込み）"""
+    hasher = hashlib.blake2b(digest_size=20)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+class OutputManifest:
+    """Per-output-directory record of processed images for incremental runs"""
+
+    def __init__(self, directory: Path):
+        """
+        Open (or create) the manifest of an output directory
+
+        Args:
+            directory: Output directory the manifest belongs to
+        """
+        directory.mkdir(parents=True, exist_ok=True)
+        self.path = directory / MANIFEST_FILE_NAME
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "source TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, content_hash TEXT, "
+            "config_fingerprint TEXT, outputs TEXT, processed_at REAL)"
+        )
+        self._connection.commit()
+
+    @staticmethod
+    def _source_key(path: Path) -> str:
+        return str(Path(path).resolve())
+
+    def _get(self, path: Path) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT size, mtime_ns, content_hash, config_fingerprint, outputs FROM entries WHERE source = ?",
+                (self._source_key(path),)
+            ).fetchone()
+        if row is None:
+            return None
+        return {"size": row[0], "mtime_ns": row[1], "content_hash": row[2],
+                "config_fingerprint": row[3], "outputs": json.loads(row[4])}
+
+    def lookup_unchanged(self, path: Path, fingerprint: str,
+                         stat: Optional[os.stat_result] = None) -> Optional[List[str]]:
+        """
+        Check whether an image was already processed with the same input and settings
+
+        サイズ・更新日時が一致すれば内容を読まずに一致とみなし、更新日時のみ異なる場合は
+        内容ハッシュで比較する（一致した場合は更新日時を記録し直す）。
+
+        Args:
+            path: Input image path
+            fingerprint: Current config_fingerprint
+            stat: os.stat result of path (read when omitted)
+
+        Returns:
+            Recorded output paths when unchanged (all still present), otherwise None
+        """
+        entry = self._get(path)
+        if entry is None or entry["config_fingerprint"] != fingerprint:
+            return None
+        if not all(Path(output).exists() for output in entry["outputs"]):
+            return None
+
+        stat = stat or os.stat(path)
+        if stat.st_size != entry["size"]:
+            return None
+        if stat.st_mtime_ns != entry["mtime_ns"]:
+            if file_hash(path) != entry["content_hash"]:
+                return None
+            with self._lock:
+                self._connection.execute("UPDATE entries SET mtime_ns = ? WHERE source = ?",
+                                         (stat.st_mtime_ns, self._source_key(path)))
+                self._connection.commit()
+        return entry["outputs"]
+
+    def record(self, path: Path, fingerprint: str, outputs: List[str], stat: Optional[os.stat_result] = None):
+        """
+        Record a processed image
+
+        Args:
+            path: Input image path
+            fingerprint: config_fingerprint used for processing
+            outputs: Output file paths produced for the image
+            stat: os.stat result of path taken before processing (read when omitted)
+        """
+        stat = stat or os.stat(path)
+        content_hash = file_hash(path)
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (self._source_key(path), stat.st_size, stat.st_mtime_ns, content_hash, fingerprint,
+                 json.dumps([str(output) for output in outputs], ensure_ascii=False), time.time())
+            )
+            self._connection.commit()
+
+    def close(self):
+        """Close the database"""
+        with self._lock:
+            self._connection.close()
+        logger.debug(f"Manifest closed: {self.path}")
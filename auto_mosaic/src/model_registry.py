@@ -0,0 +1,103 @@
+"""
+読み込み済みモデルの常駐管理
+
+処理開始のたびに YOLO / SAM / NudeNet を読み込み直さないよう、
+読み込んだモデルを (モデル種別, パス, デバイス) をキーとして保持する。
+モデル選択が変わった場合は差分のみを読み込み・解放する。
+"""
+
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Set, Tuple, Union
+
+from auto_mosaic.src.utils import logger
+
+ModelKey = Tuple[str, str, str]  # (model_type, path, device)
+
+
+class ModelRegistry:
+    """Registry of loaded models shared across processing runs"""
+
+    def __init__(self):
+        self._models: Dict[ModelKey, Any] = {}
+        self._used: Set[ModelKey] = set()
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def make_key(model_type: str, path: Union[str, Path], device: str) -> ModelKey:
+        """Build registry key"""
+        return (model_type, str(path), str(device))
+
+    def get(self, model_type: str, path: Union[str, Path], device: str, loader: Callable[[], Any]) -> Any:
+        """
+        Get a loaded model, loading it on first use
+
+        Args:
+            model_type: Model kind ("yolo", "sam_vit_b", "nudenet", ...)
+            path: Model file path (or another identifier for models without a file)
+            device: Resolved inference device ("cpu", "cuda")
+            loader: Called without arguments to load the model when not registered
+
+        Returns:
+            Loaded model object
+        """
+        key = self.make_key(model_type, path, device)
+        with self._lock:
+            self._used.add(key)
+            if key in self._models:
+                logger.info(f"[Model Registry] Reusing {model_type} model: {Path(str(path)).name} ({device})")
+                return self._models[key]
+
+            model = loader()
+            self._models[key] = model
+            logger.info(f"[Model Registry] Loaded {model_type} model: {Path(str(path)).name} ({device})")
+            return model
+
+    def begin(self):
+        """Start tracking which models are used by the next initialization"""
+        with self._lock:
+            self._used = set()
+
+    def release_unused(self):
+        """Release models not requested since begin() (e.g. parts deselected by the user)"""
+        with self._lock:
+            unused = [key for key in self._models if key not in self._used]
+            for key in unused:
+                del self._models[key]
+                logger.info(f"[Model Registry] Released {key[0]} model: {Path(key[1]).name} ({key[2]})")
+
+        if unused:
+            self._free_device_memory()
+
+    def release(self, model_type: str, path: Union[str, Path], device: str):
+        """Release a single model"""
+        with self._lock:
+            self._models.pop(self.make_key(model_type, path, device), None)
+        self._free_device_memory()
+
+    def clear(self):
+        """Release all models"""
+        with self._lock:
+            self._models.clear()
+            self._used.clear()
+        self._free_device_memory()
+
+    def loaded_keys(self):
+        """Keys of currently loaded models"""
+        with self._lock:
+            return list(self._models.keys())
+
+    def _free_device_memory(self):
+        """解放したモデルのGPUメモリを返却"""
+        import gc
+        gc.collect()
+        try:
+            import torch
+            if torch.cuda.is_available():
+                torch.cuda.empty_cache()
+        except ImportError:
+            pass
+
+
+# Global registry instance
+model_registry = ModelRegistry()
@@ -2,10 +2,85 @@
 Pixel mosaic application with feathered blending
 """
 
-from typing import List, Tuple, Optional
+from functools import lru_cache
+from typing import Callable, Dict, List, Tuple, Optional
 import numpy as np
 import cv2
-from auto_mosaic.src.utils import logger, calculate_tile_size
+from auto_mosaic.src.utils import logger, calculate_tile_size, RoiMask, MaskLike, to_roi_mask
+
+# この長さを超えるフェザリングカーネルは箱型フィルタ3段で近似（半径に依存しない計算量）
+MAX_SEPARABLE_FEATHER_KERNEL = 31
+
+@lru_cache(maxsize=32)
+def _gaussian_kernel(kernel_size: int, sigma: float) -> np.ndarray:
+    """1D Gaussian kernel (cached)"""
+    kernel = cv2.getGaussianKernel(kernel_size, sigma).ravel().astype(np.float32)
+    kernel.setflags(write=False)
+    return kernel
+
+@lru_cache(maxsize=32)
+def _feather_kernel(feather: int) -> np.ndarray:
+    """
+    1D feathering kernel (cached per feather radius)
+    
+    従来のマスクごとのガウスぼかし (2f+1, σ=f) と統合後のぼかし (f//2*2+1, σ=f//2) を
+    合成した分離可能カーネル。統合後のマスクに1回適用する。
+    """
+    kernel = cv2.getGaussianKernel(feather * 2 + 1, feather).ravel()
+    half = feather // 2
+    if half > 0:
+        kernel = np.convolve(kernel, cv2.getGaussianKernel(half * 2 + 1, half).ravel())
+    # キャッシュ共有のため読み取り専用にする
+    kernel = kernel.astype(np.float32)
+    kernel.setflags(write=False)
+    return kernel
+
+@lru_cache(maxsize=32)
+def _feather_box_width(feather: int) -> int:
+    """
+    Width of each of three stacked box filters with the variance of _feather_kernel (cached)
+    """
+    kernel = _feather_kernel(feather).astype(np.float64)
+    offsets = np.arange(len(kernel)) - len(kernel) // 2
+    variance = float(np.sum(kernel * offsets ** 2))
+    # 幅wの箱型フィルタの分散は (w²-1)/12、3段で (w²-1)/4
+    width = int(round(np.sqrt(4 * variance + 1)))
+    return width if width % 2 == 1 else width + 1
+
+def _feather_support(feather: int) -> int:
+    """Radius up to which feathering spreads a mask"""
+    if feather <= 0:
+        return 0
+    kernel_size = len(_feather_kernel(feather))
+    if kernel_size > MAX_SEPARABLE_FEATHER_KERNEL:
+        return 3 * (_feather_box_width(feather) // 2)
+    return kernel_size // 2
+
+def feather_mask(mask: np.ndarray, feather: int) -> np.ndarray:
+    """
+    Feather a merged binary mask in one pass
+    
+    Args:
+        mask: uint8 mask (0/255)
+        feather: Feather radius (0 = no feathering)
+        
+    Returns:
+        float32 alpha (0.0-1.0)
+    """
+    if feather <= 0:
+        return mask.astype(np.float32) * (1.0 / 255.0)
+    
+    kernel = _feather_kernel(feather)
+    if len(kernel) <= MAX_SEPARABLE_FEATHER_KERNEL:
+        # 分離可能カーネル（uint8 → float32、正規化係数はカーネルに含める）
+        return cv2.sepFilter2D(mask, cv2.CV_32F, kernel, kernel * (1.0 / 255.0))
+    
+    # 大きな半径: 箱型フィルタ3段（計算量は半径に依存しない）
+    width = _feather_box_width(feather)
+    feathered = cv2.boxFilter(mask, cv2.CV_32F, (width, width))
+    feathered = cv2.boxFilter(feathered, -1, (width, width))
+    feathered = cv2.boxFilter(feathered, -1, (width, width))
+    return feathered * (1.0 / 255.0)
 
 class MosaicProcessor:
     """Process images with various mosaic effects"""
@@ -14,7 +89,7 @@ class MosaicProcessor:
         """Initialize mosaic processor"""
         pass
     
-    def apply(self, image: np.ndarray, masks: List[np.ndarray], 
+    def apply(self, image: np.ndarray, masks: List[MaskLike], 
               feather: int = 5, strength: float = 1.0, config=None, 
               mosaic_type: str = "block") -> np.ndarray:
         """
@@ -22,7 +97,7 @@ class MosaicProcessor:
         
         Args:
             image: Input image in BGR format
-            masks: List of binary masks (255=mosaic, 0=original)
+            masks: List of binary masks (255=mosaic, 0=original), full-frame arrays or RoiMask
             feather: Feather radius for soft edges (0-20)
             strength: Mosaic strength multiplier (0.5-3.0)
             config: Configuration object (for compatibility)
@@ -31,17 +106,84 @@ class MosaicProcessor:
         Returns:
             Image with mosaic applied to masked regions
         """
+        return self.apply_multi(image, masks, [mosaic_type], feather, strength, config)[mosaic_type]
+    
+    def apply_multi(self, image: np.ndarray, masks: List[MaskLike], mosaic_types: List[str],
+                    feather: int = 5, strength: float = 1.0, config=None,
+                    type_configs: Optional[Dict[str, object]] = None,
+                    output_factory: Optional[Callable[[np.ndarray], np.ndarray]] = None) -> Dict[str, np.ndarray]:
+        """
+        Apply several mosaic types sharing one mask preparation pass
+        
+        マスクの拡張・統合・フェザリング・処理範囲の算出は1回だけ行い、
+        モザイク効果とブレンドのみをタイプごとに実行する。
+        
+        Args:
+            image: Input image in BGR format
+            masks: List of binary masks (255=mosaic, 0=original), full-frame arrays or RoiMask
+            mosaic_types: Mosaic types to produce ("block", "gaussian", "white", "black")
+            feather: Feather radius for soft edges (0-20)
+            strength: Mosaic strength multiplier (0.5-3.0)
+            config: Configuration object (mask expansion and tile size settings)
+            type_configs: Per-type configuration for tile size (falls back to config)
+            output_factory: Creates each result buffer initialized with image
+                            (default: image.copy(); e.g. disk-backed buffers for huge images)
+            
+        Returns:
+            {mosaic_type: image with mosaic applied}
+        """
         import time
         
+        output_factory = output_factory or (lambda source: source.copy())
+        
         if not masks:
             logger.debug("No masks provided, returning original image")
-            return image.copy()
+            return {mosaic_type: output_factory(image) for mosaic_type in mosaic_types}
         
         mosaic_start = time.time()
         
+        # 画像全体サイズのマスクは存在範囲のみに切り出して処理（以降の処理はROI内で完結）
+        masks = [to_roi_mask(mask) for mask in masks]
+        
+        # Apply radial expansion to masks based on processing mode
+        processed_masks = self._expand_masks(masks, config)
+        
+        # マスク統合・処理範囲の算出（近接するマスクのクラスタごと、全タイプで共有）
+        prepared_regions = self._prepare_merged_regions(image, processed_masks, feather)
+        
+        results = {}
+        for mosaic_type in mosaic_types:
+            type_config = (type_configs or {}).get(mosaic_type, config)
+            tile_size = self._get_tile_size(image, strength, type_config, mosaic_type)
+            
+            result = output_factory(image)
+            for prepared in prepared_regions:
+                self._blend_prepared_region(result, image, prepared, tile_size, mosaic_type)
+            results[mosaic_type] = result
+        
+        total_mosaic_time = time.time() - mosaic_start
+        if len(mosaic_types) > 1:
+            logger.info(f"[Mosaic Total] Processing time: {total_mosaic_time:.2f}s ({len(mosaic_types)} types, shared mask preparation)")
+        else:
+            logger.info(f"[Mosaic Total] Processing time: {total_mosaic_time:.2f}s")
+        
+        return results
+    
+    def _get_tile_size(self, image: np.ndarray, strength: float, config, mosaic_type: str) -> int:
+        """
+        Calculate FANZA-compliant tile size or use direct settings
+        
+        Args:
+            image: Input image
+            strength: Mosaic strength multiplier
+            config: Configuration object (None = FANZA standard)
+            mosaic_type: Type of mosaic effect
+            
+        Returns:
+            Tile size (blur radius for gaussian)
+        """
         height, width = image.shape[:2]
         
-        # Calculate FANZA-compliant tile size or use direct settings
         if config and hasattr(config, 'use_fanza_standard'):
             use_fanza = config.use_fanza_standard
             manual_size = getattr(config, 'manual_tile_size', 16)
@@ -78,7 +220,21 @@ class MosaicProcessor:
             else:
                 logger.info(f"Manual mosaic tile: {tile_size}px (custom setting)")
         
-        # Apply radial expansion to masks based on processing mode
+        return tile_size
+    
+    def _expand_masks(self, masks: List[RoiMask], config) -> List[RoiMask]:
+        """
+        Apply radial expansion to masks based on processing mode
+        
+        Args:
+            masks: List of ROI-local binary masks
+            config: Configuration object (bbox_expansion, mode, individual expansion settings)
+            
+        Returns:
+            Expanded masks
+        """
+        import time
+        
         processed_masks = masks
         processing_mode = getattr(config, 'mode', 'unknown') if config else 'unknown'
         
@@ -125,22 +281,16 @@ class MosaicProcessor:
             if processing_mode != 'unknown':
                 logger.info(f"[{processing_mode.title()} Mode] No expansion specified, using original masks")
         
-        # 新しい統合処理方式を使用
-        result = self._apply_merged_masks(image, processed_masks, tile_size, feather, mosaic_type)
-        
-        total_mosaic_time = time.time() - mosaic_start
-        logger.info(f"[Mosaic Total] Processing time: {total_mosaic_time:.2f}s")
-        
-        return result
+        return processed_masks
     
-    def _apply_merged_masks(self, image: np.ndarray, masks: List[np.ndarray], 
+    def _apply_merged_masks(self, image: np.ndarray, masks: List[RoiMask], 
                            tile_size: int, feather: int, mosaic_type: str = "block") -> np.ndarray:
         """
         Apply mosaic using merged masks to eliminate boundary artifacts
         
         Args:
             image: Input image
-            masks: List of binary masks
+            masks: List of ROI-local binary masks
             tile_size: Mosaic tile size or blur radius (for gaussian)
             feather: Feather radius
             mosaic_type: Type of mosaic effect
@@ -148,59 +298,158 @@ class MosaicProcessor:
         Returns:
             Image with seamless mosaic applied
         """
+        result = image.copy()
+        for prepared in self._prepare_merged_regions(image, masks, feather):
+            self._blend_prepared_region(result, image, prepared, tile_size, mosaic_type)
+        return result
+    
+    def _prepare_merged_regions(self, image: np.ndarray, masks: List[RoiMask], feather: int) -> List[dict]:
+        """
+        Split masks into clusters of nearby masks and prepare one region per cluster
+        
+        余白付きROIが重なるマスク同士をまとめ、クラスタごとに独立した範囲で
+        統合・フェザリング・ブレンドを行う。離れた位置の検出が画像全体を処理範囲に
+        しないため、処理量は画像サイズではなくマスク面積に比例する。
+        
+        Args:
+            image: Input image
+            masks: List of ROI-local binary masks
+            feather: Feather radius
+            
+        Returns:
+            Prepared regions (see _prepare_merged_region), empty if nothing to process
+        """
+        from auto_mosaic.src.utils import cluster_boxes
+        
+        height, width = image.shape[:2]
+        valid_masks = []
+        for i, mask in enumerate(masks):
+            if mask.image_shape != (height, width):
+                logger.warning(f"Mask {i+1} shape mismatch, skipping")
+                continue
+            if not mask.is_empty:
+                valid_masks.append(mask)
+        
+        if not valid_masks:
+            logger.debug("No valid merged mask, returning original image")
+            return []
+        
+        # 余白（フェザリングの広がり）分だけ広げたROIが重なるマスクを同じクラスタにまとめる
+        # （クラスタ間ではフェザリング後のマスクも合成範囲も重ならない）
+        pad = self._merge_padding(feather)
+        clusters = cluster_boxes([mask.bbox for mask in valid_masks], 0.0, (height, width), min_padding=pad)
+        if len(clusters) > 1:
+            logger.info(f"  [Mask Merge] {len(valid_masks)} masks in {len(clusters)} separate regions")
+        
+        prepared_regions = []
+        for _, indices in clusters:
+            prepared = self._prepare_merged_region(image, [valid_masks[i] for i in indices], feather)
+            if prepared is not None:
+                prepared_regions.append(prepared)
+        return prepared_regions
+    
+    def _prepare_merged_region(self, image: np.ndarray, masks: List[RoiMask], feather: int) -> Optional[dict]:
+        """
+        Merge masks and extract the processing region (independent of mosaic type)
+        
+        Args:
+            image: Input image
+            masks: List of ROI-local binary masks
+            feather: Feather radius
+            
+        Returns:
+            {"bounds", "region", "alpha", "inverse_alpha"} or None if nothing to process
+        """
         import time
         
         merge_start = time.time()
         
-        # Step 1: マスクを統合（重複領域を自然に融合）
-        merged_mask = self._merge_overlapping_masks(masks, feather)
+        # Step 1: マスクを統合（重複領域を自然に融合）- 各マスクの余白付きROIを包含する領域のみ処理
+        merged = self._merge_overlapping_masks(masks, feather, image.shape[:2])
+        
+        if merged is None:
+            logger.debug("No valid merged mask, returning original image")
+            return None
         
-        if merged_mask is None or np.sum(merged_mask) == 0:
+        merged_mask, (rx1, ry1, rx2, ry2) = merged
+        if np.sum(merged_mask) == 0:
             logger.debug("No valid merged mask, returning original image")
-            return image.copy()
+            return None
         
         merge_time = time.time() - merge_start
         logger.info(f"  [Mask Merge] Time: {merge_time:.2f}s")
         
-        # Step 2: 統合マスクの境界を取得
+        # Step 2: 統合マスクの境界を取得（画像座標）
         coords = np.where(merged_mask > 0.01)  # 微小値も含める
         if len(coords[0]) == 0:
-            return image.copy()
+            return None
         
-        y_min, y_max = coords[0].min(), coords[0].max() + 1
-        x_min, x_max = coords[1].min(), coords[1].max() + 1
+        y_min, y_max = coords[0].min() + ry1, coords[0].max() + 1 + ry1
+        x_min, x_max = coords[1].min() + rx1, coords[1].max() + 1 + rx1
         
-        # パディングを追加して滑らかな境界を確保
+        # パディングを追加して滑らかな境界を確保（統合領域はこの余白を含むよう確保済み）
         pad = max(1, feather)
         y_min = max(0, y_min - pad)
         y_max = min(image.shape[0], y_max + pad)
         x_min = max(0, x_min - pad)
         x_max = min(image.shape[1], x_max + pad)
         
-        # Step 3: 領域を抽出して処理
-        region = image[y_min:y_max, x_min:x_max].copy()
-        region_mask = merged_mask[y_min:y_max, x_min:x_max]
+        # Step 3: 領域を抽出（入力画像のビュー。モザイク処理・合成はいずれも新しい配列か結果画像に書き込む）
+        region = image[y_min:y_max, x_min:x_max]
+        region_mask = merged_mask[y_min - ry1:y_max - ry1, x_min - rx1:x_max - rx1]
         
         if region.size == 0:
-            return image.copy()
+            return None
         
-        # Step 4: 指定されたタイプのモザイク処理を適用
-        mosaic_region = self._apply_mosaic_effect(region, tile_size, mosaic_type)
+        # ブレンド用の重み（1チャンネルのまま全チャンネルに適用、3チャンネル分の複製は作らない）
+        # 両方の重みは領域ごとに1回だけ作成し、全モザイクタイプで共有する
+        # 整数固定小数点（uint16, 8bitシフト）での合成は numpy では3チャンネル分の uint16 一時配列が必要になり、
+        # cv2.blendLinear（float32重み・SIMD）より約3倍遅くピークメモリも多いため、float32重みを使用する
+        # （重み 8B/px に対し固定小数点は重み 4B/px + 一時配列 12B/px、誤差はどちらも最大1階調）
+        alpha = np.ascontiguousarray(region_mask, dtype=np.float32)
+        inverse_alpha = np.subtract(1.0, alpha, dtype=np.float32)
         
-        # Step 5: アルファブレンディングで自然な境界を作成
-        if len(region_mask.shape) == 2:
-            region_mask = np.stack([region_mask] * 3, axis=2)
+        return {
+            "bounds": (x_min, y_min, x_max, y_max),
+            "region": region,
+            "alpha": alpha,
+            "inverse_alpha": inverse_alpha
+        }
+    
+    def _blend_prepared_region(self, result: np.ndarray, image: np.ndarray, prepared: dict,
+                               tile_size: int, mosaic_type: str):
+        """
+        Apply one mosaic type to a prepared region and blend it into result (in place)
         
-        blended_region = (region_mask * mosaic_region + 
-                         (1 - region_mask) * region).astype(np.uint8)
+        Args:
+            result: Output image (copy of image, regions of other clusters may already be written)
+            image: Input image
+            prepared: Result of _prepare_merged_region
+            tile_size: Mosaic tile size or blur radius (for gaussian)
+            mosaic_type: Type of mosaic effect
+        """
+        x_min, y_min, x_max, y_max = prepared["bounds"]
         
-        # Step 6: 結果を元画像に反映
-        result = image.copy()
-        result[y_min:y_max, x_min:x_max] = blended_region
+        # Step 4: 指定されたタイプのモザイク処理を適用
+        if mosaic_type == "gaussian":
+            # 周辺画素を含めてぼかし、クラスタごとの処理範囲の端でも画像全体と同じ結果にする
+            mosaic_region = self._gaussian_blur_with_context(image, prepared["bounds"], tile_size)
+        elif mosaic_type in ("white", "black"):
+            mosaic_region = self._apply_mosaic_effect(prepared["region"], tile_size, mosaic_type)
+        else:
+            if mosaic_type != "block":
+                logger.warning(f"Unknown mosaic type '{mosaic_type}', using block mosaic")
+            # ブロックモザイクは画像座標に揃えたグリッドで計算（処理範囲の余白に依存しない）
+            mosaic_region = self._pixelate_aligned(image, prepared["bounds"], tile_size)
+        
+        # Step 5: アルファブレンディングで自然な境界を作成し、結果画像の該当範囲へ直接書き込む
+        # cv2.blendLinear は1チャンネルの重みを全チャンネルに適用し、uint8へ飽和・丸めして出力する
+        # （浮動小数点での合成＋切り捨てとの差は最大1階調）。dst に結果画像のビューを渡すため
+        # 合成結果の一時配列やコピーは作らない（メモリマップ出力にもそのまま書き込まれる）
+        cv2.blendLinear(mosaic_region, prepared["region"], prepared["alpha"], prepared["inverse_alpha"],
+                        dst=result[y_min:y_max, x_min:x_max])
         
         logger.info(f"  [Unified Mosaic] Size: {x_max-x_min}x{y_max-y_min}, seamless processing ({mosaic_type})")
-        
-        return result
     
     def _apply_mosaic_effect(self, image: np.ndarray, tile_size: int, mosaic_type: str) -> np.ndarray:
         """
@@ -248,6 +497,30 @@ class MosaicProcessor:
         
         return blurred
     
+    def _gaussian_blur_with_context(self, image: np.ndarray, bounds: Tuple[int, int, int, int],
+                                    blur_radius: int) -> np.ndarray:
+        """
+        Gaussian blur of an image region using surrounding pixels as context
+        
+        Args:
+            image: Full input image
+            bounds: (x1, y1, x2, y2) region to produce
+            blur_radius: Blur radius
+            
+        Returns:
+            Blurred region (same shape as image[y1:y2, x1:x2])
+        """
+        x1, y1, x2, y2 = bounds
+        if blur_radius <= 1:
+            return image[y1:y2, x1:x2]
+        
+        # カーネル半径分の周辺画素を含めて切り出す（画像端は画像全体の処理と同じく反射）
+        height, width = image.shape[:2]
+        cx1, cy1 = max(0, x1 - blur_radius), max(0, y1 - blur_radius)
+        cx2, cy2 = min(width, x2 + blur_radius), min(height, y2 + blur_radius)
+        blurred = self._gaussian_blur_region(image[cy1:cy2, cx1:cx2], blur_radius)
+        return blurred[y1 - cy1:y2 - cy1, x1 - cx1:x2 - cx1]
+    
     def _solid_fill_region(self, image: np.ndarray, color: Tuple[int, int, int]) -> np.ndarray:
         """
         Fill image region with solid color
@@ -262,60 +535,77 @@ class MosaicProcessor:
         filled = np.full_like(image, color, dtype=np.uint8)
         return filled
     
-    def _merge_overlapping_masks(self, masks: List[np.ndarray], feather: int) -> Optional[np.ndarray]:
+    @staticmethod
+    def _merge_padding(feather: int) -> int:
         """
-        Merge multiple masks with smooth transitions in overlapping areas
+        ROIに追加する余白（フェザリングの広がり + 合成時の余白）
+        
+        この幅だけ広げた範囲の外側は画像全体で処理した場合も0のままなので、
+        ROI内だけで処理しても結果は一致する。
+        """
+        return _feather_support(feather) + max(1, feather) + 1
+    
+    def _merge_overlapping_masks(self, masks: List[RoiMask], feather: int,
+                                 image_shape: Tuple[int, int]) -> Optional[Tuple[np.ndarray, Tuple[int, int, int, int]]]:
+        """
+        Merge multiple masks and feather the merged mask once
+        
+        マスクは二値（uint8）のまま和集合を取り、フェザリングは統合後に1回だけ行う。
+        重複領域も和集合上でぼかすため境界が生じない。
         
         Args:
-            masks: List of binary masks
+            masks: List of ROI-local binary masks
             feather: Feather radius for smooth blending
+            image_shape: (height, width) of the image
             
         Returns:
-            Merged float mask (0.0-1.0) or None if no valid masks
+            (merged float mask (0.0-1.0) of the merge region, merge region (x1, y1, x2, y2))
+            or None if no valid masks
         """
         if not masks:
             return None
         
-        # 最初のマスクの形状を基準にする
-        base_shape = masks[0].shape[:2]
-        merged_mask = np.zeros(base_shape, dtype=np.float32)
-        
-        valid_mask_count = 0
-        
+        height, width = image_shape[:2]
+        valid_masks = []
         for i, mask in enumerate(masks):
-            if mask.shape[:2] != base_shape:
+            if mask.image_shape != (height, width):
                 logger.warning(f"Mask {i+1} shape mismatch, skipping")
                 continue
+            if mask.is_empty:
+                continue
+            valid_masks.append(mask)
+        
+        if not valid_masks:
+            return None
+        
+        # 全マスクの余白付きROIを包含する統合領域
+        pad = self._merge_padding(feather)
+        rx1 = max(0, min(mask.bbox[0] for mask in valid_masks) - pad)
+        ry1 = max(0, min(mask.bbox[1] for mask in valid_masks) - pad)
+        rx2 = min(width, max(mask.bbox[2] for mask in valid_masks) + pad)
+        ry2 = min(height, max(mask.bbox[3] for mask in valid_masks) + pad)
+        merged_binary = np.zeros((ry2 - ry1, rx2 - rx1), dtype=np.uint8)
+        
+        for mask in valid_masks:
+            x1, y1, x2, y2 = mask.bbox
             
-            # バイナリマスクを正規化
-            if mask.dtype != np.float32:
-                normalized_mask = mask.astype(np.float32) / 255.0
-            else:
-                normalized_mask = mask
-            
-            # フェザリング適用
-            if feather > 0:
-                kernel_size = max(1, feather * 2 + 1)
-                feathered_mask = cv2.GaussianBlur(normalized_mask, (kernel_size, kernel_size), feather)
+            # 0/255 に正規化（float マスクは 0.0-1.0 として扱う）
+            if mask.mask.dtype == np.uint8:
+                binary = mask.mask
             else:
-                feathered_mask = normalized_mask
+                binary = np.clip(mask.mask * 255.0 + 0.5, 0, 255).astype(np.uint8)
             
-            # マスクを累積（最大値ベース）
-            # 重複領域では自然な最大値を取ることで境界を消す
-            merged_mask = np.maximum(merged_mask, feathered_mask)
-            valid_mask_count += 1
+            # マスクを累積（最大値 = 和集合）
+            target = merged_binary[y1 - ry1:y2 - ry1, x1 - rx1:x2 - rx1]
+            np.maximum(target, binary, out=target)
         
-        if valid_mask_count == 0:
-            return None
-        
-        # 最終的なフェザリング処理で更に滑らかに
-        if feather > 0:
-            final_kernel = max(1, feather // 2 * 2 + 1)
-            merged_mask = cv2.GaussianBlur(merged_mask, (final_kernel, final_kernel), feather // 2)
+        # フェザリング（統合後に1回だけ）
+        merged_mask = feather_mask(merged_binary, feather)
         
-        logger.info(f"  [Mask Merge] Combined {valid_mask_count} masks, max intensity: {merged_mask.max():.3f}")
+        logger.info(f"  [Mask Merge] Combined {len(valid_masks)} masks in {rx2-rx1}x{ry2-ry1} region, "
+                    f"max intensity: {merged_mask.max():.3f}")
         
-        return merged_mask
+        return merged_mask, (rx1, ry1, rx2, ry2)
     
     def _apply_single_mask(self, image: np.ndarray, mask: np.ndarray, 
                           tile: int, feather: int) -> np.ndarray:
@@ -394,6 +684,74 @@ class MosaicProcessor:
         
         return pixelated
     
+    def _pixelate_aligned(self, image: np.ndarray, bounds: Tuple[int, int, int, int],
+                          tile_size: int) -> np.ndarray:
+        """
+        Block mosaic of an image region on a grid aligned to the image origin
+        
+        タイルの境界は画像座標の tile_size の倍数に固定し、各タイルの色は
+        タイル内画素の正確な平均値とする。処理範囲の位置・余白が変わっても
+        同じ画素には同じ結果が得られる。画像端の端数タイルは画像内の画素のみで平均する。
+        
+        Args:
+            image: Full input image
+            bounds: (x1, y1, x2, y2) region to produce
+            tile_size: Size of mosaic tiles
+            
+        Returns:
+            Pixelated region (same shape as image[y1:y2, x1:x2])
+        """
+        x1, y1, x2, y2 = bounds
+        if tile_size <= 1:
+            return image[y1:y2, x1:x2]
+        
+        height, width = image.shape[:2]
+        
+        # 処理範囲と交差するタイルのみを対象にする
+        ax1, ay1 = (x1 // tile_size) * tile_size, (y1 // tile_size) * tile_size
+        ax2 = min(width, -(-x2 // tile_size) * tile_size)
+        ay2 = min(height, -(-y2 // tile_size) * tile_size)
+        block = image[ay1:ay2, ax1:ax2]
+        
+        rows = -(-(ay2 - ay1) // tile_size)
+        cols = -(-(ax2 - ax1) // tile_size)
+        full_rows = (ay2 - ay1) // tile_size
+        full_cols = (ax2 - ax1) // tile_size
+        
+        # タイルごとの平均色: 完全なタイルは INTER_AREA（整数倍縮小 = 正確な平均）で計算
+        means = np.empty((rows, cols) + block.shape[2:], dtype=np.uint8)
+        if full_rows and full_cols:
+            means[:full_rows, :full_cols] = cv2.resize(
+                block[:full_rows * tile_size, :full_cols * tile_size], (full_cols, full_rows),
+                interpolation=cv2.INTER_AREA).reshape(means[:full_rows, :full_cols].shape)
+        
+        # 画像端の端数タイル（右端の列・下端の行）は画像内の画素のみで平均
+        if full_cols < cols:
+            means[:, full_cols:] = self._tile_means(block[:, full_cols * tile_size:], tile_size)
+        if full_rows < rows:
+            means[full_rows:, :full_cols] = self._tile_means(
+                block[full_rows * tile_size:, :full_cols * tile_size], tile_size)
+        
+        # タイル平均をタイルサイズに展開して処理範囲を切り出す
+        pixelated = cv2.resize(means, (cols * tile_size, rows * tile_size), interpolation=cv2.INTER_NEAREST)
+        pixelated = pixelated.reshape((rows * tile_size, cols * tile_size) + block.shape[2:])
+        return pixelated[y1 - ay1:y2 - ay1, x1 - ax1:x2 - ax1]
+    
+    @staticmethod
+    def _tile_means(block: np.ndarray, tile_size: int) -> np.ndarray:
+        """Per-tile rounded means of block (tiles at the end may be smaller than tile_size)"""
+        height, width = block.shape[:2]
+        row_starts = np.arange(0, height, tile_size)
+        col_starts = np.arange(0, width, tile_size)
+        row_sizes = np.diff(np.append(row_starts, height))
+        col_sizes = np.diff(np.append(col_starts, width))
+        
+        sums = np.add.reduceat(block, row_starts, axis=0, dtype=np.uint32)
+        sums = np.add.reduceat(sums, col_starts, axis=1)
+        counts = np.outer(row_sizes, col_sizes).astype(np.uint32)
+        counts = counts.reshape(counts.shape + (1,) * (block.ndim - 2))
+        return ((sums + counts // 2) // counts).astype(np.uint8)
+    
     def _create_feathered_mask(self, mask: np.ndarray, feather_radius: int) -> np.ndarray:
         """
         Create feathered (soft-edge) mask
@@ -408,14 +766,9 @@ class MosaicProcessor:
         if feather_radius <= 0:
             return mask.astype(np.float32) / 255.0
         
-        # Convert to float
-        float_mask = mask.astype(np.float32) / 255.0
-        
-        # Apply Gaussian blur for feathering
-        kernel_size = feather_radius * 2 + 1
-        feathered = cv2.GaussianBlur(float_mask, (kernel_size, kernel_size), feather_radius)
-        
-        return feathered
+        # Gaussian blur for feathering (cached separable kernel, uint8 → float32 in one pass)
+        kernel = _gaussian_kernel(feather_radius * 2 + 1, feather_radius)
+        return cv2.sepFilter2D(mask, cv2.CV_32F, kernel, kernel * (1.0 / 255.0))
     
     def _blend_with_mask(self, original: np.ndarray, mosaic: np.ndarray, 
                         mask: np.ndarray) -> np.ndarray:
@@ -478,7 +831,7 @@ class MosaicProcessor:
         
         return image.copy(), mosaic_result
     
-    def get_mosaic_stats(self, image: np.ndarray, masks: List[np.ndarray]) -> dict:
+    def get_mosaic_stats(self, image: np.ndarray, masks: List[MaskLike]) -> dict:
         """
         Get statistics about mosaic application
         
@@ -493,7 +846,8 @@ class MosaicProcessor:
         mosaic_pixels = 0
         
         for mask in masks:
-            mosaic_pixels += np.sum(mask > 0)
+            mask = to_roi_mask(mask)
+            mosaic_pixels += np.count_nonzero(mask.mask)
         
         coverage_percent = (mosaic_pixels / total_pixels) * 100
         
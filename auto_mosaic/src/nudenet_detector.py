@@ -2,7 +2,7 @@ import numpy as np
 import cv2
 import time
 from typing import List, Tuple, Dict, Optional
-from auto_mosaic.src.utils import logger, expand_bbox
+from auto_mosaic.src.utils import logger, expand_bbox, suppress_duplicate_bboxes
 
 # Type alias for bounding box with class
 BBoxWithClass = Tuple[int, int, int, int, str]
@@ -72,10 +72,11 @@ class NudeNetDetector:
         """
         try:
             from nudenet import NudeDetector
+            from auto_mosaic.src.model_registry import model_registry
             
-            # NudeNetの初期化
+            # NudeNetの初期化（読み込み済みのセッションはレジストリから再利用）
             logger.info("Initializing NudeNet detector...")
-            self.detector = NudeDetector()
+            self.detector = model_registry.get("nudenet", "NudeDetector", self.device, NudeDetector)
             logger.info("NudeNet detector initialized successfully")
             return True
             
@@ -251,7 +252,8 @@ class HybridDetector:
         self.anime_detector = anime_detector
         self.nudenet_detector = nudenet_detector
         
-    def detect_image(self, image: np.ndarray, confidence: float = 0.25, use_anime: bool = True, use_nudenet: bool = True, config=None) -> Dict[str, List[BBoxWithClass]]:
+    def detect_image(self, image: np.ndarray, confidence: float = 0.25, use_anime: bool = True, use_nudenet: bool = True, config=None,
+                     anime_results: Optional[Dict[str, List[BBoxWithClass]]] = None) -> Dict[str, List[BBoxWithClass]]:
         """
         Detect using both detectors and combine results
         
@@ -261,6 +263,7 @@ class HybridDetector:
             use_anime: Whether to use anime_nsfw_v4 detector
             use_nudenet: Whether to use NudeNet detector
             config: Configuration object with user settings
+            anime_results: Precomputed anime_nsfw_v4 results (e.g. from batched inference)
             
         Returns:
             Combined detection results
@@ -270,8 +273,9 @@ class HybridDetector:
         # イラスト専用モデルによる検出
         if use_anime and self.anime_detector:
             try:
-                anime_results = self.anime_detector.detect_image(image, confidence, config)
-                combined_results = self._merge_results(combined_results, anime_results, "イラスト専用モデル")
+                if anime_results is None:
+                    anime_results = self.anime_detector.detect_image(image, confidence, config)
+                combined_results = self._merge_results(combined_results, anime_results, "イラスト専用モデル", config)
             except Exception as e:
                 logger.warning(f"イラスト専用モデル detection failed: {e}")
         
@@ -279,13 +283,13 @@ class HybridDetector:
         if use_nudenet and self.nudenet_detector:
             try:
                 nudenet_results = self.nudenet_detector.detect_image(image, confidence, config)
-                combined_results = self._merge_results(combined_results, nudenet_results, "実写専用モデル")
+                combined_results = self._merge_results(combined_results, nudenet_results, "実写専用モデル", config)
             except Exception as e:
                 logger.warning(f"実写専用モデル detection failed: {e}")
         
         return combined_results
     
-    def _merge_results(self, existing_results: Dict, new_results: Dict, source: str) -> Dict:
+    def _merge_results(self, existing_results: Dict, new_results: Dict, source: str, config=None) -> Dict:
         """
         Merge detection results from different sources
         
@@ -293,32 +297,21 @@ class HybridDetector:
             existing_results: Existing detection results
             new_results: New detection results to merge
             source: Source detector name for logging
+            config: Configuration object (detection_nms_iou / detection_merge_mode / detection_cross_class_merge)
             
         Returns:
             Merged results
         """
-        for part_name, detections in new_results.items():
-            if part_name not in existing_results:
-                existing_results[part_name] = []
-            
-            # 重複除去（IoUベース）
-            for new_detection in detections:
-                is_duplicate = False
-                x1, y1, x2, y2 = new_detection[:4]
-                
-                for existing_detection in existing_results[part_name]:
-                    ex1, ey1, ex2, ey2 = existing_detection[:4]
-                    
-                    # IoU計算
-                    iou = self._calculate_iou((x1, y1, x2, y2), (ex1, ey1, ex2, ey2))
-                    
-                    # IoUが0.5以上なら重複とみなす
-                    if iou > 0.5:
-                        is_duplicate = True
-                        break
-                
-                if not is_duplicate:
-                    existing_results[part_name].append(new_detection)
+        # 重複除去（IoUベースのNMS、既存の検出を優先）
+        detections = [detection for dets in existing_results.values() for detection in dets]
+        detections.extend(detection for dets in new_results.values() for detection in dets)
+        kept = suppress_duplicate_bboxes(detections, threshold=getattr(config, 'detection_nms_iou', 0.5),
+                                         mode=getattr(config, 'detection_merge_mode', "fuse"),
+                                         cross_class=getattr(config, 'detection_cross_class_merge', False))
+        
+        merged_results = {part_name: [] for part_name in list(existing_results) + list(new_results)}
+        for detection in kept:
+            merged_results.setdefault(detection[4], []).append(detection)
         
         # ログ出力
         total_detections = sum(len(dets) for dets in new_results.values())
@@ -326,36 +319,4 @@ class HybridDetector:
             parts_summary = ", ".join([f"{part}:{len(dets)}" for part, dets in new_results.items() if dets])
             logger.info(f"[{source}] Detected: {parts_summary}")
         
-        return existing_results
-    
-    def _calculate_iou(self, box1: Tuple, box2: Tuple) -> float:
-        """
-        Calculate Intersection over Union (IoU) between two bounding boxes
-        
-        Args:
-            box1: First bounding box (x1, y1, x2, y2)
-            box2: Second bounding box (x1, y1, x2, y2)
-            
-        Returns:
-            IoU value between 0 and 1
-        """
-        x1_1, y1_1, x2_1, y2_1 = box1
-        x1_2, y1_2, x2_2, y2_2 = box2
-        
-        # 交差領域の計算
-        x1_inter = max(x1_1, x1_2)
-        y1_inter = max(y1_1, y1_2)
-        x2_inter = min(x2_1, x2_2)
-        y2_inter = min(y2_1, y2_2)
-        
-        # 交差領域が存在しない場合
-        if x2_inter <= x1_inter or y2_inter <= y1_inter:
-            return 0.0
-        
-        # 面積計算
-        inter_area = (x2_inter - x1_inter) * (y2_inter - y1_inter)
-        box1_area = (x2_1 - x1_1) * (y2_1 - y1_1)
-        box2_area = (x2_2 - x1_2) * (y2_2 - y1_2)
-        union_area = box1_area + box2_area - inter_area
-        
-        return inter_area / union_area if union_area > 0 else 0.0 
\ No newline at end of file
+        return merged_results
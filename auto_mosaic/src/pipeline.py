@@ -0,0 +1,1218 @@
+"""
+GUIに依存しない画像処理パイプライン
+
+検出 → SAMセグメンテーション → モザイク適用 → 保存 の一連の処理を
+Tkinterに依存せずに実行する。GUIとヘッドレスバッチ処理の両方から利用される。
+入力画像のアルファチャンネルは検出・モザイク処理から切り離して保持し、保存時に再結合する。
+"""
+
+import os
+import queue
+import sqlite3
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from auto_mosaic.src.utils import logger, get_custom_output_path, expand_bboxes_individual, RoiMask
+from auto_mosaic.src.downloader import downloader
+from auto_mosaic.src.model_registry import model_registry
+from auto_mosaic.src.detector import MultiModelDetector
+from auto_mosaic.src.segmenter import GenitalSegmenter
+from auto_mosaic.src.mosaic import MosaicProcessor
+from auto_mosaic.src.cache import EmbeddingCache, DetectionCache, image_hash, get_cache_dir, model_file_digest
+from auto_mosaic.src.image_io import (OutputWriter, get_encode_params, read_image, read_image_size,
+                                      read_image_with_alpha, reduced_decode_factor)
+from auto_mosaic.src.manifest import OutputManifest, config_fingerprint
+
+# サポートする画像形式（大文字小文字両対応）
+IMAGE_EXTENSIONS = [
+    '*.jpg', '*.jpeg', '*.png', '*.bmp', '*.tiff', '*.tif', '*.webp',
+    '*.JPG', '*.JPEG', '*.PNG', '*.BMP', '*.TIFF', '*.TIF', '*.WEBP'
+]
+
+
+def collect_image_paths(folder: Path) -> List[Path]:
+    """
+    Collect image files from folder recursively
+
+    Args:
+        folder: Folder to search
+
+    Returns:
+        Sorted list of image paths (duplicates removed)
+    """
+    found = set()
+    for ext in IMAGE_EXTENSIONS:
+        for file_path in folder.rglob(ext):  # rglob で再帰検索
+            found.add(file_path)
+    return sorted(found)
+
+
+# タイル処理の出力バッファへ一度にコピーする行数
+TILED_COPY_ROWS = 1024
+
+
+class ImagePipeline:
+    """Detection → SAM → mosaic pipeline shared by GUI and headless batch mode"""
+
+    def __init__(self, config, output_dir: Optional[Path] = None,
+                 progress_callback: Optional[Callable[[str, Any], None]] = None):
+        """
+        Initialize pipeline
+
+        Args:
+            config: ProcessingConfig with processing settings
+            output_dir: Output directory (None = same folder as input image)
+            progress_callback: Called with (event_type, data) for "status" / "progress" events
+        """
+        self.config = config
+        self.output_dir = output_dir
+        self.progress_callback = progress_callback
+
+        # Processing components (initialized by initialize_models)
+        self.detector = None
+        self.segmenter_vit_b = None
+        self.mosaic_processor = None
+        self.detection_cache = None
+        self.model_digest = ""  # 検出・SAMモデルファイルの識別子（検出キャッシュキー用）
+        self.output_writer = None
+        self._manifest_lock = threading.Lock()
+
+        # 連番カウンター
+        self.sequential_counter = 1
+
+    def _emit(self, event_type: str, data: Any):
+        """進捗イベントを通知"""
+        if self.progress_callback:
+            self.progress_callback(event_type, data)
+
+    def initialize_models(self):
+        """
+        Initialize detection and segmentation models
+
+        モデル本体は model_registry に常駐するため、2回目以降は
+        選択が変更されたモデルのみ読み込み・解放される。
+        """
+        model_registry.begin()
+
+        # 選択されたモデルファイルでMultiModelDetectorを直接初期化（デバイス設定を渡す）
+        self.detector = MultiModelDetector(config=self.config, device=self.config.device_mode)
+
+        # Initialize selected segmentation models
+        self.segmenter_vit_b = None
+
+        if self.config.sam_use_vit_b:
+            logger.info("Initializing SAM ViT-B model...")
+            if not downloader.is_model_available("sam_vit_b"):
+                logger.info("Downloading SAM ViT-B model...")
+                success = downloader.download_model("sam_vit_b")
+                if not success:
+                    raise RuntimeError("Failed to download SAM ViT-B model")
+            # 再処理時にエンコーダーを省略するための埋め込みキャッシュ
+            embedding_cache = None
+            if getattr(self.config, 'use_embedding_cache', False):
+                embedding_cache = EmbeddingCache(max_size_mb=getattr(self.config, 'embedding_cache_size_mb', 1024))
+            # SAMにもデバイス設定を渡す
+            self.segmenter_vit_b = GenitalSegmenter(model_type="vit_b", device=self.config.device_mode,
+                                                    embedding_cache=embedding_cache)
+
+        # No initialization needed for "none" option - uses simple bounding box masks
+
+        # モザイク設定のみ変更した再処理で検出・SAMを省略するための検出キャッシュ
+        self.detection_cache = None
+        if getattr(self.config, 'use_detection_cache', False):
+            self.detection_cache = DetectionCache(max_size_mb=getattr(self.config, 'detection_cache_size_mb', 512))
+            # モデルファイルを差し替えた場合は別のキャッシュエントリになる
+            model_files = list(self.detector.model_files)
+            if self.segmenter_vit_b is not None:
+                model_files.append(self.segmenter_vit_b.model_path)
+            self.model_digest = model_file_digest(model_files)
+
+        # Initialize mosaic processor
+        self.mosaic_processor = MosaicProcessor()
+
+        # 出力のエンコード・保存スレッド（スレッド数が変更された場合は作り直す）
+        self.get_output_writer()
+
+        # 前回の実行で削除できなかったタイル処理用の出力バッファを削除
+        self._remove_output_buffers(get_cache_dir("output_buffers").glob("*.buf"))
+
+        # 今回の設定で使用しないモデル（選択解除された部位など）を解放
+        model_registry.release_unused()
+
+        logger.info("All models initialized successfully")
+
+    def _get_type_output_dir(self, path: Path, name: str) -> Path:
+        """モザイクタイプ別サブフォルダを取得（出力フォルダ指定がない場合は入力画像フォルダを使用）"""
+        if self.output_dir:
+            type_output_dir = self.output_dir / name
+        else:
+            type_output_dir = path.parent / name
+
+        type_output_dir.mkdir(parents=True, exist_ok=True)
+        logger.info(f"[DEBUG] Created subfolder: {type_output_dir}")
+        return type_output_dir
+
+    def process_image(self, image_path: str, current: int, total: int) -> Dict[str, Any]:
+        """
+        Process a single image (all stages sequentially)
+
+        Args:
+            image_path: Path to the input image
+            current: 1-based index of this image in the run
+            total: Total number of images in the run
+
+        Returns:
+            Per-image summary (status, detections, outputs, timings)
+        """
+        path = Path(image_path)
+        self._emit("status", f"処理中: {path.name}")
+        self._emit("progress", (current - 1, total))
+
+        start_time = time.time()
+        image, load_time, full_shape, alpha = self.load_detection_image(path)
+        inference = self.infer_many([path], [image], [full_shape])[0]
+        job = self.render(path, image, inference, alpha)
+        job["summary"]["timings"]["load"] = round(load_time, 3)
+        self.write_outputs(job)
+        return self.finish(job, start_time, current, total)
+
+    def run(self, image_paths: List[str], should_continue: Optional[Callable[[], bool]] = None,
+            on_result: Optional[Callable[[int, str, Optional[Dict[str, Any]], Optional[Exception]], None]] = None):
+        """
+        Process a list of images
+
+        パイプライン処理が有効な場合は StagedExecutor でデコード・推論・モザイク・
+        エンコードを並行実行し、無効な場合は1枚ずつ順番に処理する。
+        差分処理が有効な場合は、出力マニフェストの記録と一致する画像をスキップする。
+
+        Args:
+            image_paths: Input image paths
+            should_continue: Returns False when processing should stop
+            on_result: Called with (index, path, summary, error) for every processed image
+                       (skipped images are reported first with status "skipped")
+        """
+        should_continue = should_continue or (lambda: True)
+
+        # 連番は実行ごとに開始番号から
+        self.sequential_counter = 1
+
+        manifests = {}
+        if getattr(self.config, 'use_incremental_processing', False):
+            if self.config.filename_mode == "sequential":
+                # 連番はスキップした画像の分だけずれるため差分処理できない
+                logger.warning("[Incremental] Disabled: not supported with sequential file names")
+            else:
+                image_paths, on_result = self._filter_unchanged(image_paths, on_result, manifests)
+
+        try:
+            self._run_images(image_paths, should_continue, on_result)
+        finally:
+            for manifest in manifests.values():
+                manifest.close()
+
+    def _get_manifest(self, path: Path, manifests: Dict[Path, OutputManifest]) -> OutputManifest:
+        """出力先フォルダのマニフェスト（出力フォルダ未指定時は入力画像のフォルダ）"""
+        directory = self.output_dir or path.parent
+        with self._manifest_lock:
+            if directory not in manifests:
+                manifests[directory] = OutputManifest(directory)
+            return manifests[directory]
+
+    def _filter_unchanged(self, image_paths: List[str], on_result, manifests: Dict[Path, OutputManifest]):
+        """
+        Skip images whose manifest entry still matches and record newly processed ones
+
+        Returns:
+            (image paths to process, on_result wrapper recording successful results)
+        """
+        fingerprint = config_fingerprint(self.config)
+        pending, stats = [], {}
+        skipped = 0
+        for image_path in image_paths:
+            path = Path(image_path)
+            try:
+                stat = os.stat(path)
+                outputs = self._get_manifest(path, manifests).lookup_unchanged(path, fingerprint, stat)
+            except (OSError, ValueError) as e:
+                logger.warning(f"[Incremental] Manifest check failed for {path.name}: {e}")
+                stat, outputs = None, None
+
+            if outputs is None:
+                pending.append(image_path)
+                stats[str(image_path)] = stat
+                continue
+
+            skipped += 1
+            if on_result:
+                on_result(-1, image_path, {"input": str(path), "status": "skipped", "detections": [],
+                                           "outputs": [{"path": output} for output in outputs], "timings": {}}, None)
+
+        logger.info(f"[Incremental] {skipped} unchanged image(s) skipped, {len(pending)} to process")
+        self._emit("status", f"差分処理: 変更のない {skipped} 枚をスキップします（処理対象 {len(pending)} 枚）")
+
+        def record_result(index, image_path, summary, error):
+            if error is None and summary and summary["status"] in ("mosaic", "no_detection"):
+                path = Path(image_path)
+                try:
+                    self._get_manifest(path, manifests).record(
+                        path, fingerprint, [output["path"] for output in summary["outputs"]], stats.get(str(image_path)))
+                except (OSError, sqlite3.Error) as e:
+                    logger.warning(f"[Incremental] Failed to record {path.name} in manifest: {e}")
+            if on_result:
+                on_result(index, image_path, summary, error)
+
+        return pending, record_result
+
+    def _run_images(self, image_paths: List[str], should_continue: Callable[[], bool], on_result):
+        """run の本体（差分処理の絞り込み後の画像を処理）"""
+        total_images = len(image_paths)
+
+        if getattr(self.config, 'use_pipelined_processing', False) and total_images > 1:
+            executor = StagedExecutor(
+                self,
+                decode_workers=getattr(self.config, 'pipeline_decode_workers', 2),
+                encode_workers=getattr(self.config, 'pipeline_encode_workers', 2),
+                queue_size=getattr(self.config, 'pipeline_queue_size', 4),
+                batch_size=getattr(self.config, 'detection_batch_size', 1),
+                should_continue=should_continue,
+                memory_limit_mb=getattr(self.config, 'memory_limit_mb', 0)
+            )
+            executor.run(image_paths, on_result)
+            return
+
+        for i, image_path in enumerate(image_paths):
+            if not should_continue():
+                break
+
+            try:
+                summary = self.process_image(image_path, i + 1, total_images)
+                error = None
+            except Exception as e:
+                summary, error = None, e
+
+            if on_result:
+                on_result(i, image_path, summary, error)
+
+    def load_image(self, path: Path):
+        """
+        Decode stage: load image from disk
+
+        EXIF Orientation を適用した8bit BGR画像と、アルファチャンネル（ない場合はNone）を返す。
+
+        Returns:
+            (image, load_time, alpha)
+        """
+        load_start = time.time()
+        image, alpha = read_image_with_alpha(path)
+        if image is None:
+            raise ValueError(f"画像を読み込めませんでした: {path.name}")
+        load_time = time.time() - load_start
+        logger.info(f"[Image Load] Time: {load_time:.2f}s" + (" (with alpha)" if alpha is not None else ""))
+        return image, load_time, alpha
+
+    def load_detection_image(self, path: Path):
+        """
+        Decode stage: load image for detection
+
+        検出モデルは推論解像度（640px程度）に縮小するため、JPEGは長辺が reduced_decode_min_size
+        以上を保つ範囲で 1/2・1/4・1/8 に縮小デコードする。原寸画像はSAM・モザイク処理で
+        必要になった時点で1回だけデコードされる（未検出の画像は原寸デコードしない）。
+
+        Returns:
+            (image, load_time, full_shape, alpha) - full_shape is (height, width) of the full-resolution image,
+            alpha is the alpha channel (None for reduced decodes: only JPEG is reduced)
+        """
+        factor, size = 1, None
+        if getattr(self.config, 'use_reduced_decode', False) and not getattr(self.config, 'use_sliced_detection', False):
+            size = read_image_size(path)
+            if size is not None and not self.is_tiled((size[1], size[0])):
+                factor = reduced_decode_factor(path, size, getattr(self.config, 'reduced_decode_min_size', 1280))
+
+        if factor == 1:
+            image, load_time, alpha = self.load_image(path)
+            return image, load_time, image.shape[:2], alpha
+
+        load_start = time.time()
+        image = read_image(path, factor)
+        if image is None:
+            raise ValueError(f"画像を読み込めませんでした: {path.name}")
+        load_time = time.time() - load_start
+        logger.info(f"[Image Load] Reduced 1/{factor} decode time: {load_time:.2f}s "
+                    f"({size[0]}x{size[1]} -> {image.shape[1]}x{image.shape[0]})")
+        return image, load_time, (size[1], size[0]), None
+
+    def infer(self, path: Path, image: np.ndarray) -> Dict[str, Any]:
+        """
+        Inference stage: detection and mask generation (SAM / rectangle)
+
+        Returns:
+            Inference result with detections, masks and timings
+        """
+        return self.infer_many([path], [image])[0]
+
+    def infer_many(self, paths: List[Path], images: List[np.ndarray],
+                   full_shapes: Optional[List] = None) -> List[Dict[str, Any]]:
+        """
+        Inference stage for several images: batched detection, then per-image masks
+
+        検出キャッシュに結果がある画像は検出・SAMを実行しない。
+        縮小デコードした画像は検出結果を原寸座標に変換し、SAMが必要な場合のみ原寸画像を読み込む。
+
+        Args:
+            paths: Input image paths
+            images: Decoded images (possibly reduced, see load_detection_image)
+            full_shapes: (height, width) of the full-resolution images (default: shapes of images)
+
+        Returns:
+            Inference results in the same order as images
+        """
+        results = [None] * len(images)
+        digests = [None] * len(images)
+        full_shapes = [tuple(shape[:2]) for shape in full_shapes] if full_shapes else [image.shape[:2] for image in images]
+        full_images = [image if image.shape[:2] == full_shape else None for image, full_shape in zip(images, full_shapes)]
+
+        if self.detection_cache:
+            for i, image in enumerate(images):
+                digests[i] = image_hash(image)
+                cached = self.detection_cache.get(self.detection_cache.make_key(digests[i], self.config,
+                                                                                self.model_digest))
+                if cached is not None:
+                    logger.info(f"[Detection Cache] Hit: {paths[i].name} ({len(cached['bboxes_with_class'])} regions)")
+                    results[i] = self._infer_masks(paths[i], full_images[i], cached["bboxes_with_class"], 0.0,
+                                                   cached_masks_b=cached["masks_b"], image_shape=full_shapes[i])
+                    results[i]["cached"] = True
+
+        pending = [i for i in range(len(images)) if results[i] is None]
+        if not pending:
+            return results
+
+        # 巨大画像はタイル処理で個別に検出
+        detections = {}
+        detect_times = {}
+        for i in [i for i in pending if self.is_tiled(images[i].shape)]:
+            detect_start = time.time()
+            detections[i] = self._detect_tiled(images[i])
+            detect_times[i] = time.time() - detect_start
+            logger.info(f"[Detection] Tiled time: {detect_times[i]:.2f}s")
+
+        # Detect genital regions
+        batch = [i for i in pending if i not in detections]
+        if batch:
+            detect_start = time.time()
+            if len(batch) == 1:
+                batch_detections = [self.detector.detect(images[batch[0]], self.config.confidence, config=self.config)]
+            else:
+                batch_detections = self.detector.detect_many([images[i] for i in batch], self.config.confidence, config=self.config)
+            detect_time = time.time() - detect_start
+            if len(batch) == 1:
+                logger.info(f"[Detection] Time: {detect_time:.2f}s")
+            else:
+                logger.info(f"[Detection] Batch time: {detect_time:.2f}s ({len(batch)} images)")
+
+            # バッチ全体の検出時間を画像ごとに按分して記録
+            for i, bboxes_with_class in zip(batch, batch_detections):
+                if full_images[i] is None:
+                    bboxes_with_class = self._scale_detections(bboxes_with_class, images[i].shape[:2], full_shapes[i])
+                detections[i] = bboxes_with_class
+                detect_times[i] = detect_time / len(batch)
+
+        for i in pending:
+            bboxes_with_class = detections[i]
+            results[i] = self._infer_masks(paths[i], full_images[i], bboxes_with_class, detect_times[i],
+                                           image_digest=digests[i], image_shape=full_shapes[i])
+            if self.detection_cache:
+                self.detection_cache.put(self.detection_cache.make_key(digests[i], self.config, self.model_digest),
+                                         bboxes_with_class, results[i]["masks_b"])
+
+        return results
+
+    def _infer_masks(self, path: Path, image: Optional[np.ndarray], bboxes_with_class: List, detect_time: float,
+                     image_digest: Optional[str] = None, cached_masks_b: Optional[List[RoiMask]] = None,
+                     image_shape=None) -> Dict[str, Any]:
+        """
+        Generate SAM / rectangle masks for detected regions
+
+        Args:
+            image: Full-resolution image (None = not decoded yet, loaded here if SAM needs it)
+            image_digest: Image content hash (reused by the SAM embedding cache)
+            cached_masks_b: SAM masks from the detection cache (skips SAM)
+            image_shape: (height, width) of the full-resolution image (default: image.shape)
+        """
+        image_shape = tuple(image_shape[:2]) if image_shape is not None else image.shape[:2]
+        inference = {
+            "bboxes_with_class": bboxes_with_class,
+            "masks_b": None,
+            "bbox_masks": None,
+            "sam_results": {},
+            "timings": {"detect": round(detect_time, 3)},
+            "cached": False,
+            "image_shape": image_shape,
+            "image": None  # 推論中に原寸デコードした画像（モザイク処理で再利用）
+        }
+
+        if not bboxes_with_class:
+            return inference
+
+        # 個別拡張範囲処理を適用（矩形モードのみ）
+        original_bboxes = [(x1, y1, x2, y2) for x1, y1, x2, y2, _, _ in bboxes_with_class]
+
+        if self.config.sam_use_none:
+            # 矩形モード: 矩形段階で拡張を適用
+            if self.config.use_individual_expansion:
+                # 個別拡張範囲を適用
+                expanded_bboxes = expand_bboxes_individual(bboxes_with_class, self.config, image_shape)
+                logger.info(f"Applied individual expansion by class for rectangular mode (total: {len(expanded_bboxes)} regions)")
+            else:
+                # 通常拡張を適用
+                from auto_mosaic.src.utils import expand_bboxes
+                expanded_bboxes = expand_bboxes(original_bboxes, self.config.bbox_expansion, image_shape)
+                if self.config.bbox_expansion != 0:
+                    logger.info(f"Applied bbox expansion {self.config.bbox_expansion:+d}px for rectangular mode")
+        else:
+            # 輪郭モード: 矩形段階では拡張しない（元の検出結果をそのまま使用）
+            expanded_bboxes = original_bboxes
+            logger.info("Using original bboxes for contour mode (expansion will be applied after segmentation)")
+
+        mask_start = time.time()
+
+        if self.config.sam_use_vit_b:
+            vit_b_start = time.time()
+            if cached_masks_b is not None:
+                # 検出キャッシュのマスクを再利用
+                masks_b = cached_masks_b
+            else:
+                # 輪郭モード: 元の検出結果を使用してSAM処理
+                if image is None:
+                    # 縮小デコードで検出した画像はここで原寸デコード
+                    image, load_time, _ = self.load_image(path)
+                    inference["image"] = image
+                    inference["timings"]["load_full"] = round(load_time, 3)
+                # 巨大画像では検出領域周辺のみをSAMに入力
+                roi_crop = getattr(self.config, 'sam_roi_crop', False) or self.is_tiled(image_shape)
+                masks_b = self.segmenter_vit_b.masks(image, original_bboxes,
+                                                     roi_crop=roi_crop,
+                                                     roi_padding=getattr(self.config, 'sam_roi_padding', 0.5),
+                                                     image_digest=image_digest)
+            vit_b_time = time.time() - vit_b_start
+            inference["masks_b"] = masks_b
+            inference["sam_results"]["ViT-B"] = {"masks": len(masks_b), "time": vit_b_time}
+            logger.info(f"  [SAM ViT-B] Time: {vit_b_time:.2f}s ({len(masks_b)} masks)")
+
+        if self.config.sam_use_none:
+            none_start = time.time()
+            # Create simple rectangular masks from bounding boxes (no SAM segmentation)
+            # 矩形モード: 拡張済みの矩形を使用
+            bbox_masks = self._create_bbox_masks(image_shape, expanded_bboxes)
+            none_time = time.time() - none_start
+            inference["bbox_masks"] = bbox_masks
+            inference["sam_results"]["None"] = {"masks": len(bbox_masks), "time": none_time}
+            logger.info(f"  [BBox Only] Time: {none_time:.2f}s ({len(bbox_masks)} masks)")
+
+        inference["timings"]["mask"] = round(time.time() - mask_start, 3)
+        return inference
+
+    def render(self, path: Path, image: np.ndarray, inference: Dict[str, Any],
+               alpha: Optional[np.ndarray] = None) -> Dict[str, Any]:
+        """
+        Mosaic stage: apply mosaic for every selected type and decide output paths
+
+        連番カウンターはこのステージでのみ更新されるため、入力順に呼び出すこと。
+        alpha はモザイク処理に含めず、保存時に各出力へ再結合する（未検出時は元ファイルのコピーなので不要）。
+
+        Returns:
+            Render job with encoded outputs pending (see write_outputs)
+        """
+        bboxes_with_class = inference["bboxes_with_class"]
+        job = {
+            "path": path,
+            "outputs": [],  # [(image_array, output_path)]
+            "copies": [],  # 元ファイルをそのままコピーする出力パス（未検出時）
+            "alpha": alpha,  # 入力画像のアルファチャンネル（保存時に再結合）
+            "summary": {
+                "input": str(path),
+                "status": "mosaic",
+                "detections": [
+                    {"bbox": [int(x1), int(y1), int(x2), int(y2)], "class": class_name, "source": source}
+                    for x1, y1, x2, y2, class_name, source in bboxes_with_class
+                ],
+                "outputs": [],
+                "timings": dict(inference["timings"]),
+                "cached": inference.get("cached", False)
+            },
+            "message": ""
+        }
+        summary = job["summary"]
+        selected_types = [key for key, value in self.config.mosaic_types.items() if value]
+
+        if not bboxes_with_class:
+            # 検出されない場合は元画像をそのまま各モザイクタイプ別フォルダのNoMosaicサブフォルダに出力
+            # （再エンコードせず元ファイルを1回コピーし、他のフォルダへはハードリンク）
+            self._emit("status", f"{path.name}: No target regions detected - outputting original image to NoMosaic folders")
+
+            for mosaic_type in selected_types:
+                type_output_dir = self._get_type_output_dir(path, mosaic_type)
+
+                # NoMosaicサブフォルダを作成
+                no_mosaic_dir = type_output_dir / "NoMosaic"
+                no_mosaic_dir.mkdir(exist_ok=True)
+                logger.info(f"[DEBUG] Created NoMosaic subfolder: {no_mosaic_dir}")
+
+                original_output_path = get_custom_output_path(path, output_dir=no_mosaic_dir,
+                                                            suffix="", config=self.config,
+                                                            counter=self.sequential_counter)
+                job["copies"].append(original_output_path)
+                summary["outputs"].append({"type": mosaic_type, "mask": "none", "path": str(original_output_path)})
+                logger.info(f"[No Detection - {mosaic_type}/NoMosaic] -> {original_output_path}")
+
+            # 連番カウンターを更新（連番モードの場合）
+            if self.config.filename_mode == "sequential":
+                self.sequential_counter += 1
+
+            summary["status"] = "no_detection"
+            job["message"] = f"{path.name}: No detection - saved original image to {len(selected_types)} NoMosaic folders"
+            return job
+
+        # 縮小デコードで検出した画像は原寸画像に差し替え（推論中に読み込み済みでなければここで1回だけデコード）
+        image = self._full_resolution_image(path, image, inference, summary)
+
+        mosaic_start = time.time()
+        output_files = []
+
+        # 巨大画像はモザイク結果をディスク上のバッファに書き込む（画像全体のコピーをメモリに持たない）
+        output_factory = self._create_output_buffer if self.is_tiled(image.shape) else None
+
+        # タイプ別設定（タイルサイズ算出用: FANZA基準はブロックモザイクのみ適用）
+        tile_configs = {
+            mosaic_type: type('obj', (object,), {
+                'use_fanza_standard': self.config.use_fanza_standard if mosaic_type == "block" else False,
+                'manual_tile_size': self.config.manual_tile_size,
+                'gaussian_blur_radius': self.config.gaussian_blur_radius
+            })()
+            for mosaic_type in selected_types
+        }
+
+        masks_b = inference["masks_b"]
+        if masks_b:
+            # 輪郭マスク設定（マスク拡張・統合は全モザイクタイプで共有）
+            contour_config = type('obj', (object,), {
+                'bbox_expansion': self.config.bbox_expansion,
+                'use_individual_expansion': self.config.use_individual_expansion,
+                'individual_expansions': getattr(self.config, 'individual_expansions', {}),
+                'mode': 'contour',  # 輪郭モードを指定
+                'bboxes_with_class': bboxes_with_class  # クラス情報を追加
+            })()
+
+            # シームレス処理（輪郭ベース拡張付き）- 選択された全モザイクタイプを一括生成
+            results_b = self.mosaic_processor.apply_multi(
+                image, masks_b, selected_types,
+                feather=self.config.feather,
+                strength=1.0,  # 強度は固定値1.0を使用
+                config=contour_config,
+                type_configs=tile_configs,
+                output_factory=output_factory
+            )
+
+            for mosaic_type in selected_types:
+                # モザイクタイプ別サブフォルダに保存
+                type_output_dir = self._get_type_output_dir(path, mosaic_type)
+                output_path_b = get_custom_output_path(path, output_dir=type_output_dir,
+                                                     suffix="", config=self.config,
+                                                     counter=self.sequential_counter)
+                job["outputs"].append((results_b[mosaic_type], output_path_b))
+                output_files.append((f"輪郭マスク({mosaic_type})", output_path_b, len(masks_b)))
+                summary["outputs"].append({"type": mosaic_type, "mask": "contour", "path": str(output_path_b)})
+                logger.info(f"  [輪郭マスク-{mosaic_type}] -> {output_path_b}")
+
+            # 連番カウンターを更新（連番モードの場合）
+            if self.config.filename_mode == "sequential":
+                self.sequential_counter += 1
+
+        bbox_masks = inference["bbox_masks"]
+        if bbox_masks:
+            # 矩形マスク設定（拡張は既に適用済みなので追加拡張なし）
+            rectangle_config = type('obj', (object,), {
+                'bbox_expansion': 0,  # 拡張は既に適用済み
+                'mode': 'rectangle'  # 矩形モードを指定
+            })()
+
+            # シームレス処理（追加拡張なし）- 選択された全モザイクタイプを一括生成
+            results_none = self.mosaic_processor.apply_multi(
+                image, bbox_masks, selected_types,
+                feather=self.config.feather,
+                strength=1.0,  # 強度は固定値1.0を使用
+                config=rectangle_config,
+                type_configs=tile_configs,
+                output_factory=output_factory
+            )
+
+            for mosaic_type in selected_types:
+                # モザイクタイプ別サブフォルダに保存
+                type_output_dir = self._get_type_output_dir(path, mosaic_type)
+                output_path_none = get_custom_output_path(path, output_dir=type_output_dir,
+                                                        suffix="", config=self.config,
+                                                        counter=self.sequential_counter)
+                job["outputs"].append((results_none[mosaic_type], output_path_none))
+                output_files.append((f"矩形マスク({mosaic_type})", output_path_none, len(bbox_masks)))
+                summary["outputs"].append({"type": mosaic_type, "mask": "rectangle", "path": str(output_path_none)})
+                logger.info(f"  [矩形マスク-{mosaic_type}] -> {output_path_none}")
+
+            # 連番カウンターを更新（連番モードの場合）
+            if self.config.filename_mode == "sequential":
+                self.sequential_counter += 1
+
+        mosaic_time = time.time() - mosaic_start
+        summary["timings"]["mosaic"] = round(mosaic_time, 3)
+        logger.info(f"[Mosaic Processing] Time: {mosaic_time:.2f}s")
+
+        # マスク方式比較結果
+        sam_results = inference["sam_results"]
+        if len(sam_results) > 1:
+            vit_b_time = sam_results.get("ViT-B", {}).get("time", 0)
+            none_time = sam_results.get("None", {}).get("time", 0)
+            if vit_b_time > 0 and none_time > 0:
+                speed_ratio = vit_b_time / none_time
+                logger.info(f"[マスク方式比較] 輪郭マスク {vit_b_time:.1f}s vs 矩形マスク {none_time:.1f}s (輪郭マスクは {speed_ratio:.1f}倍時間)")
+        elif sam_results:
+            # Single method selected
+            method_name = list(sam_results.keys())[0]
+            method_time = list(sam_results.values())[0]["time"]
+            method_display = "輪郭マスク" if method_name == "ViT-B" else "矩形マスク"
+            logger.info(f"[マスク方式] {method_display} 処理時間: {method_time:.1f}s")
+
+        if not output_files:
+            summary["status"] = "mask_failed"
+            job["message"] = f"{path.name}: Mask generation failed"
+            return job
+
+        # Save visualization if requested
+        if self.config.visualize:
+            vis_image = self.detector.visualize_detections(image, bboxes_with_class)
+
+            # Detectionフォルダを各モザイクタイプと同階層に作成して保存
+            detection_output_dir = self._get_type_output_dir(path, "Detection")
+            viz_path = get_custom_output_path(path, output_dir=detection_output_dir,
+                                            suffix="_viz", config=self.config,
+                                            counter=self.sequential_counter)
+            job["outputs"].append((vis_image, viz_path))
+            summary["outputs"].append({"type": "Detection", "mask": "none", "path": str(viz_path)})
+            logger.info(f"  [Detection] -> {viz_path}")
+
+            # 連番カウンターを更新（連番モードの場合）
+            if self.config.filename_mode == "sequential":
+                self.sequential_counter += 1
+
+        # Result summary with expansion info
+        file_summary = ", ".join([f"{model}({masks} regions)" for model, _, masks in output_files])
+        expansion_suffix = f" | 範囲{self.config.bbox_expansion:+d}px" if self.config.bbox_expansion != 0 else ""
+        job["message"] = f"{path.name}: Complete - {file_summary}{expansion_suffix}"
+        return job
+
+    def get_output_writer(self, workers: Optional[int] = None) -> OutputWriter:
+        """
+        Get the output writer, creating it on first use or when the worker count changes
+
+        Args:
+            workers: Number of encode/write threads (default: config.pipeline_encode_workers)
+        """
+        workers = max(1, int(workers or getattr(self.config, 'pipeline_encode_workers', 2)))
+        if self.output_writer is None or self.output_writer.workers != workers:
+            if self.output_writer is not None:
+                self.output_writer.shutdown()
+            self.output_writer = OutputWriter(workers)
+        return self.output_writer
+
+    def flush_outputs(self):
+        """Wait until every queued output has been written"""
+        if self.output_writer is not None:
+            self.output_writer.flush()
+
+    def _full_resolution_image(self, path: Path, image: np.ndarray, inference: Dict[str, Any],
+                               summary: Dict[str, Any]) -> np.ndarray:
+        """Full-resolution image for the mosaic stage"""
+        full_image = inference.pop("image", None)
+        if full_image is not None:
+            return full_image
+        if image.shape[:2] == tuple(inference.get("image_shape", image.shape[:2])):
+            return image
+        full_image, load_time, _ = self.load_image(path)
+        summary["timings"]["load_full"] = round(load_time, 3)
+        return full_image
+
+    def write_outputs(self, job: Dict[str, Any]):
+        """Encode stage: write all rendered outputs of a job to disk (outputs are encoded in parallel)"""
+        done = threading.Event()
+        errors = []
+
+        def on_done(error):
+            if error is not None:
+                errors.append(error)
+            done.set()
+
+        self.write_outputs_async(job, on_done)
+        done.wait()
+        if errors:
+            raise errors[0]
+
+    def write_outputs_async(self, job: Dict[str, Any], on_done: Callable[[Optional[Exception]], None]):
+        """
+        Encode stage: queue all rendered outputs of a job on the output writer
+
+        Args:
+            job: Render job (see render)
+            on_done: Called with the first write error (None on success) once every output is written
+        """
+        writer = self.get_output_writer()
+        outputs, job["outputs"] = job["outputs"], []
+        copies, job["copies"] = job.get("copies", []), []
+        alpha = job.pop("alpha", None)
+        buffer_paths = [output_image.filename for output_image, _ in outputs
+                        if isinstance(output_image, np.memmap) and output_image.filename]
+        state = {"remaining": len(outputs) + (1 if copies else 0), "error": None}
+        state_lock = threading.Lock()
+        write_start = time.time()
+
+        def complete():
+            # 保存後は画像配列を解放（タイル処理の出力バッファも削除）
+            outputs.clear()
+            self._remove_output_buffers(buffer_paths)
+            write_time = time.time() - write_start
+            job["summary"]["timings"]["write"] = round(write_time, 3)
+            logger.info(f"[Image Write] Time: {write_time:.2f}s")
+            on_done(state["error"])
+
+        def output_finished(error):
+            with state_lock:
+                if error is not None and state["error"] is None:
+                    state["error"] = error
+                state["remaining"] -= 1
+                last = state["remaining"] == 0
+            if last:
+                complete()
+
+        if not state["remaining"]:
+            complete()
+            return
+
+        if copies:
+            try:
+                future = writer.submit_copy(job["path"], copies, getattr(self.config, 'no_mosaic_hardlink', True))
+                future.add_done_callback(lambda f: output_finished(f.exception()))
+            except Exception as e:
+                output_finished(e)
+
+        for output_image, output_path in outputs:
+            try:
+                future = writer.submit(output_image, output_path, get_encode_params(output_path, self.config),
+                                       alpha=alpha)
+            except Exception as e:
+                output_finished(e)
+                continue
+            future.add_done_callback(lambda f: output_finished(f.exception()))
+
+    def finish(self, job: Dict[str, Any], start_time: float, current: int, total: int) -> Dict[str, Any]:
+        """Emit completion status / progress for a job and return its summary"""
+        summary = job["summary"]
+        total_time = time.time() - start_time
+        summary["timings"]["total"] = round(total_time, 3)
+        logger.info(f"[Total Processing] Time: {total_time:.2f}s | Image: {job['path'].name}")
+
+        if summary["status"] == "mask_failed":
+            self._emit("status", job["message"])
+        else:
+            self._emit("status", f"{job['message']} - {total_time:.1f}s")
+        self._emit("progress", (current, total))
+        return summary
+
+    def is_tiled(self, image_shape) -> bool:
+        """
+        Whether an image is large enough for tiled processing
+
+        Args:
+            image_shape: Shape of the decoded image (height, width[, channels])
+        """
+        if not getattr(self.config, 'use_tiled_processing', False):
+            return False
+        min_pixels = getattr(self.config, 'tiled_min_megapixels', 60) * 1_000_000
+        return image_shape[0] * image_shape[1] >= min_pixels
+
+    def estimate_memory(self, width: int, height: int) -> int:
+        """
+        Estimate peak memory (bytes) needed to process an image of the given size
+
+        デコード画像に加えて、通常処理ではモザイク結果（出力ごとに1枚）、
+        タイル処理では作業領域分を見込む（タイル処理の出力はディスク上のバッファ）。
+        """
+        frame = width * height * 3
+        if self.is_tiled((height, width)):
+            return frame * 2
+
+        selected_types = sum(1 for value in self.config.mosaic_types.values() if value)
+        mask_modes = int(bool(self.config.sam_use_vit_b)) + int(bool(self.config.sam_use_none))
+        outputs = selected_types * max(1, mask_modes) + int(bool(self.config.visualize))
+        return frame * (1 + max(1, outputs))
+
+    def estimate_file_memory(self, path: Path) -> int:
+        """
+        Estimate processing memory of an image file from its header (without decoding)
+
+        Returns:
+            Estimated bytes (rough estimate from file size when the header cannot be read)
+        """
+        size = read_image_size(path)
+        if size is not None:
+            return self.estimate_memory(*size)
+        try:
+            return path.stat().st_size * 10
+        except OSError:
+            return 0
+
+    def _detect_tiled(self, image: np.ndarray) -> List:
+        """
+        Detect regions in a huge image using a downscaled proxy and overlapping high-res tiles
+
+        縮小画像で大きな対象を、重なりのある高解像度タイルで小さな対象を検出する
+        （detector.detect_sliced をタイル処理の設定・タイル数上限なしで使用）。
+
+        Args:
+            image: Full-resolution image
+
+        Returns:
+            Detections in full-resolution coordinates
+        """
+        return self.detector.detect_sliced(
+            image, self.config.confidence, config=self.config,
+            tile_size=getattr(self.config, 'tiled_tile_size', 2048),
+            overlap=getattr(self.config, 'tiled_tile_overlap', 256),
+            max_tiles=0,
+            full_size=getattr(self.config, 'tiled_proxy_size', 2048))
+
+    def _create_output_buffer(self, image: np.ndarray) -> np.ndarray:
+        """
+        Create a disk-backed output buffer initialized with image (tiled processing)
+
+        Returns:
+            np.memmap with the same shape and dtype as image
+        """
+        fd, buffer_path = tempfile.mkstemp(suffix=".buf", dir=get_cache_dir("output_buffers"))
+        os.close(fd)
+        buffer = np.memmap(buffer_path, dtype=image.dtype, mode='w+', shape=image.shape)
+
+        # 帯状にコピー（一時的な全体コピーを作らない）
+        band_rows = TILED_COPY_ROWS
+        for y in range(0, image.shape[0], band_rows):
+            buffer[y:y + band_rows] = image[y:y + band_rows]
+        return buffer
+
+    def _remove_output_buffers(self, buffer_paths):
+        """出力バッファのファイルを削除（使用中で削除できない場合は次回の初期化時に削除）"""
+        for buffer_path in buffer_paths:
+            try:
+                os.remove(buffer_path)
+            except OSError:
+                logger.debug(f"Output buffer not removed (in use): {buffer_path}")
+
+    def _scale_detections(self, bboxes_with_class: List, reduced_shape, full_shape) -> List:
+        """縮小画像での検出結果を原寸画像の座標に変換（拡大側に丸めて範囲を狭めない）"""
+        scale_y = full_shape[0] / reduced_shape[0]
+        scale_x = full_shape[1] / reduced_shape[1]
+        return [(int(x1 * scale_x), int(y1 * scale_y),
+                 min(full_shape[1], int(np.ceil(x2 * scale_x))), min(full_shape[0], int(np.ceil(y2 * scale_y))),
+                 class_name, source)
+                for x1, y1, x2, y2, class_name, source in bboxes_with_class]
+
+    def _create_bbox_masks(self, image_shape, bboxes: List) -> List[RoiMask]:
+        """
+        Create simple rectangular masks from bounding boxes (no SAM segmentation)
+
+        Args:
+            image_shape: (height, width) of the full-resolution image
+            bboxes: List of bounding boxes (x1, y1, x2, y2)
+
+        Returns:
+            List of ROI-local binary masks for each bounding box
+        """
+        # 画像全体サイズのマスクは確保せず、矩形範囲のみを保持
+        masks = [RoiMask.from_bbox(bbox, image_shape[:2]) for bbox in bboxes]
+
+        logger.debug(f"Created {len(masks)} rectangular masks from bounding boxes")
+        return masks
+
+
+class MemoryBudget:
+    """
+    Admission control by the estimated memory of images in flight
+
+    推定メモリの合計が上限を超える場合は、処理中の画像が完了するまで次の画像の投入を待機する。
+    処理中の画像がない場合は上限を超える画像も1枚だけ受け付ける（停止しないため）。
+    """
+
+    def __init__(self, limit_bytes: int):
+        """
+        Args:
+            limit_bytes: Maximum total estimated memory (0 or less = unlimited)
+        """
+        self.limit = int(limit_bytes)
+        self.in_use = 0
+        self._condition = threading.Condition()
+
+    def acquire(self, amount: int, should_continue: Optional[Callable[[], bool]] = None) -> bool:
+        """
+        Reserve memory, blocking while the budget is exhausted
+
+        Returns:
+            False when should_continue returned False while waiting
+        """
+        with self._condition:
+            while self.limit > 0 and self.in_use > 0 and self.in_use + amount > self.limit:
+                if should_continue and not should_continue():
+                    return False
+                self._condition.wait(timeout=0.5)
+            self.in_use += amount
+            return True
+
+    def release(self, amount: int):
+        """Return reserved memory"""
+        with self._condition:
+            self.in_use -= amount
+            self._condition.notify_all()
+
+
+class StagedExecutor:
+    """
+    Multi-stage executor overlapping decode, inference, mosaic and encode
+
+    デコード（スレッドプール）→ 推論（検出 + SAM）→ モザイク → エンコード・保存（スレッドプール）
+    の各ステージを上限付きキューで接続し、推論中にI/Oを並行実行する。
+    キューが満杯になると上流ステージが待機するため（バックプレッシャー）、
+    メモリ上に保持される画像数は queue_size 程度に抑えられる。
+    さらに画像サイズから推定したメモリの合計が memory_limit_mb を超えないよう、
+    デコード前（ヘッダーから推定）に入力順で投入を制限する。
+    """
+
+    _SENTINEL = object()
+
+    def __init__(self, pipeline: ImagePipeline, decode_workers: int = 2, encode_workers: int = 2,
+                 queue_size: int = 4, batch_size: int = 1, should_continue: Optional[Callable[[], bool]] = None,
+                 memory_limit_mb: int = 0):
+        """
+        Initialize staged executor
+
+        Args:
+            pipeline: ImagePipeline providing the stage implementations
+            decode_workers: Number of decode threads
+            encode_workers: Number of encode/write threads
+            queue_size: Maximum number of images waiting between stages
+            batch_size: Number of images passed to the detector at once
+            should_continue: Returns False when processing should stop (e.g. GUI stop button)
+            memory_limit_mb: Maximum estimated memory of images in flight (0 = unlimited)
+        """
+        self.pipeline = pipeline
+        self.decode_workers = max(1, int(decode_workers))
+        self.encode_workers = max(1, int(encode_workers))
+        self.queue_size = max(1, int(queue_size))
+        self.batch_size = max(1, int(batch_size))
+        self.should_continue = should_continue or (lambda: True)
+        self.memory_limit_mb = max(0, int(memory_limit_mb))
+        self._result_lock = threading.Lock()
+
+    def run(self, image_paths: List[str],
+            on_result: Optional[Callable[[int, str, Optional[Dict[str, Any]], Optional[Exception]], None]] = None):
+        """
+        Process images through all stages and block until every submitted image is written
+
+        Args:
+            image_paths: Input image paths
+            on_result: Called with (index, path, summary, error) for every processed image
+        """
+        total = len(image_paths)
+        decoded_queue = queue.Queue(maxsize=self.queue_size)
+        inferred_queue = queue.Queue(maxsize=self.queue_size)
+        write_slots = threading.BoundedSemaphore(self.queue_size)
+        budget = MemoryBudget(self.memory_limit_mb * 1024 * 1024)
+        reserved = {}
+        reserved_lock = threading.Lock()
+        # 停止要求またはステージの異常終了時にセットし、全ステージを終了させる
+        stop_event = threading.Event()
+
+        def running():
+            return not stop_event.is_set() and self.should_continue()
+
+        def release_memory(index):
+            """画像の処理完了（成功・失敗・中断）時に予約したメモリを返却"""
+            with reserved_lock:
+                amount = reserved.pop(index, 0)
+            budget.release(amount)
+
+        def report(index, image_path, summary, error):
+            release_memory(index)
+            if on_result:
+                with self._result_lock:
+                    on_result(index, image_path, summary, error)
+
+        def decode(path: Path):
+            return self.pipeline.load_detection_image(path)
+
+        def drain(stage_queue):
+            """終了マーカーまでキューを読み捨てる（上流ステージの put での待機を解除）"""
+            while True:
+                item = stage_queue.get()
+                if item is self._SENTINEL:
+                    return
+                if stage_queue is decoded_queue:
+                    item[4].cancel()
+                release_memory(item[0])
+
+        decode_pool = ThreadPoolExecutor(max_workers=self.decode_workers, thread_name_prefix="decode")
+        self.pipeline.get_output_writer(self.encode_workers)
+
+        def feed():
+            """入力順にデコードを投入（キューが満杯の間は待機）"""
+            try:
+                for i, image_path in enumerate(image_paths):
+                    if not running():
+                        break
+                    path = Path(image_path)
+
+                    # 推定メモリの予約（上限に達している間は処理中の画像の完了を待つ）
+                    amount = self.pipeline.estimate_file_memory(path)
+                    if not budget.acquire(amount, running):
+                        break
+                    with reserved_lock:
+                        reserved[i] = amount
+
+                    future = decode_pool.submit(decode, path)
+                    decoded_queue.put((i, image_path, path, time.time(), future))
+            except BaseException:
+                stop_event.set()
+                raise
+            finally:
+                decoded_queue.put(self._SENTINEL)
+
+        def inference_stage():
+            """検出とマスク生成（モデルはこのスレッドのみが使用）"""
+            finished = False
+            try:
+                while not finished:
+                    # デコード済みの画像を検出バッチサイズ分まとめる
+                    # (2枚目以降は待たない: メモリ予算で先読みが止まっていても部分バッチで進める)
+                    batch = []
+                    while len(batch) < self.batch_size:
+                        if batch:
+                            try:
+                                item = decoded_queue.get_nowait()
+                            except queue.Empty:
+                                break
+                        else:
+                            item = decoded_queue.get()
+                        if item is self._SENTINEL:
+                            finished = True
+                            break
+                        i, image_path, path, start_time, future = item
+                        if not running():
+                            future.cancel()
+                            release_memory(i)
+                            continue
+
+                        self.pipeline._emit("status", f"処理中: {path.name}")
+                        self.pipeline._emit("progress", (i, total))
+                        try:
+                            image, load_time, full_shape, alpha = future.result()
+                        except Exception as e:
+                            report(i, image_path, None, e)
+                            continue
+                        batch.append((i, image_path, path, start_time, load_time, image, full_shape, alpha))
+
+                    if not batch:
+                        continue
+                    try:
+                        inferences = self.pipeline.infer_many([item[2] for item in batch], [item[5] for item in batch],
+                                                              [item[6] for item in batch])
+                    except Exception as e:
+                        for i, image_path, *_ in batch:
+                            report(i, image_path, None, e)
+                        continue
+                    for item, inference in zip(batch, inferences):
+                        inferred_queue.put((*item[:6], item[7], inference))
+            except BaseException:
+                stop_event.set()
+                if not finished:
+                    drain(decoded_queue)
+                raise
+            finally:
+                inferred_queue.put(self._SENTINEL)
+
+        def write_job(i, image_path, start_time, job):
+            def on_written(error):
+                try:
+                    if error is not None:
+                        raise error
+                    summary = self.pipeline.finish(job, start_time, i + 1, total)
+                    report(i, image_path, summary, None)
+                except Exception as e:
+                    report(i, image_path, None, e)
+                finally:
+                    write_slots.release()
+
+            try:
+                self.pipeline.write_outputs_async(job, on_written)
+            except Exception:
+                write_slots.release()
+                raise
+
+        def mosaic_stage():
+            """
+            モザイク処理（連番カウンターのため入力順に処理）
+
+            Returns:
+                True when the end marker of inferred_queue has been read
+            """
+            while True:
+                item = inferred_queue.get()
+                if item is self._SENTINEL:
+                    return True
+                i, image_path, path, start_time, load_time, image, alpha, inference = item
+                if not running():
+                    release_memory(i)
+                    continue
+                try:
+                    job = self.pipeline.render(path, image, inference, alpha)
+                    job["summary"]["timings"]["load"] = round(load_time, 3)
+                    # 保存待ちの画像数を制限
+                    write_slots.acquire()
+                    write_job(i, image_path, start_time, job)
+                except Exception as e:
+                    report(i, image_path, None, e)
+
+        feeder = threading.Thread(target=feed, name="pipeline-feeder", daemon=True)
+        inference_thread = threading.Thread(target=inference_stage, name="pipeline-inference", daemon=True)
+
+        run_start = time.time()
+        feeder.start()
+        inference_thread.start()
+        drained = False
+        try:
+            drained = mosaic_stage()
+        finally:
+            if not drained:
+                # 例外・中断（KeyboardInterrupt 等）で抜けた場合は上流を停止し、
+                # 推論スレッドが put で待機したままにならないよう終了マーカーまで読み捨てる
+                stop_event.set()
+                drain(inferred_queue)
+            inference_thread.join()
+            feeder.join()
+            decode_pool.shutdown(wait=True)
+            # 停止時も投入済みの保存処理は完了させる（完了通知まで待つため保存枠をすべて回収）
+            self.pipeline.flush_outputs()
+            for _ in range(self.queue_size):
+                write_slots.acquire()
+
+        logger.info(f"[Pipelined Processing] {total} images in {time.time() - run_start:.2f}s "
+                    f"(decode workers: {self.decode_workers}, encode workers: {self.encode_workers}, "
+                    f"queue: {self.queue_size}, detection batch: {self.batch_size}, "
+                    f"memory limit: {self.memory_limit_mb}MB)")
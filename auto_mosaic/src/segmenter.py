@@ -14,24 +14,32 @@ except ImportError:
     sam_model_registry = None
     SamPredictor = None
 
-from auto_mosaic.src.utils import logger, BBox, get_recommended_device
+from auto_mosaic.src.utils import logger, BBox, get_recommended_device, RoiMask
 from auto_mosaic.src.downloader import downloader
+from auto_mosaic.src.model_registry import model_registry
 
 class GenitalSegmenter:
     """SAM-based segmenter for precise genital region masks"""
     
-    def __init__(self, model_type: str = "vit_h", device: str = "auto"):
+    # 1回のデコーダー呼び出しで処理するボックス数の上限（アップサンプル後のマスクのメモリ制限）
+    MAX_BOXES_PER_BATCH = 16
+    
+    def __init__(self, model_type: str = "vit_h", device: str = "auto", embedding_cache=None):
         """
         Initialize SAM segmenter
         
         Args:
             model_type: "vit_h" for high accuracy or "vit_b" for lightweight
             device: Device for inference ('cpu', 'cuda', or 'auto')
+            embedding_cache: Optional EmbeddingCache to reuse image embeddings across runs
         """
         self.predictor = None
         self.model_type = model_type
         self.device_mode = device
         self.device = get_recommended_device(device)
+        self.embedding_cache = embedding_cache
+        self.model_path = None
+        self.model_digest = ""  # SAMチェックポイントの識別子（キャッシュキー用）
         self._load_model()
     
     def _get_device_info(self) -> str:
@@ -60,10 +68,13 @@ class GenitalSegmenter:
                 raise RuntimeError(f"Failed to download SAM {model_desc} model")
         
         model_path = downloader.get_model_path(model_name)
+        self.model_path = model_path
+        from auto_mosaic.src.cache import model_file_digest
+        self.model_digest = model_file_digest([model_path])
         logger.info(f"Loading SAM {self.model_type.upper()} model from {model_path}")
         logger.info(self._get_device_info())
         
-        try:
+        def loader():
             # Force PyTorch to not use weights_only mode for SAM model loading
             import os
             original_pytorch_weights_only = os.environ.get("PYTORCH_WEIGHTS_ONLY", None)
@@ -79,6 +90,11 @@ class GenitalSegmenter:
                 else:
                     os.environ["PYTORCH_WEIGHTS_ONLY"] = original_pytorch_weights_only
             
+            return sam
+        
+        try:
+            # 読み込み済みのSAMモデルはレジストリから再利用
+            sam = model_registry.get(model_name, model_path, self.device, loader)
             self.predictor = SamPredictor(sam)
             model_desc = "ViT-H (high accuracy, 2.4GB)" if self.model_type == "vit_h" else "ViT-B (lightweight, 358MB)"
             logger.info(f"Successfully loaded SAM {model_desc} model on {self.device}")
@@ -87,16 +103,22 @@ class GenitalSegmenter:
             logger.error(f"Failed to load SAM model: {str(e)}")
             raise
     
-    def set_image(self, image: np.ndarray):
+    def set_image(self, image: np.ndarray, cache_key: Optional[str] = None):
         """
         Set image for segmentation (preprocessing step)
         
         Args:
             image: Input image in BGR format (OpenCV)
+            cache_key: Embedding cache key (None = do not use cache)
         """
         if self.predictor is None:
             raise RuntimeError("SAM model not loaded")
         
+        # キャッシュ済みの埋め込みがあればエンコーダーを実行しない
+        if cache_key and self.embedding_cache and self._restore_embedding(cache_key):
+            logger.debug("Image embedding restored from cache")
+            return
+        
         # Convert BGR to RGB for SAM
         rgb_image = image[:, :, ::-1]  # BGR to RGB
         
@@ -106,17 +128,47 @@ class GenitalSegmenter:
         except Exception as e:
             logger.error(f"Failed to set image for SAM: {str(e)}")
             raise
+        
+        if cache_key and self.embedding_cache:
+            self.embedding_cache.put(
+                cache_key,
+                self.predictor.features.detach().cpu().numpy(),
+                self.predictor.original_size,
+                self.predictor.input_size
+            )
+    
+    def _restore_embedding(self, cache_key: str) -> bool:
+        """キャッシュから埋め込みを復元して predictor を set_image 済みの状態にする"""
+        entry = self.embedding_cache.get(cache_key)
+        if entry is None:
+            return False
+        
+        try:
+            self.predictor.reset_image()
+            self.predictor.features = torch.from_numpy(entry["features"]).to(self.predictor.device)
+            self.predictor.original_size = entry["original_size"]
+            self.predictor.input_size = entry["input_size"]
+            self.predictor.is_image_set = True
+            return True
+        except Exception as e:
+            logger.warning(f"Failed to restore cached embedding: {str(e)}")
+            self.predictor.reset_image()
+            return False
     
-    def masks(self, image: np.ndarray, boxes: List[BBox]) -> List[np.ndarray]:
+    def masks(self, image: np.ndarray, boxes: List[BBox], roi_crop: bool = False,
+              roi_padding: float = 0.5, image_digest: Optional[str] = None) -> List[RoiMask]:
         """
         Generate masks for bounding boxes using SAM
         
         Args:
             image: Input image in BGR format
             boxes: List of bounding boxes (x1, y1, x2, y2)
+            roi_crop: Encode only padded clusters of nearby boxes instead of the whole image
+            roi_padding: Padding around each box relative to its longer side (ROI crop mode)
+            image_digest: Precomputed content hash of image (embedding cache key)
             
         Returns:
-            List of binary masks (uint8, 255=foreground, 0=background)
+            List of RoiMask (uint8, 255=foreground, 0=background)
         """
         if not boxes:
             logger.debug("No bounding boxes provided")
@@ -127,12 +179,146 @@ class GenitalSegmenter:
         
         total_start = time.time()
         
+        # 埋め込みキャッシュ用に画像内容のハッシュを計算（切り出し領域ごとのキーに使用）
+        if self.embedding_cache:
+            if image_digest is None:
+                from auto_mosaic.src.cache import image_hash
+                image_digest = image_hash(image)
+            hits_before = self.embedding_cache.hits
+        
+        if roi_crop:
+            masks = self._masks_roi_crop(image, boxes, roi_padding, image_digest)
+        else:
+            masks = self._masks_for_image(image, boxes, image_digest=image_digest)
+        
+        
+        total_time = time.time() - total_start
+        
+        cache_info = ""
+        if self.embedding_cache:
+            cache_info = f", embedding cache hits: {self.embedding_cache.hits - hits_before}"
+        logger.info(f"[SAM Total] Processing time: {total_time:.2f}s{cache_info}")
+        logger.info(f"Generated {len(masks)} masks from {len(boxes)} bounding boxes")
+        return masks
+    
+    def _masks_for_image(self, image: np.ndarray, boxes: List[BBox], image_digest: Optional[str] = None,
+                         crop: Optional[Tuple[int, int, int, int]] = None) -> List[RoiMask]:
+        """
+        Run set_image once and decode masks for all boxes (RoiMask in the coordinates of image)
+        
+        Args:
+            image: Image (or crop) passed to the encoder
+            boxes: Boxes in the coordinates of image
+            image_digest: Content hash of the full image (enables embedding cache)
+            crop: (x1, y1, x2, y2) of image within the full image (None = full image)
+        """
+        cache_key = None
+        if image_digest and self.embedding_cache:
+            from auto_mosaic.src.cache import EmbeddingCache
+            crop = crop or (0, 0, image.shape[1], image.shape[0])
+            cache_key = EmbeddingCache.make_key(image_digest, self.model_type, crop, self.model_digest)
+        
         # Set image for SAM
         set_image_start = time.time()
-        self.set_image(image)
+        self.set_image(image, cache_key=cache_key)
         set_image_time = time.time() - set_image_start
-        logger.info(f"  [SAM Image Setup] Time: {set_image_time:.2f}s")
+        logger.info(f"  [SAM Image Setup] Time: {set_image_time:.2f}s ({image.shape[1]}x{image.shape[0]})")
+        
+        # 全ボックスをまとめてマスクデコーダーに渡す（失敗時は1ボックスずつ処理）
+        batch_start = time.time()
+        try:
+            masks = self._generate_masks_batched(boxes)
+            batch_time = time.time() - batch_start
+            logger.info(f"  [Mask Batch Generation] Time: {batch_time:.2f}s ({len(boxes)} boxes)")
+        except Exception as e:
+            logger.warning(f"Batched SAM prediction failed, falling back to per-box prediction: {str(e)}")
+            masks, avg_mask_time = self._generate_masks_per_box(boxes)
+            logger.info(f"  [Mask Generation] avg mask time: {avg_mask_time:.2f}s")
+        
+        return masks
+    
+    def _masks_roi_crop(self, image: np.ndarray, boxes: List[BBox], roi_padding: float,
+                        image_digest: Optional[str] = None) -> List:
+        """
+        Generate masks by encoding only padded clusters of nearby boxes
+        
+        近接するボックスをクラスタ化し、余白付きの切り出し領域ごとに set_image を実行して
+        生成したマスクを切り出し位置付きの RoiMask として返す。切り出し領域の合計が画像全体と同程度の
+        場合は通常モードと同じく画像全体を使用する。
+        """
+        from auto_mosaic.src.utils import cluster_boxes
+        
+        height, width = image.shape[:2]
+        clusters = cluster_boxes(boxes, roi_padding, (height, width))
+        crop_area = sum((x2 - x1) * (y2 - y1) for (x1, y1, x2, y2), _ in clusters)
+        if crop_area >= height * width * 0.8:
+            logger.info("  [SAM ROI Crop] Clusters cover most of the image - using full image")
+            return self._masks_for_image(image, boxes, image_digest=image_digest)
+        
+        logger.info(f"  [SAM ROI Crop] {len(boxes)} boxes in {len(clusters)} region(s) "
+                    f"({crop_area / (height * width) * 100:.1f}% of image)")
+        
+        masks_by_index = {}
+        for (cx1, cy1, cx2, cy2), indices in clusters:
+            crop = image[cy1:cy2, cx1:cx2]
+            local_boxes = []
+            for index in indices:
+                x1, y1, x2, y2 = boxes[index]
+                local_boxes.append((x1 - cx1, y1 - cy1, x2 - cx1, y2 - cy1))
+            
+            local_masks = self._masks_for_image(crop, local_boxes, image_digest=image_digest,
+                                                crop=(cx1, cy1, cx2, cy2))
+            if len(local_masks) != len(indices):
+                # 個別処理フォールバックで欠けたマスクがある場合は対応が取れないため画像全体で再処理
+                logger.warning("  [SAM ROI Crop] Mask count mismatch - using full image")
+                return self._masks_for_image(image, boxes, image_digest=image_digest)
+            
+            for index, roi in zip(indices, local_masks):
+                # 切り出し領域内の RoiMask に元画像座標のオフセットを付与
+                masks_by_index[index] = RoiMask(roi.x + cx1, roi.y + cy1, roi.mask, (height, width))
+        
+        return [masks_by_index[index] for index in range(len(boxes))]
+    
+    def _generate_masks_batched(self, boxes: List[BBox]) -> List[RoiMask]:
+        """
+        Generate masks for all bounding boxes with batched decoder calls
         
+        set_image 済みの画像埋め込みに対して、変換済みボックスを predict_torch に
+        まとめて渡す（MAX_BOXES_PER_BATCH 件ずつ）。デコーダー出力（画像全体サイズ）は
+        バッチごとにマスクの存在範囲へ切り出し、次のバッチの前に破棄する。
+        
+        Args:
+            boxes: List of bounding boxes (x1, y1, x2, y2)
+            
+        Returns:
+            List of RoiMask (uint8, 255=foreground, 0=background) in box order
+        """
+        masks = []
+        input_boxes = torch.as_tensor(np.array(boxes, dtype=np.float32), device=self.predictor.device)
+        transformed_boxes = self.predictor.transform.apply_boxes_torch(input_boxes, self.predictor.original_size)
+        
+        with torch.no_grad():
+            for start in range(0, len(boxes), self.MAX_BOXES_PER_BATCH):
+                batch_masks, _, _ = self.predictor.predict_torch(
+                    point_coords=None,
+                    point_labels=None,
+                    boxes=transformed_boxes[start:start + self.MAX_BOXES_PER_BATCH],
+                    multimask_output=False  # Single mask output
+                )
+                # (B, 1, H, W) bool → マスクごとに存在範囲のみ uint8 (255/0) で保持
+                batch_masks = batch_masks[:, 0].cpu().numpy()
+                masks.extend(RoiMask.from_full(mask) for mask in batch_masks)
+                del batch_masks
+        
+        return masks
+    
+    def _generate_masks_per_box(self, boxes: List[BBox]) -> Tuple[List[RoiMask], float]:
+        """
+        Generate masks one bounding box at a time (fallback)
+        
+        Returns:
+            (masks, average mask time)
+        """
         masks = []
         mask_times = []
         
@@ -144,7 +330,7 @@ class GenitalSegmenter:
                 mask_times.append(mask_time)
                 
                 if mask is not None:
-                    masks.append(mask)
+                    masks.append(RoiMask.from_full(mask))
                     logger.info(f"  [Mask {i+1} Generation] Time: {mask_time:.2f}s")
                 else:
                     logger.warning(f"Failed to generate mask for bbox {i+1}")
@@ -153,12 +339,8 @@ class GenitalSegmenter:
                 logger.error(f"Error generating mask for bbox {i+1}: {str(e)}")
                 continue
         
-        total_time = time.time() - total_start
         avg_mask_time = sum(mask_times) / len(mask_times) if mask_times else 0
-        
-        logger.info(f"[SAM Total] Processing time: {total_time:.2f}s (avg mask time: {avg_mask_time:.2f}s)")
-        logger.info(f"Generated {len(masks)} masks from {len(boxes)} bounding boxes")
-        return masks
+        return masks, avg_mask_time
     
     def _generate_mask_for_bbox(self, bbox: BBox) -> Optional[np.ndarray]:
         """
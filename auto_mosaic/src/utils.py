@@ -77,6 +77,12 @@ class ProcessingConfig:
         # SAM segmentation options
         self.sam_use_vit_b = True      # Lightweight SAM model
         self.sam_use_none = False      # No SAM segmentation (bounding box only)
+        self.sam_roi_crop = False      # 検出領域周辺のみをSAMに入力（小さい領域の精度向上・高速化）
+        self.sam_roi_padding = 0.5     # ROI切り出し時の余白（ボックス長辺に対する比率）
+        self.use_embedding_cache = False       # SAM画像埋め込みをディスクにキャッシュ（再処理時にエンコーダーを省略）
+        self.embedding_cache_size_mb = 1024    # 埋め込みキャッシュの最大サイズ（MB）
+        self.use_detection_cache = False       # 検出結果・SAMマスクをキャッシュ（モザイク設定のみ変更時に推論を省略）
+        self.detection_cache_size_mb = 512     # 検出キャッシュの最大サイズ（MB）
         
         # Mosaic processing mode
         self.use_seamless = True       # Use seamless processing (recommended)
@@ -127,6 +133,53 @@ class ProcessingConfig:
         self.use_custom_models = False          # カスタムモデルを使用するかどうか
         self.custom_models = {}                 # カスタムモデル設定 {"name": {"path": "", "enabled": True, "class_mapping": {}}}
         self.custom_model_class_mappings = {}   # カスタムモデルのクラスマッピング
+        
+        # 統合検出設定（"all"モデル1回の推論で選択部位をまとめて検出）
+        self.use_fused_all_model = False        # allモデルがカバーしない部位のみ個別モデルを使用
+        
+        # 重複検出の除去設定（複数モデル・検出器の重なった検出をSAM前に1つにまとめる）
+        self.detection_nms_iou = 0.5            # 重複とみなすIoU
+        self.detection_merge_mode = "fuse"      # "fuse"（残すボックスを重複との外接矩形に拡大）, "nms"（重複を除去）
+        self.detection_cross_class_merge = False  # 異なる部位・汎用クラス（"all"）間の重複もまとめる（クラス別拡張の対象が変わる）
+        
+        # カスケード検出設定（軽量ゲートで陽性の画像のみ部位別モデルを実行）
+        self.use_cascade_detection = False      # カスケード検出を使用するかどうか
+        self.cascade_gate = "all"               # ゲート: "all"（allモデル・低解像度）, "nudenet"（実写専用モデル）
+        self.cascade_gate_imgsz = 320           # allモデルゲートの推論解像度
+        self.cascade_gate_confidence = 0.15     # ゲートの信頼度閾値（見逃し防止のため低め）
+        
+        # パイプライン処理設定（デコード・推論・モザイク・保存を並行実行）
+        self.use_pipelined_processing = False   # ステージ並行処理を使用するかどうか（無効時は1枚ずつ順番に処理）
+        self.pipeline_decode_workers = 2        # デコードスレッド数
+        self.pipeline_encode_workers = 2        # エンコード・保存スレッド数
+        self.pipeline_queue_size = 4            # ステージ間キューの上限（バックプレッシャー）
+        self.detection_batch_size = 4           # YOLO検出で1回に推論する画像数
+        self.memory_limit_mb = 8192             # 並行処理中の画像の推定メモリ合計の上限（MB）
+        self.use_incremental_processing = False # 出力マニフェストと一致する（変更のない）画像をスキップ
+        
+        # 縮小デコード設定（JPEGは検出用に縮小デコードし、原寸画像は検出された画像のみデコード）
+        self.use_reduced_decode = False         # 縮小デコードを使用するかどうか（検出結果が原寸デコード時と変わりうるため既定は無効）
+        self.reduced_decode_min_size = 1280     # 縮小デコード後の長辺の下限（px）
+        
+        # 出力エンコード設定（形式ごとの圧縮・品質。エンコードは pipeline_encode_workers スレッドで並行実行）
+        self.png_compression = None             # PNG圧縮レベル（0-9、大きいほど小さく低速。None で OpenCV 既定の高速設定）
+        self.jpeg_quality = 95                  # JPEG品質（0-100）
+        self.webp_quality = 101                 # WebP品質（1-100、101以上はロスレス）
+        self.no_mosaic_hardlink = True          # 未検出画像のコピーを2つ目以降のNoMosaicフォルダへハードリンク
+        
+        # タイル処理設定（印刷解像度などの巨大画像をメモリ上限内で処理）
+        self.use_tiled_processing = False       # 巨大画像でタイル処理を使用するかどうか（検出結果が変わるため任意）
+        self.tiled_min_megapixels = 60          # タイル処理に切り替える画素数（メガピクセル）
+        self.tiled_proxy_size = 2048            # 全体検出用の縮小画像の長辺（px）
+        self.tiled_tile_size = 2048             # 高解像度検出タイルのサイズ（px）
+        self.tiled_tile_overlap = 256           # タイル間の重なり（px）
+        
+        # スライス検出設定（大きな画像を重なりのあるタイルに分けて小さな部位を検出）
+        self.use_sliced_detection = False       # スライス検出を使用するかどうか
+        self.sliced_min_size = 2048             # スライス検出を行う画像の長辺（px）
+        self.sliced_tile_size = 1024            # タイルの最小サイズ（px）
+        self.sliced_tile_overlap = 192          # タイル間の重なり（px）
+        self.sliced_max_tiles = 16              # 1画像あたりのタイル数上限（超える場合はタイルを拡大）
 
 
 class 自動モザエセLogger:
@@ -647,6 +700,307 @@ def expand_bboxes(bboxes: List[BBox], expansion: int, image_shape: Tuple[int, in
     logger.debug(f"Expanded {len(bboxes)} bounding boxes by {expansion}px")
     return expanded_bboxes
 
+def cluster_boxes(bboxes: List[BBox], padding_ratio: float, image_shape: Tuple[int, int],
+                  min_padding: int = 32) -> List[Tuple[BBox, List[int]]]:
+    """
+    Group nearby bounding boxes into padded regions of interest
+    
+    各ボックスを max(min_padding, padding_ratio × 長辺) だけ広げ、
+    重なり合う領域を1つのクラスタに統合する。
+    
+    Args:
+        bboxes: List of bounding boxes
+        padding_ratio: Padding relative to the longer side of each box
+        image_shape: (height, width) of the image
+        min_padding: Minimum padding in pixels
+        
+    Returns:
+        List of (padded cluster bbox, indices of member boxes), clipped to the image
+    """
+    height, width = image_shape[:2]
+    clusters = []
+    for index, (x1, y1, x2, y2) in enumerate(bboxes):
+        pad = max(min_padding, int(padding_ratio * max(x2 - x1, y2 - y1)))
+        clusters.append(([max(0, x1 - pad), max(0, y1 - pad), min(width, x2 + pad), min(height, y2 + pad)], [index]))
+    
+    # 重なりがなくなるまでクラスタを統合
+    merged = True
+    while merged:
+        merged = False
+        for i in range(len(clusters)):
+            for j in range(i + 1, len(clusters)):
+                a, b = clusters[i][0], clusters[j][0]
+                if a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]:
+                    union = [min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3])]
+                    clusters[i] = (union, clusters[i][1] + clusters[j][1])
+                    del clusters[j]
+                    merged = True
+                    break
+            if merged:
+                break
+    
+    return [(tuple(rect), sorted(indices)) for rect, indices in clusters]
+
+def generate_tiles(image_shape: Tuple[int, int], tile_size: int, overlap: int) -> List[BBox]:
+    """
+    Split an image into overlapping tiles covering it completely
+
+    タイルは均等な間隔で配置し、最後のタイルは画像端に揃える（端の細いタイルを作らない）。
+
+    Args:
+        image_shape: (height, width) of the image
+        tile_size: Tile width/height in pixels
+        overlap: Minimum overlap between neighbouring tiles in pixels
+
+    Returns:
+        List of tile rectangles (x1, y1, x2, y2)
+    """
+    height, width = image_shape[:2]
+    tile_size = max(1, int(tile_size))
+    overlap = max(0, min(int(overlap), tile_size - 1))
+
+    def starts(length: int) -> List[int]:
+        if length <= tile_size:
+            return [0]
+        count = math.ceil((length - overlap) / (tile_size - overlap))
+        step = (length - tile_size) / (count - 1)
+        return [int(round(i * step)) for i in range(count)]
+
+    return [(x, y, min(width, x + tile_size), min(height, y + tile_size))
+            for y in starts(height) for x in starts(width)]
+
+def bbox_overlap_matrix(boxes_a: np.ndarray, boxes_b: np.ndarray, metric: str = "iou") -> np.ndarray:
+    """
+    Pairwise overlap of two sets of boxes
+
+    Args:
+        boxes_a: (N, 4) array of (x1, y1, x2, y2)
+        boxes_b: (M, 4) array of (x1, y1, x2, y2)
+        metric: "iou" (intersection over union) or "ios" (intersection over the smaller box)
+
+    Returns:
+        (N, M) float array
+    """
+    boxes_a = np.asarray(boxes_a, dtype=np.float64).reshape(-1, 4)
+    boxes_b = np.asarray(boxes_b, dtype=np.float64).reshape(-1, 4)
+
+    inter_w = np.clip(np.minimum(boxes_a[:, None, 2], boxes_b[None, :, 2]) -
+                      np.maximum(boxes_a[:, None, 0], boxes_b[None, :, 0]), 0, None)
+    inter_h = np.clip(np.minimum(boxes_a[:, None, 3], boxes_b[None, :, 3]) -
+                      np.maximum(boxes_a[:, None, 1], boxes_b[None, :, 1]), 0, None)
+    intersection = inter_w * inter_h
+
+    area_a = (boxes_a[:, 2] - boxes_a[:, 0]) * (boxes_a[:, 3] - boxes_a[:, 1])
+    area_b = (boxes_b[:, 2] - boxes_b[:, 0]) * (boxes_b[:, 3] - boxes_b[:, 1])
+    if metric == "ios":
+        denominator = np.minimum(area_a[:, None], area_b[None, :])
+    else:
+        denominator = area_a[:, None] + area_b[None, :] - intersection
+
+    return np.divide(intersection, denominator, out=np.zeros_like(intersection), where=denominator > 0)
+
+def merge_overlapping_bboxes(bboxes_with_class: List[BBoxWithClass], threshold: float = 0.5,
+                             metric: str = "ios") -> List[BBoxWithClass]:
+    """
+    Merge same-class boxes that overlap into their union
+
+    タイル分割検出で同じ対象がタイルごとに（一部が切れた状態で）重複検出された場合に、
+    1つの外接矩形にまとめる。モザイク範囲が狭くならないよう抑制ではなく和集合を取る。
+
+    Args:
+        bboxes_with_class: Detections (x1, y1, x2, y2, class_name, source)
+        threshold: Overlap at or above which two boxes are merged
+        metric: Overlap metric (see bbox_overlap_matrix)
+
+    Returns:
+        Merged detections (source of the first box in each group is kept)
+    """
+    if len(bboxes_with_class) < 2:
+        return list(bboxes_with_class)
+
+    merged = []
+    class_names = sorted({bbox[4] for bbox in bboxes_with_class})
+    for class_name in class_names:
+        members = [bbox for bbox in bboxes_with_class if bbox[4] == class_name]
+        boxes = np.array([bbox[:4] for bbox in members], dtype=np.float64)
+        adjacency = bbox_overlap_matrix(boxes, boxes, metric) >= threshold
+
+        # 重なりグラフの連結成分ごとに和集合を取る
+        group = -np.ones(len(members), dtype=np.int64)
+        for start in range(len(members)):
+            if group[start] >= 0:
+                continue
+            group[start] = start
+            stack = [start]
+            while stack:
+                current = stack.pop()
+                for neighbor in np.flatnonzero(adjacency[current] & (group < 0)):
+                    group[neighbor] = start
+                    stack.append(neighbor)
+
+        for root in np.unique(group):
+            indices = np.flatnonzero(group == root)
+            x1, y1 = boxes[indices, 0].min(), boxes[indices, 1].min()
+            x2, y2 = boxes[indices, 2].max(), boxes[indices, 3].max()
+            merged.append((int(x1), int(y1), int(x2), int(y2), class_name, members[indices[0]][5]))
+
+    return merged
+
+# 全部位を対象とする汎用クラス（cross_class 時は部位別クラスを優先して残す）
+GENERIC_CLASS_NAMES = {"all"}
+
+def suppress_duplicate_bboxes(bboxes_with_class: List[BBoxWithClass], threshold: float = 0.5,
+                              mode: str = "fuse", cross_class: bool = False) -> List[BBoxWithClass]:
+    """
+    Remove duplicate detections with class-aware greedy NMS
+
+    ボックスに信頼度を持たないため、入力順（先に検出したモデル・検出器）を優先度とする。
+    デフォルトでは同じ部位同士の重複のみ除去し、各検出のクラス（クラス別拡張設定の対象）は変わらない。
+    cross_class では汎用クラス（"all"）と部位クラス・異なる部位同士の重複も除去し、部位クラスを残す。
+    重なり行列は一度だけ計算し、抑制はボックス単位のベクトル演算で行う。
+    デフォルトの "fuse" は残すボックスを重複との外接矩形に広げ、モザイク範囲を縮小しない
+    （merge_overlapping_bboxes と同じ方針）。
+
+    Args:
+        bboxes_with_class: Detections (x1, y1, x2, y2, class_name, source) in priority order
+        threshold: IoU above which a lower-priority box is a duplicate
+        mode: "fuse" (replace kept box by the union with its duplicates) or "nms" (drop duplicates)
+        cross_class: Also treat overlapping boxes of different classes as duplicates
+
+    Returns:
+        Kept detections in input order
+    """
+    if len(bboxes_with_class) < 2:
+        return list(bboxes_with_class)
+
+    boxes = np.array([bbox[:4] for bbox in bboxes_with_class], dtype=np.float64)
+    class_names = np.array([bbox[4] for bbox in bboxes_with_class], dtype=object)
+    generic = np.array([name in GENERIC_CLASS_NAMES for name in class_names])
+
+    overlap = bbox_overlap_matrix(boxes, boxes, "iou") > threshold
+    if not cross_class:
+        overlap &= class_names[:, None] == class_names[None, :]
+
+    # 部位クラスを汎用クラスより優先（同じ種類の中では入力順）
+    order = np.argsort(generic, kind="stable")
+    suppressed = np.zeros(len(boxes), dtype=bool)
+    kept = {}
+    for index in order:
+        if suppressed[index]:
+            continue
+        duplicates = overlap[index] & ~suppressed
+        suppressed |= duplicates
+        suppressed[index] = True
+
+        bbox = bboxes_with_class[index]
+        if mode == "fuse" and duplicates.any():
+            members = boxes[duplicates | (np.arange(len(boxes)) == index)]
+            x1, y1 = members[:, 0].min(), members[:, 1].min()
+            x2, y2 = members[:, 2].max(), members[:, 3].max()
+            bbox = (int(x1), int(y1), int(x2), int(y2), bbox[4], bbox[5])
+        kept[index] = bbox
+
+    return [kept[index] for index in sorted(kept)]
+
+
+class RoiMask:
+    """
+    Binary mask stored as a crop of the full image (offset + cropped mask)
+
+    画像全体サイズのマスクを検出ごとに確保しないよう、マスクの存在範囲だけを保持する。
+    範囲外は常に0（モザイクなし）として扱う。
+    """
+
+    __slots__ = ("x", "y", "mask", "image_shape")
+
+    def __init__(self, x: int, y: int, mask: np.ndarray, image_shape: Tuple[int, int]):
+        """
+        Args:
+            x: Left edge of the crop in image coordinates
+            y: Top edge of the crop in image coordinates
+            mask: Cropped mask (uint8 0/255 or float32 0.0-1.0)
+            image_shape: (height, width) of the full image
+        """
+        self.x = int(x)
+        self.y = int(y)
+        self.mask = mask
+        self.image_shape = (int(image_shape[0]), int(image_shape[1]))
+
+    @property
+    def bbox(self) -> BBox:
+        """Crop rectangle (x1, y1, x2, y2) in image coordinates"""
+        height, width = self.mask.shape[:2]
+        return (self.x, self.y, self.x + width, self.y + height)
+
+    @property
+    def is_empty(self) -> bool:
+        return self.mask.size == 0
+
+    @classmethod
+    def from_full(cls, mask: np.ndarray) -> "RoiMask":
+        """
+        Crop a full-frame mask to the bounding rectangle of its non-zero pixels
+
+        Args:
+            mask: Full-frame mask (bool, uint8 or float32)
+
+        Returns:
+            RoiMask (empty crop when the mask has no foreground)
+        """
+        if mask.dtype == np.bool_:
+            # 画像全体を変換せず、切り出し範囲のみ uint8 に変換
+            x, y, w, h = cv2.boundingRect(mask.view(np.uint8))
+            return cls(x, y, mask[y:y + h, x:x + w].astype(np.uint8) * 255, mask.shape[:2])
+        x, y, w, h = cv2.boundingRect((mask > 0).astype(np.uint8))
+        return cls(x, y, mask[y:y + h, x:x + w].copy(), mask.shape[:2])
+
+    @classmethod
+    def from_bbox(cls, bbox: BBox, image_shape: Tuple[int, int]) -> "RoiMask":
+        """
+        Create a filled rectangular mask
+
+        Args:
+            bbox: (x1, y1, x2, y2) rectangle (clipped to the image)
+            image_shape: (height, width) of the full image
+        """
+        height, width = image_shape[:2]
+        x1, y1 = max(0, int(bbox[0])), max(0, int(bbox[1]))
+        x2, y2 = max(x1, min(width, int(bbox[2]))), max(y1, min(height, int(bbox[3])))
+        return cls(x1, y1, np.full((y2 - y1, x2 - x1), 255, dtype=np.uint8), image_shape)
+
+    def padded(self, pad: int) -> "RoiMask":
+        """
+        Grow the crop by pad pixels on each side (clipped to the image, filled with 0)
+        """
+        x1, y1, x2, y2 = self.bbox
+        height, width = self.image_shape
+        nx1, ny1 = max(0, x1 - pad), max(0, y1 - pad)
+        nx2, ny2 = min(width, x2 + pad), min(height, y2 + pad)
+        grown = np.zeros((ny2 - ny1, nx2 - nx1), dtype=self.mask.dtype)
+        grown[y1 - ny1:y2 - ny1, x1 - nx1:x2 - nx1] = self.mask
+        return RoiMask(nx1, ny1, grown, self.image_shape)
+
+    def to_full(self) -> np.ndarray:
+        """Paste the crop into a full-frame mask"""
+        full = np.zeros(self.image_shape, dtype=self.mask.dtype)
+        x1, y1, x2, y2 = self.bbox
+        full[y1:y2, x1:x2] = self.mask
+        return full
+
+    def copy(self) -> "RoiMask":
+        return RoiMask(self.x, self.y, self.mask.copy(), self.image_shape)
+
+    def __repr__(self) -> str:
+        return f"RoiMask(bbox={self.bbox}, image_shape={self.image_shape})"
+
+MaskLike = Union[np.ndarray, RoiMask]
+
+def to_roi_mask(mask: MaskLike) -> RoiMask:
+    """Convert a full-frame mask to RoiMask (RoiMask is returned as is)"""
+    if isinstance(mask, RoiMask):
+        return mask
+    return RoiMask.from_full(mask)
+
 def get_mask_centroid(mask: np.ndarray) -> Tuple[int, int]:
     """
     Calculate centroid (center of mass) of a binary mask
@@ -675,54 +1029,100 @@ def get_mask_centroid(mask: np.ndarray) -> Tuple[int, int]:
     
     return center_x, center_y
 
-def expand_mask_radial(mask: np.ndarray, expansion: int) -> np.ndarray:
+# この拡張量（px）以下は円形カーネルのモルフォロジー演算、超える場合は距離変換で処理
+MORPH_EXPANSION_LIMIT = 20
+
+def expand_mask_radial(mask: MaskLike, expansion: int) -> MaskLike:
     """
-    Expand mask radially from its centroid using efficient morphological operations
+    Expand mask radially (circular dilation / erosion)
+    
+    大きな拡張量では、円形カーネルの膨張・収縮と同等の結果を
+    しきい値処理した距離変換で求める（計算量が拡張量に依存しない）。
     
     Args:
-        mask: Binary mask to expand (0/255)
+        mask: Binary mask to expand (0/255, full-frame or RoiMask)
         expansion: Pixels to expand radially (positive) or contract (negative)
         
     Returns:
-        Expanded mask
+        Expanded mask (same representation as the input)
     """
     if expansion == 0:
         return mask.copy()
     
+    if isinstance(mask, RoiMask):
+        if mask.is_empty:
+            return mask.copy()
+        # 切り出し範囲を拡張量だけ広げてから処理（範囲外は0なので収縮も全体処理と一致する）
+        padded = mask.padded(abs(expansion) + 1)
+        return RoiMask(padded.x, padded.y, expand_mask_radial(padded.mask, expansion), padded.image_shape)
+    
     # Convert to binary if needed
     if mask.max() > 1:
         binary_mask = (mask > 127).astype(np.uint8) * 255
     else:
         binary_mask = mask.astype(np.uint8) * 255
     
-    # Get centroid of the original mask
-    center_x, center_y = get_mask_centroid(binary_mask)
-    
-    if expansion > 0:
-        # Expansion using morphological dilation with circular kernel
-        kernel_size = expansion * 2 + 1
-        kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (kernel_size, kernel_size))
-        expanded_mask = cv2.dilate(binary_mask, kernel, iterations=1)
-        
-        logger.debug(f"Radially expanded mask by {expansion}px using circular kernel from centroid ({center_x}, {center_y})")
-        
+    amount = abs(expansion)
+    if amount <= MORPH_EXPANSION_LIMIT:
+        # 小さい拡張量: 円形カーネルのモルフォロジー演算の方が高速
+        kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (amount * 2 + 1, amount * 2 + 1))
+        if expansion > 0:
+            expanded_mask = cv2.dilate(binary_mask, kernel, iterations=1)
+        else:
+            expanded_mask = cv2.erode(binary_mask, kernel, iterations=1)
+    elif expansion > 0:
+        # 膨張: マスク外の各画素からマスクまでの距離が expansion 以下の画素を追加
+        distance = cv2.distanceTransform(cv2.bitwise_not(binary_mask), cv2.DIST_L2, cv2.DIST_MASK_PRECISE)
+        expanded_mask = cv2.compare(distance, float(amount), cv2.CMP_LE)
     else:
-        # Contraction using morphological erosion with circular kernel
-        erosion_amount = abs(expansion)
-        kernel_size = erosion_amount * 2 + 1
-        kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (kernel_size, kernel_size))
-        expanded_mask = cv2.erode(binary_mask, kernel, iterations=1)
-        
-        logger.debug(f"Radially contracted mask by {erosion_amount}px using circular kernel from centroid ({center_x}, {center_y})")
+        # 収縮: マスク内の各画素から背景までの距離が収縮量を超える画素のみ残す
+        # （画像端は背景として扱わない: erode と同じ）
+        distance = cv2.distanceTransform(binary_mask, cv2.DIST_L2, cv2.DIST_MASK_PRECISE)
+        expanded_mask = cv2.compare(distance, float(amount), cv2.CMP_GT)
+    
+    logger.debug(f"Radially {'expanded' if expansion > 0 else 'contracted'} mask by {amount}px")
     
     return expanded_mask
 
-def expand_masks_radial(masks: List[np.ndarray], expansion: int) -> List[np.ndarray]:
+def _expand_roi_masks_together(masks: List[RoiMask], expansion: int) -> List[RoiMask]:
     """
-    Expand multiple masks radially from their respective centroids
+    Expand RoiMasks with one distance transform per group of nearby masks
+    
+    膨張は和集合に対して1回行っても個別に行った結果の和集合と一致するため、
+    拡張後の範囲が重なるマスクをまとめて1枚のマスクとして処理する。
+    
+    Args:
+        masks: Non-empty RoiMasks of the same image
+        expansion: Positive expansion in pixels
+        
+    Returns:
+        One expanded RoiMask per group
+    """
+    image_shape = masks[0].image_shape
+    clusters = cluster_boxes([mask.bbox for mask in masks], 0.0, image_shape, min_padding=expansion + 1)
+    
+    expanded_masks = []
+    for (cx1, cy1, cx2, cy2), indices in clusters:
+        canvas = np.zeros((cy2 - cy1, cx2 - cx1), dtype=np.uint8)
+        for index in indices:
+            mask = masks[index]
+            x1, y1, x2, y2 = mask.bbox
+            binary = (mask.mask > (127 if mask.mask.max() > 1 else 0)).astype(np.uint8) * 255
+            target = canvas[y1 - cy1:y2 - cy1, x1 - cx1:x2 - cx1]
+            np.maximum(target, binary, out=target)
+        expanded_masks.append(RoiMask(cx1, cy1, expand_mask_radial(canvas, expansion), image_shape))
+    
+    return expanded_masks
+
+def expand_masks_radial(masks: List[MaskLike], expansion: int) -> List[MaskLike]:
+    """
+    Expand multiple masks radially
+    
+    RoiMask を膨張する場合は、拡張後に重なるマスクを1つにまとめて処理する
+    （返されるマスク数は入力より少なくなることがある）。
     
     Args:
-        masks: List of binary masks to expand
+        masks: List of binary masks to expand (full-frame or RoiMask)
         expansion: Pixels to expand radially (positive) or contract (negative)
         
     Returns:
@@ -731,6 +1131,17 @@ def expand_masks_radial(masks: List[np.ndarray], expansion: int) -> List[np.ndar
     if expansion == 0:
         return [mask.copy() for mask in masks]
     
+    if expansion > 0 and masks and all(isinstance(mask, RoiMask) for mask in masks):
+        non_empty = [mask for mask in masks if not mask.is_empty]
+        if not non_empty:
+            return [mask.copy() for mask in masks]
+        try:
+            expanded_masks = _expand_roi_masks_together(non_empty, expansion)
+            logger.info(f"Radially expanded {len(masks)} masks by {expansion}px ({len(expanded_masks)} groups)")
+            return expanded_masks
+        except Exception as e:
+            logger.warning(f"Grouped mask expansion failed: {str(e)}, expanding masks individually")
+    
     expanded_masks = []
     for i, mask in enumerate(masks):
         try:
@@ -922,12 +1333,15 @@ def expand_bboxes_individual(bboxes_with_class: List[BBoxWithClass], config, ima
     
     return expanded_bboxes
 
-def expand_masks_radial_individual(masks: List[np.ndarray], bboxes_with_class: List[BBoxWithClass], config) -> List[np.ndarray]:
+def expand_masks_radial_individual(masks: List[MaskLike], bboxes_with_class: List[BBoxWithClass], config) -> List[MaskLike]:
     """
     Expand multiple masks radially with individual expansion values per class
     
+    同じ拡張値のマスクはまとめて expand_masks_radial で処理する
+    （返されるマスクの順序・数は入力と一致しないことがある）。
+    
     Args:
-        masks: List of binary masks to expand
+        masks: List of binary masks to expand (full-frame or RoiMask)
         bboxes_with_class: List of bounding boxes with class information (same order as masks)
         config: ProcessingConfig with individual expansion settings
         
@@ -942,26 +1356,19 @@ def expand_masks_radial_individual(masks: List[np.ndarray], bboxes_with_class: L
         logger.warning(f"Mask count ({len(masks)}) doesn't match bbox count ({len(bboxes_with_class)}), using unified expansion")
         return expand_masks_radial(masks, config.bbox_expansion)
     
+    # クラス名に対応する個別拡張値ごとにマスクをまとめる
+    groups = {}
+    for mask, bbox_with_class in zip(masks, bboxes_with_class):
+        class_name = bbox_with_class[4]  # (x1, y1, x2, y2, class_name, source)
+        expansion = config.individual_expansions.get(class_name, config.bbox_expansion)
+        groups.setdefault(expansion, []).append(mask)
+    
     expanded_masks = []
-    for i, (mask, bbox_with_class) in enumerate(zip(masks, bboxes_with_class)):
-        try:
-            # クラス名を取得
-            class_name = bbox_with_class[4]  # (x1, y1, x2, y2, class_name, source)
-            
-            # クラス名に対応する個別拡張値を取得
-            expansion = config.individual_expansions.get(class_name, config.bbox_expansion)
-            
-            # マスクを個別に拡張
-            expanded_mask = expand_mask_radial(mask, expansion)
-            expanded_masks.append(expanded_mask)
-            
-            logger.debug(f"Expanded {class_name} mask {i+1} by {expansion}px radially")
-            
-        except Exception as e:
-            logger.warning(f"Failed to expand mask {i+1}: {str(e)}, using original")
-            expanded_masks.append(mask.copy())
+    for expansion, group_masks in groups.items():
+        expanded_masks.extend(expand_masks_radial(group_masks, expansion))
+        logger.debug(f"Expanded {len(group_masks)} masks by {expansion}px radially")
     
-    logger.info(f"Applied individual radial expansion to {len(masks)} contour masks")
+    logger.info(f"Applied individual radial expansion to {len(masks)} contour masks ({len(groups)} expansion values)")
     return expanded_masks
 
 def is_developer_mode() -> bool:
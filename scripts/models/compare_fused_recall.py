@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+統合検出モード（allモデル1回の推論）と部位別モデルの検出結果を比較するスクリプト
+
+部位別モデルの検出結果を基準として、統合モードの部位ごとの再現率（recall）と
+1枚あたりの検出時間を集計する。プロファイルごとに use_fused_all_model を
+有効にするかどうかの判断材料として使用する。
+
+使用方法:
+    python scripts/models/compare_fused_recall.py --input DIR [--parts penis anus] [--json report.json]
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+project_root = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(project_root))
+
+DEFAULT_PARTS = ["penis", "labia_minora", "testicles", "anus"]
+
+
+def _iou(box1, box2) -> float:
+    """2つの矩形のIoUを計算"""
+    x1 = max(box1[0], box2[0])
+    y1 = max(box1[1], box2[1])
+    x2 = min(box1[2], box2[2])
+    y2 = min(box1[3], box2[3])
+    if x2 <= x1 or y2 <= y1:
+        return 0.0
+    inter = (x2 - x1) * (y2 - y1)
+    area1 = (box1[2] - box1[0]) * (box1[3] - box1[1])
+    area2 = (box2[2] - box2[0]) * (box2[3] - box2[1])
+    union = area1 + area2 - inter
+    return inter / union if union > 0 else 0.0
+
+
+def _match_count(reference, candidates, iou_threshold: float) -> int:
+    """基準ボックスのうち候補ボックスと一致（IoU >= 閾値）したものの数"""
+    unused = list(candidates)
+    matched = 0
+    for ref in reference:
+        best_index, best_iou = -1, iou_threshold
+        for index, cand in enumerate(unused):
+            iou = _iou(ref, cand)
+            if iou >= best_iou:
+                best_index, best_iou = index, iou
+        if best_index >= 0:
+            unused.pop(best_index)
+            matched += 1
+    return matched
+
+
+def _create_detector(parts, fused: bool, device: str, confidence: float):
+    """比較用の検出器を作成（実写専用モデルは使用しない）"""
+    from auto_mosaic.src.utils import ProcessingConfig
+    from auto_mosaic.src.detector import MultiModelDetector
+
+    config = ProcessingConfig()
+    config.confidence = confidence
+    config.device_mode = device
+    config.use_nudenet = False
+    config.use_anime_detector = True
+    config.detector_mode = "anime_only"
+    config.use_fused_all_model = fused
+    config.selected_models = {key: key in parts for key in config.selected_models}
+    return MultiModelDetector(config=config, device=device), config
+
+
+def _run(detector, config, images):
+    """全画像を検出して (結果リスト, 1枚あたりの平均時間) を返す"""
+    results = []
+    start = time.time()
+    for image in images:
+        bboxes = detector.detect(image, config.confidence, config=config)
+        grouped = {}
+        for x1, y1, x2, y2, class_name, _ in bboxes:
+            grouped.setdefault(class_name, []).append((x1, y1, x2, y2))
+        results.append(grouped)
+    elapsed = time.time() - start
+    return results, elapsed / max(1, len(images))
+
+
+def compare_fused_recall(input_dir: Path, parts, iou_threshold: float, confidence: float,
+                         device: str, limit: int = 0) -> dict:
+    """
+    Compare fused single-pass detection against per-part models
+
+    Args:
+        input_dir: Folder with evaluation images (searched recursively)
+        parts: Part model keys to compare
+        iou_threshold: IoU required to count a per-part detection as recalled
+        confidence: Detection confidence threshold
+        device: Device for inference ("auto", "cpu", "gpu")
+        limit: Maximum number of images (0 = all)
+
+    Returns:
+        Report dictionary with per-part recall and timings
+    """
+    import cv2
+    from auto_mosaic.src.pipeline import collect_image_paths
+
+    image_paths = collect_image_paths(input_dir)
+    if limit:
+        image_paths = image_paths[:limit]
+
+    images = []
+    for path in image_paths:
+        image = cv2.imread(str(path))
+        if image is not None:
+            images.append(image)
+    if not images:
+        raise RuntimeError(f"評価用の画像が見つかりません: {input_dir}")
+
+    print(f"📂 評価画像: {len(images)} 枚")
+
+    per_part_detector, per_part_config = _create_detector(parts, fused=False, device=device, confidence=confidence)
+    per_part_results, per_part_time = _run(per_part_detector, per_part_config, images)
+    del per_part_detector
+
+    fused_detector, fused_config = _create_detector(parts, fused=True, device=device, confidence=confidence)
+    if fused_detector.fused_class_map is None:
+        raise RuntimeError("allモデルを読み込めないため統合モードを評価できません")
+    covered_parts = sorted(set(fused_detector.fused_class_map.values()))
+    fused_results, fused_time = _run(fused_detector, fused_config, images)
+
+    report = {
+        "images": len(images),
+        "iou_threshold": iou_threshold,
+        "confidence": confidence,
+        "covered_parts": covered_parts,
+        "time_per_image": {"per_part": round(per_part_time, 4), "fused": round(fused_time, 4)},
+        "parts": {}
+    }
+
+    for part in parts:
+        reference_total = matched_total = fused_total = 0
+        for reference, fused in zip(per_part_results, fused_results):
+            reference_boxes = reference.get(part, [])
+            fused_boxes = fused.get(part, [])
+            reference_total += len(reference_boxes)
+            fused_total += len(fused_boxes)
+            matched_total += _match_count(reference_boxes, fused_boxes, iou_threshold)
+
+        report["parts"][part] = {
+            "fused": part in covered_parts,
+            "per_part_detections": reference_total,
+            "fused_detections": fused_total,
+            "matched": matched_total,
+            "recall": round(matched_total / reference_total, 4) if reference_total else None
+        }
+
+    return report
+
+
+def print_report(report: dict):
+    """比較結果を表形式で表示"""
+    print("\n=== 統合モード 再現率レポート ===")
+    print(f"画像数: {report['images']} | IoU閾値: {report['iou_threshold']} | 信頼度: {report['confidence']}")
+    print(f"{'部位':<16}{'統合':<6}{'部位別':>8}{'統合':>8}{'一致':>8}{'再現率':>10}")
+    for part, stats in report["parts"].items():
+        recall = f"{stats['recall'] * 100:.1f}%" if stats["recall"] is not None else "-"
+        mode = "all" if stats["fused"] else "個別"
+        print(f"{part:<16}{mode:<6}{stats['per_part_detections']:>8}{stats['fused_detections']:>8}"
+              f"{stats['matched']:>8}{recall:>10}")
+
+    times = report["time_per_image"]
+    speedup = times["per_part"] / times["fused"] if times["fused"] > 0 else 0
+    print(f"\n検出時間/枚: 部位別 {times['per_part']:.3f}s → 統合 {times['fused']:.3f}s ({speedup:.1f}倍)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="統合検出モード（allモデル）の再現率を部位別モデルと比較します")
+    parser.add_argument("--input", required=True, help="評価用画像フォルダ")
+    parser.add_argument("--parts", nargs="+", default=DEFAULT_PARTS, help="比較する部位モデル")
+    parser.add_argument("--iou", type=float, default=0.5, help="一致とみなすIoU閾値 (default: 0.5)")
+    parser.add_argument("--confidence", type=float, default=0.25, help="検出信頼度 (default: 0.25)")
+    parser.add_argument("--device", choices=["auto", "cpu", "gpu"], default="auto", help="推論デバイス")
+    parser.add_argument("--limit", type=int, default=0, help="評価する最大画像数 (0 = 全て)")
+    parser.add_argument("--json", help="レポートをJSONで保存するパス")
+    args = parser.parse_args()
+
+    report = compare_fused_recall(Path(args.input), args.parts, args.iou, args.confidence, args.device, args.limit)
+    print_report(report)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"📄 レポートを保存しました: {args.json}")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        print("\n\n👋 ユーザーによって中断されました。")
+    except Exception as e:
+        print(f"\n❌ エラー: {e}")
+        sys.exit(1)
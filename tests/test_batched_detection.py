@@ -0,0 +1,39 @@
+"""イラスト専用モデルのバッチ検出のテスト"""
+
+from auto_mosaic.src.detector import MultiModelDetector
+from auto_mosaic.src.utils import ProcessingConfig
+
+
+class _FailingModel:
+    """"bad" を含むバッチで例外を送出するモデル（結果は画像名をそのまま返す）"""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, images, conf, verbose):
+        batch = images if isinstance(images, list) else [images]
+        self.calls.append(list(batch))
+        if "bad" in batch:
+            raise RuntimeError("corrupt input")
+        return list(batch)
+
+
+def test_failed_batch_only_loses_the_failing_image(monkeypatch):
+    config = ProcessingConfig()
+    config.detection_batch_size = 2
+    model = _FailingModel()
+
+    detector = MultiModelDetector.__new__(MultiModelDetector)
+    detector.config = config
+    detector.models = {"penis": model}
+    monkeypatch.setattr(detector, "_get_active_models", lambda cfg: [("penis", model)])
+    monkeypatch.setattr(detector, "_parse_model_result",
+                        lambda key, result, cfg: [(0, 0, 10, 10, key, result)])
+    monkeypatch.setattr(detector, "_suppress_duplicates", lambda bboxes, cfg: bboxes)
+
+    images = ["a", "b", "c", "bad", "e", "f"]
+    results = detector._detect_anime_many(images, 0.25, config)
+
+    assert [[bbox[5] for bbox in bboxes] for bboxes in results] == [["a"], ["b"], ["c"], [], ["e"], ["f"]]
+    # 失敗したバッチのみ1枚ずつ再実行
+    assert model.calls == [["a", "b"], ["c", "bad"], ["c"], ["bad"], ["e", "f"]]
@@ -0,0 +1,51 @@
+"""検出ボックスの重複除去のテスト"""
+
+from auto_mosaic.src.utils import ProcessingConfig, expand_bboxes_individual, suppress_duplicate_bboxes
+
+
+def _covers(outer, inner):
+    return outer[0] <= inner[0] and outer[1] <= inner[1] and outer[2] >= inner[2] and outer[3] >= inner[3]
+
+
+def _suppress_with_config(bboxes, config):
+    return suppress_duplicate_bboxes(bboxes, config.detection_nms_iou, config.detection_merge_mode,
+                                     config.detection_cross_class_merge)
+
+
+def test_default_config_fuses_same_class_duplicates():
+    config = ProcessingConfig()
+    bboxes = [(10, 10, 60, 60, "anus", "anime"), (12, 8, 64, 58, "anus", "nudenet")]
+
+    kept = _suppress_with_config(bboxes, config)
+
+    assert kept == [(10, 8, 64, 60, "anus", "anime")]
+    assert all(any(_covers(box, original) for box in kept) for original in bboxes)
+
+
+def test_default_config_keeps_cross_class_boxes_and_their_expansion():
+    config = ProcessingConfig()
+    config.use_individual_expansion = True
+    config.individual_expansions = {"penis": 20, "testicles": -5}
+    bboxes = [(100, 100, 200, 200, "penis", "anime"), (105, 105, 205, 205, "testicles", "nudenet"),
+              (98, 98, 202, 202, "all", "anime")]
+
+    kept = _suppress_with_config(bboxes, config)
+
+    assert kept == bboxes
+    assert (expand_bboxes_individual(kept, config, (400, 400))
+            == expand_bboxes_individual(bboxes, config, (400, 400)))
+
+
+def test_cross_class_merge_preserves_union_area():
+    bboxes = [(0, 0, 100, 100, "penis", "anime"), (5, 5, 105, 105, "all", "anime")]
+
+    kept = suppress_duplicate_bboxes(bboxes, threshold=0.5, cross_class=True)
+
+    assert kept == [(0, 0, 105, 105, "penis", "anime")]
+    assert all(any(_covers(box, original) for box in kept) for original in bboxes)
+
+
+def test_nms_mode_drops_duplicates():
+    bboxes = [(0, 0, 100, 100, "penis", "anime"), (5, 5, 105, 105, "penis", "nudenet")]
+
+    assert suppress_duplicate_bboxes(bboxes, 0.5, "nms") == [(0, 0, 100, 100, "penis", "anime")]
@@ -0,0 +1,27 @@
+"""キャッシュキーのテスト"""
+
+import os
+
+from auto_mosaic.src.cache import DetectionCache, EmbeddingCache, model_file_digest
+from auto_mosaic.src.utils import ProcessingConfig
+
+
+def test_model_file_digest_changes_when_model_is_replaced(tmp_path):
+    model = tmp_path / "penis.pt"
+    model.write_bytes(b"old weights")
+    before = model_file_digest([model])
+
+    model.write_bytes(b"new weights!")
+    os.utime(model, ns=(0, 10 ** 9))
+
+    assert before
+    assert model_file_digest([model]) != before
+    assert model_file_digest([tmp_path / "missing.pt"]) == ""
+
+
+def test_cache_keys_include_model_identity():
+    config = ProcessingConfig()
+
+    assert DetectionCache.make_key("img", config, "a") != DetectionCache.make_key("img", config, "b")
+    assert (EmbeddingCache.make_key("img", "vit_b", (0, 0, 10, 10), "a")
+            != EmbeddingCache.make_key("img", "vit_b", (0, 0, 10, 10), "b"))
@@ -0,0 +1,55 @@
+"""統合モード（"all"モデル1回の推論）のクラス対応付けのテスト"""
+
+from pathlib import Path
+
+from auto_mosaic.src.detector import MultiModelDetector, build_fused_class_map
+from auto_mosaic.src.downloader import downloader
+from auto_mosaic.src.utils import ProcessingConfig
+
+
+class _FakeModel:
+    def __init__(self, names):
+        self.names = names
+
+
+def _make_detector(tmp_path, monkeypatch, model_names):
+    model_file = tmp_path / "all.pt"
+    model_file.write_bytes(b"")
+    monkeypatch.setattr(downloader, "get_model_path", lambda *args: Path(model_file))
+
+    config = ProcessingConfig()
+    config.selected_models = {key: False for key in config.selected_models}
+    config.selected_models["penis"] = True
+    config.selected_models["anus"] = True
+
+    detector = MultiModelDetector.__new__(MultiModelDetector)
+    detector.config = config
+    detector.models = {}
+    detector.fused_class_map = None
+    monkeypatch.setattr(detector, "_load_yolo_model", lambda path: _FakeModel(model_names))
+    return detector
+
+
+def test_build_fused_class_map_aliases():
+    class_map = build_fused_class_map({0: "Dick", 1: "face", 2: "anus"}, ["penis", "anus", "nipples"])
+    assert class_map == {0: "penis", 2: "anus"}
+
+
+def test_fused_model_covers_parts(tmp_path, monkeypatch):
+    detector = _make_detector(tmp_path, monkeypatch, {0: "penis", 1: "anus"})
+
+    fused_parts = detector._load_fused_all_model(["penis", "anus"])
+
+    assert fused_parts == {"penis", "anus"}
+    assert detector.fused_class_map == {0: "penis", 1: "anus"}
+    assert "all" in detector.models
+
+
+def test_fused_model_without_matching_classes_is_not_fused(tmp_path, monkeypatch):
+    detector = _make_detector(tmp_path, monkeypatch, {0: "face", 1: "hand"})
+
+    fused_parts = detector._load_fused_all_model(["penis", "anus"])
+
+    assert fused_parts == set()
+    assert detector.fused_class_map is None
+    assert "all" not in detector.models
@@ -0,0 +1,73 @@
+"""画像入出力（非ASCIIパス・アルファチャンネル・EXIF Orientation）のテスト"""
+
+import struct
+import zlib
+
+import cv2
+import numpy as np
+
+from auto_mosaic.src.image_io import (
+    apply_orientation,
+    exif_orientation,
+    get_encode_params,
+    read_image_with_alpha,
+    write_image,
+)
+from auto_mosaic.src.utils import ProcessingConfig
+
+
+def _bgra(height=30, width=50):
+    return np.random.default_rng(0).integers(1, 255, (height, width, 4), dtype=np.uint8)
+
+
+def _png_with_orientation(image, orientation):
+    """IHDRの直後に Orientation を含む eXIf チャンクを挿入したPNG"""
+    exif = b"MM\x00*" + struct.pack(">IH", 8, 1) + struct.pack(">HHIHH", 0x0112, 3, 1, orientation, 0) + b"\0" * 4
+    chunk = struct.pack(">I", len(exif)) + b"eXIf" + exif + struct.pack(">I", zlib.crc32(b"eXIf" + exif))
+    data = cv2.imencode(".png", image)[1].tobytes()
+    return data[:33] + chunk + data[33:]
+
+
+def test_alpha_round_trip_with_non_ascii_path(tmp_path):
+    image = _bgra()
+    source = tmp_path / "入力" / "透過.png"
+    source.parent.mkdir()
+    write_image(source, image)
+
+    bgr, alpha = read_image_with_alpha(source)
+    assert bgr.shape == (30, 50, 3)
+    assert (alpha == image[:, :, 3]).all()
+
+    output = tmp_path / "入力" / "出力.png"
+    write_image(output, bgr, alpha=alpha)
+    assert (cv2.imdecode(np.fromfile(str(output), dtype=np.uint8), cv2.IMREAD_UNCHANGED) == image).all()
+
+
+def test_alpha_is_dropped_for_jpeg(tmp_path):
+    image = _bgra()
+    output = tmp_path / "出力.jpg"
+    write_image(output, image[:, :, :3], alpha=image[:, :, 3])
+
+    assert cv2.imdecode(np.fromfile(str(output), dtype=np.uint8), cv2.IMREAD_UNCHANGED).shape == (30, 50, 3)
+
+
+def test_png_exif_orientation_is_applied_once(tmp_path):
+    image = _bgra()
+    for orientation in range(1, 9):
+        data = _png_with_orientation(image, orientation)
+        path = tmp_path / f"{orientation}.png"
+        path.write_bytes(data)
+
+        assert exif_orientation(np.frombuffer(data, dtype=np.uint8)) == orientation
+        bgr, alpha = read_image_with_alpha(path)
+        expected = apply_orientation(image, orientation)
+        assert (bgr == expected[:, :, :3]).all()
+        assert (alpha == expected[:, :, 3]).all()
+
+
+def test_png_uses_opencv_default_compression_unless_configured():
+    config = ProcessingConfig()
+    assert get_encode_params("out.png", config) == []
+
+    config.png_compression = 6
+    assert get_encode_params("out.png", config) == [cv2.IMWRITE_PNG_COMPRESSION, 6]
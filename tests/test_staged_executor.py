@@ -0,0 +1,139 @@
+"""StagedExecutor（デコード・推論・モザイク・保存の並行実行）のテスト"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("torch")
+
+from auto_mosaic.src.pipeline import StagedExecutor  # noqa: E402
+
+
+class FakePipeline:
+    """ステージの処理を記録する ImagePipeline の代替"""
+
+    def __init__(self, fail_render=(), fail_infer=(), fail_write_submit=(), infer_delay=0.0):
+        self.fail_render = set(fail_render)
+        self.fail_infer = set(fail_infer)
+        self.fail_write_submit = set(fail_write_submit)
+        self.infer_delay = infer_delay
+        self.rendered = []
+        self._writer = ThreadPoolExecutor(max_workers=2)
+
+    def _emit(self, event_type, data):
+        pass
+
+    def get_output_writer(self, workers=None):
+        return self._writer
+
+    def flush_outputs(self):
+        pass
+
+    def estimate_file_memory(self, path):
+        return 0
+
+    def load_detection_image(self, path):
+        return path.name, 0.0, (1, 1), None
+
+    def infer_many(self, paths, images, full_shapes):
+        time.sleep(self.infer_delay)
+        for path in paths:
+            if path.name in self.fail_infer:
+                raise RuntimeError(f"infer failed: {path.name}")
+        return [{"image": image} for image in images]
+
+    def render(self, path, image, inference, alpha=None):
+        if path.name in self.fail_render:
+            raise RuntimeError(f"render failed: {path.name}")
+        self.rendered.append(path.name)
+        return {"path": path, "summary": {"input": path.name, "timings": {}}}
+
+    def write_outputs_async(self, job, on_done):
+        if job["path"].name in self.fail_write_submit:
+            raise RuntimeError(f"write failed: {job['path'].name}")
+        self._writer.submit(on_done, None)
+
+    def finish(self, job, start_time, current, total):
+        return job["summary"]
+
+
+def _run(pipeline, names, **kwargs):
+    results = {}
+
+    def on_result(index, image_path, summary, error):
+        results[index] = (Path(image_path).name, summary, error)
+
+    executor = StagedExecutor(pipeline, queue_size=2, **kwargs)
+    thread = threading.Thread(target=executor.run, args=(names, on_result), daemon=True)
+    thread.start()
+    thread.join(timeout=10)
+    assert not thread.is_alive(), "executor did not finish"
+    return results
+
+
+def test_renders_in_input_order_and_reports_every_image():
+    names = [f"{i}.png" for i in range(12)]
+    pipeline = FakePipeline()
+
+    results = _run(pipeline, names, decode_workers=4, batch_size=3)
+
+    assert pipeline.rendered == names
+    assert sorted(results) == list(range(12))
+    assert all(error is None for _, _, error in results.values())
+
+
+def test_stage_errors_are_reported_per_image():
+    names = [f"{i}.png" for i in range(6)]
+    pipeline = FakePipeline(fail_render={"1.png"}, fail_infer={"3.png"}, fail_write_submit={"4.png"})
+
+    results = _run(pipeline, names)
+
+    errors = {name for name, _, error in results.values() if error is not None}
+    assert errors == {"1.png", "3.png", "4.png"}
+    assert sorted(results) == list(range(6))
+
+
+def test_stop_request_ends_run_without_processing_remaining_images():
+    names = [f"{i}.png" for i in range(50)]
+    pipeline = FakePipeline(infer_delay=0.01)
+    stop = threading.Event()
+
+    def should_continue():
+        if len(pipeline.rendered) >= 3:
+            stop.set()
+        return not stop.is_set()
+
+    _run(pipeline, names, should_continue=should_continue)
+
+    assert 3 <= len(pipeline.rendered) < len(names)
+
+
+def test_interrupted_mosaic_stage_does_not_hang(monkeypatch):
+    names = [f"{i}.png" for i in range(20)]
+    pipeline = FakePipeline()
+    calls = []
+
+    def interrupt(path, image, inference, alpha=None):
+        calls.append(path.name)
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(pipeline, "render", interrupt)
+    executor = StagedExecutor(pipeline, queue_size=1)
+    outcome = {}
+
+    def target():
+        try:
+            executor.run(names)
+        except KeyboardInterrupt:
+            outcome["interrupted"] = True
+
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+    thread.join(timeout=10)
+
+    assert not thread.is_alive(), "executor hung after an interrupt"
+    assert outcome == {"interrupted": True}
+    assert calls == ["0.png"]